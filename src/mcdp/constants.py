@@ -26,6 +26,13 @@ class MCDPConstants(object):
 
     # force_plus_two_functions = True # currently unused (InvPlus2 -> InvPlusN)
 
+    # When choosing the connections to cut to break the cycles, each
+    # strongly connected component with at most this many cycles is
+    # solved exactly, within the time budget (seconds); otherwise a
+    # greedy heuristic is used.
+    feedback_arc_set_exact_max_cycles = 200
+    feedback_arc_set_time_budget = 2.0
+
     # TODO: make algo configurable for invplus, etc. see also: InvMult2.ARGO
 
     #
@@ -73,6 +80,80 @@ class MCDPConstants(object):
     InvPlus2Nat_max_antichain_size = 100000
     InvMult2Nat_memory_limit = 10000
 
+    # Upper sets on products of Rcomp are compared using the NumPy
+    # antichain representation when the number of pairs of points
+    # to compare is at least this.
+    antichain_array_min_pairs = 256
+
+    # The results of solve() for Series and DPLoop2 are kept in a
+    # cache shared by all the DPs with the same structure. The size
+    # is measured in number of points of the antichains stored.
+    solve_cache_enabled = True
+    solve_cache_max_size = 200000
+
+    # DPLoop2 starts the Kleene iteration for f1 from the fixed point
+    # of a previous query f1' <= f1, among the last few queries.
+    loop_warm_start = False
+    loop_warm_start_candidates = 32
+
+    # Number of processes used to solve the branches of Parallel and
+    # ParallelN and the frontier points of DPLoop2. 0 or 1: do not
+    # use a pool. Use mcdp_dp.set_solve_processes() to change it.
+    solve_processes = 0
+
+    # After compiling a composite NDP, merge the identical nodes of
+    # the DP tree, so that repeated sub-designs are shared.
+    dp_hash_consing = True
+
+    # Number of recent events kept in memory by a StreamingTracer;
+    # the others are only written to the trace file.
+    trace_ring_buffer_size = 1000
+
+    # Maximum number of entries in the caches of HostCache, for the
+    # parsed sources and for the evaluated things.
+    host_cache_max_parsed = 5000
+    host_cache_max_evaluated = 2000
+
+    # Number of compiled DPs (and of their lower/upper approximations)
+    # kept in memory by the web solver.
+    web_compiled_dp_cache_size = 50
+
+    # Number of threads that run the solves submitted with
+    # solver2/submit_async, and number of jobs remembered.
+    web_solve_workers = 2
+    web_solve_max_jobs = 200
+
+    # Largest n of the approximations get_dp_bounds(dp, n, n)
+    # used by mcdp_dp.solve_anytime.solve_anytime().
+    anytime_n_max = 1024
+
+    # Number of strings for which the line offsets used by Where
+    # are kept in memory.
+    line_index_cache_size = 100
+
+    # The editor reparses only the statements that changed; this is
+    # the number of parsed statements kept in memory, and the number
+    # of responses of ajax_parse that are remembered.
+    parse_statement_cache_size = 2000
+    web_parse_cache_size = 100
+
+    # Number of results of parse_wrap() kept in memory (by expression
+    # and string).
+    parse_wrap_cache_size = 1000
+
+    # If True, the parse actions find the end of each match by parsing
+    # again (the old way) and check it against the end given by the
+    # parser. Only useful for testing.
+    parse_where_end_with_tryparse = False
+
+    # If True, parse_wrap() uses the grammar compiled by
+    # mcdp_lang.parse_compiled, and pyparsing only if that fails
+    # (for the error messages).
+    parse_with_compiled_grammar = True
+
+    # Number of results of the search page returned for each request.
+    web_search_page_size = 50
+
     # Actually write to disk the reports
     test_allformats_report_write = False
 
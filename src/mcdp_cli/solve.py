@@ -53,6 +53,9 @@ class SolveDP(QuickAppBase):
 
         params.add_flag('contracts',
                         help='Activate contracts.')
+        params.add_int('processes', default=0, short='-j',
+                       help='Solve independent sub-problems using a pool '
+                       'of this many processes.')
 
     def go(self):
 
@@ -111,7 +114,7 @@ class SolveDP(QuickAppBase):
         solve_main(logger, config_dirs, maindir, cache_dir, model_name, lower, upper, out_dir, max_steps, query_strings,
                    intervals, _exp_advanced, expect_nres, imp, expect_nimp, plot, do_movie,
                    expect_res,
-                   make)
+                   make, processes=options.processes)
 
 
 mcdp_solve_main = SolveDP.get_sys_main()
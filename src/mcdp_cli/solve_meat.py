@@ -6,7 +6,9 @@ from decent_params.utils import UserError
 from reprep import Report
 
 from mcdp_dp.dp_transformations import get_dp_bounds
+from mcdp_dp.solve_pool import solve_processes
 from mcdp_dp.tracer import Tracer
+from mcdp_dp.tracer_stream import StreamingTracer
 from mcdp_library import Librarian
 from mcdp_posets import NotLeq, UpperSets, express_value_in_isomorphic_space, get_types_universe, LowerSets
 from mcdp_report.image_source import ImagesFromPaths
@@ -25,7 +27,8 @@ def solve_main(logger, config_dirs, maindir, cache_dir, model_name, lower, upper
                intervals, _exp_advanced, expect_nres, imp, expect_nimp, plot, do_movie,
                # expect_res=None,
                expect_res,  # @UnusedVariable
-               make
+               make,
+               processes=0,
                ):
     if out_dir is None:
         prefix = 'out/out'
@@ -72,8 +75,15 @@ def solve_main(logger, config_dirs, maindir, cache_dir, model_name, lower, upper
 
     logger.info('query: %s' % F.format(fg))
 
-    tracer = Tracer(logger=logger)
-    res, trace = solve_meat_solve_ftor(tracer, ndp, dp, fg, intervals, max_steps, _exp_advanced)
+    if plot:
+        # the trace is needed for the report, but it can be large
+        mkdirs_thread_safe(out)
+        trace_file = os.path.join(out, 'trace.pickle')
+        tracer = StreamingTracer(trace_file, logger=logger)
+    else:
+        tracer = Tracer(logger=logger)
+    with solve_processes(processes):
+        res, trace = solve_meat_solve_ftor(tracer, ndp, dp, fg, intervals, max_steps, _exp_advanced)
 
     nres = len(res.minimals)
 
@@ -146,6 +156,10 @@ def solve_main(logger, config_dirs, maindir, cache_dir, model_name, lower, upper
     #                               res=res, res_expected=res_expected, compact=True)
 
     if plot:
+        # no more events: the report reads the trace from the file
+        tracer.close()
+        trace = tracer.get_reader()
+
         r = Report()
         if _exp_advanced:
             from mcdp_report.generic_report_utils import generic_report
@@ -206,7 +220,7 @@ def solve_meat_solve_rtof(trace, ndp, dp, r, intervals, max_steps, exp_advanced)
     F = dp.get_fun_space()
     LF = LowerSets(F)
 
-    res = dp.solve_r(r)
+    res = dp.solve_r_trace(r, trace)
     fnames = ndp.get_fnames()
     x = ", ".join(fnames)
     # todo: add better formatting
@@ -1,13 +1,18 @@
 # -*- coding: utf-8 -*-
 import warnings
 
+from comptests.registrar import comptest
+from mcdp_dp import PrimitiveDP, dp_hash_cons
 from mcdp_dp.primitive import NotSolvableNeedsApprox
-from mcdp_dp_tests.basic import check_solve_r_chain, check_solve_f_chain
+from mcdp_dp_tests.basic import (check_solve_r_chain, check_solve_f_chain,
+    check_solve_many)
 from mcdp_dp_tests.dual import dual01_chain
+from mcdp_lang.parse_interface import parse_ndp
 from mcdp_posets import UpperSets
 from mcdp_tests.generation import for_all_nameddps
 from mcdp import MCDPConstants
 from mocdp.comp.interfaces import  NotConnected
+from nose.tools import assert_equal
 
 
 if MCDPConstants.test_dual01_chain:
@@ -75,6 +80,25 @@ def ndp_check_solve_f_chain(id_ndp, ndp):
     
     return check_solve_f_chain(id_ndp, dp)
 
+@for_all_nameddps
+def ndp_check_solve_many(id_ndp, ndp):
+    if '_inf' in id_ndp:
+        # plusinvnat3b_inf
+        print('Assuming that the suffix "_inf" in %r means that this will not converge'
+              % (id_ndp))
+        print('Skipping this test')
+        return
+
+    try:
+        ndp.check_fully_connected()
+    except NotConnected:
+        print('Skipping test_conversion because %r not connected.' % id_ndp)
+        return
+
+    dp = ndp.get_dp()
+
+    return check_solve_many(id_ndp, dp)
+
 @for_all_nameddps
 def test_conversion(id_ndp, ndp):
     if '_inf' in id_ndp:
@@ -114,3 +138,61 @@ def test_conversion(id_ndp, ndp):
         except NotSolvableNeedsApprox:
             break
 
+
+
+def count_dp_instances(dp):
+    """ Number of distinct instances in the DP tree. """
+    seen = {}
+    def visit(x):
+        if id(x) in seen:
+            return
+        seen[id(x)] = x
+        for v in x.__dict__.values():
+            if isinstance(v, PrimitiveDP):
+                visit(v)
+            elif isinstance(v, (tuple, list)):
+                for c in v:
+                    if isinstance(c, PrimitiveDP):
+                        visit(c)
+    visit(dp)
+    return len(seen)
+
+
+@comptest
+def check_dp_hash_cons():
+    s = """
+    mcdp {
+        provides a [J]
+        provides b [J]
+        requires mass [g]
+        battery = mcdp {
+            provides capacity [J]
+            requires mass [g]
+            required mass >= provided capacity / (1 J/g) + 1 g
+        }
+        b1 = instance battery
+        b2 = instance battery
+        provided a <= capacity provided by b1
+        provided b <= capacity provided by b2
+        required mass >= mass required by b1 + mass required by b2
+    }
+    """
+    ndp = parse_ndp(s)
+    use = MCDPConstants.dp_hash_consing
+    try:
+        MCDPConstants.dp_hash_consing = False
+        dp0 = ndp.get_dp()
+        MCDPConstants.dp_hash_consing = True
+        dp1 = ndp.get_dp()
+    finally:
+        MCDPConstants.dp_hash_consing = use
+
+    n0 = count_dp_instances(dp0)
+    n1 = count_dp_instances(dp1)
+    assert n1 < n0, (n0, n1)
+    # idempotent
+    assert_equal(count_dp_instances(dp_hash_cons(dp1)), n1)
+
+    F = dp0.get_fun_space()
+    for f in F.get_test_chain(n=5):
+        assert_equal(dp0.solve(f).minimals, dp1.solve(f).minimals)
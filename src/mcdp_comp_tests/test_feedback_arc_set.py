@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import itertools
+import time
+
+from comptests.registrar import comptest
+from mocdp.comp.composite_makecanonical import enumerate_minimal_solution
+from mocdp.comp.feedback_arc_set import (feedback_arc_set,
+    greedy_feedback_arc_set)
+from networkx import DiGraph, MultiDiGraph, is_directed_acyclic_graph
+import numpy as np
+
+
+def random_graph(n, m, seed):
+    np.random.seed(seed)
+    G = MultiDiGraph()
+    G.add_nodes_from('n%d' % i for i in range(n))
+    for _ in range(m):
+        i, j = np.random.randint(0, n, size=2)
+        G.add_edge('n%d' % i, 'n%d' % j)
+    return G
+
+
+def weight_function(seed):
+    def edge_weight(e):
+        return 1 + (hash(e) + seed) % 3
+    return edge_weight
+
+
+def is_fas(G, edges):
+    H = DiGraph(G)
+    H.remove_edges_from(edges)
+    return is_directed_acyclic_graph(H)
+
+
+def brute_force_fas_weight(G, edge_weight):
+    edges = sorted(set(DiGraph(G).edges()))
+    res = None
+    for k in range(len(edges) + 1):
+        for subset in itertools.combinations(edges, k):
+            if is_fas(G, subset):
+                w = sum(edge_weight(e) for e in subset)
+                res = w if res is None else min(res, w)
+    return res
+
+
+@comptest
+def check_feedback_arc_set_exact():
+    for seed in range(10):
+        G = random_graph(5, 9, seed)
+        edge_weight = weight_function(seed)
+        fas = feedback_arc_set(G, edge_weight, enumerate_minimal_solution)
+        assert is_fas(G, fas), fas
+        w = sum(edge_weight(e) for e in fas)
+        assert w == brute_force_fas_weight(G, edge_weight), seed
+
+
+@comptest
+def check_feedback_arc_set_greedy():
+    for seed in range(10):
+        G = random_graph(30, 90, seed)
+        edge_weight = weight_function(seed)
+        H = DiGraph(G)
+        H.remove_edges_from([(u, v) for u, v in H.edges() if u == v])
+        fas = greedy_feedback_arc_set(H, edge_weight)
+        assert is_fas(H, fas)
+        # no edge can be put back
+        for e in fas:
+            assert not is_fas(H, fas - set([e]))
+
+
+@comptest
+def check_feedback_arc_set_many_loops():
+    """ A dozen coupled loops: many cycles, so the heuristic is used. """
+    G = MultiDiGraph()
+    n = 12
+    for i in range(n):
+        a, b = 'a%d' % i, 'b%d' % i
+        G.add_edge(a, b)
+        G.add_edge(b, a)
+        for j in range(i + 1, n):
+            G.add_edge(b, 'a%d' % j)
+            G.add_edge('b%d' % j, a)
+    t0 = time.time()
+    fas = feedback_arc_set(G, lambda e: 1, enumerate_minimal_solution)
+    assert is_fas(G, fas)
+    assert time.time() - t0 < 30
+
+
+@comptest
+def check_iterate_cycles_as_edges():
+    from mocdp.comp.connection import (iterate_cycles_as_edges,
+        simple_cycles_as_edges)
+    G = random_graph(12, 60, 0)
+    cycles = list(iterate_cycles_as_edges(G, max_cycles=10))
+    assert len(cycles) == 10
+    for c in cycles:
+        for (a, b) in c:
+            assert G.has_edge(a, b)
+    H = DiGraph()
+    H.add_edges_from([('a', 'b'), ('b', 'c'), ('a', 'c')])
+    assert simple_cycles_as_edges(H) == set()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import logging
+import os
 
 from quickapp import QuickApp
 
@@ -17,6 +18,9 @@ class Depgraph(QuickApp):
                            help='Other libraries, separated by :')
         params.add_string('maindir', default='.', short='-d',
                            help='Library directories containing models')
+        params.add_string('index_dir', default=None,
+                           help='Where to remember the dependencies of each file '
+                                '(default: <output>/_cached/depgraph)')
 
         params.accept_extra()
         #         params.add_flag('cache')
@@ -36,8 +40,11 @@ class Depgraph(QuickApp):
 
         config_dirs = options.config_dirs.split(":")
         maindir = options.maindir
+        index_dir = options.index_dir
+        if index_dir is None:
+            index_dir = os.path.join(options.output, '_cached', 'depgraph')
         res = context.comp(find_dependencies, config_dirs=config_dirs,
-                           maindir=maindir, seeds=seeds)
+                           maindir=maindir, seeds=seeds, index_dir=index_dir)
 
         print('config_dirs: {}'.format(config_dirs))
         print('maindir: {}'.format(maindir))
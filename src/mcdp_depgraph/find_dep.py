@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import os
+
 from contracts import contract
 from contracts.utils import raise_desc
 
@@ -8,17 +10,24 @@ from mcdp_lang.namedtuple_tricks import (
     isnamedtupleinstance, isnamedtuplewhere)
 from mcdp_lang.parse_actions import parse_wrap
 from mcdp_lang.parts import CDPLanguage
+from mcdp_lang.scan_loads import scan_load_references
 from mcdp_lang.syntax import Syntax
 from mcdp_library import Librarian
+from mcdp_library.compile_cache import source_hash
+from mcdp_library.dependency_index import DependencyIndex
 from mcdp_library.specs_def import SPEC_MODELS
 from mcdp_utils_misc import memoize_simple
 import networkx as nx
 
 
-@contract(config_dirs='list(str)', maindir='str', seeds='None|seq(str)')
-def find_dependencies(config_dirs, maindir, seeds):
+@contract(config_dirs='list(str)', maindir='str', seeds='None|seq(str)',
+          index_dir='None|str')
+def find_dependencies(config_dirs, maindir, seeds, index_dir=None):
     """
         returns res, with res['fd'] ~ FindDependencies
+
+        If index_dir is given, the dependencies of each file are
+        remembered there (see FindDependencies).
     """
     librarian = Librarian()
     for e in config_dirs:
@@ -26,7 +35,7 @@ def find_dependencies(config_dirs, maindir, seeds):
 
     default_library = librarian.get_library_by_dir(maindir)
 
-    fd = FindDependencies(default_library)
+    fd = FindDependencies(default_library, index_dir=index_dir)
 
     if seeds is None:
         # add all models for all libraries
@@ -43,6 +52,7 @@ def find_dependencies(config_dirs, maindir, seeds):
         pass
 
     fd.search(seeds)
+    fd.save_indices()
 
     res = {}
     res['fd'] = fd
@@ -86,12 +96,47 @@ types = [
 ]
 
 
+def get_entry_ext(s):
+    for klass, ext in types:
+        if isinstance(s, klass):
+            return ext
+    raise NotImplementedError(s.__repr__())
+
+
+def dep_from_entry(s):
+    """ The reference (ext, libname, name) used by DependencyIndex. """
+    return (get_entry_ext(s), s.libname, s.name)
+
+
+def entry_from_dep(dep):
+    ext, libname, name = dep
+    for klass, ext2 in types:
+        if ext == ext2:
+            return klass(libname=libname, name=name)
+    raise ValueError(dep)
+
+
 class FindDependencies():
+    """
+        The direct dependencies of each file are found with
+        scan_load_references(), and with the parser only if the scanner
+        gives up or a name could refer to more than one file.
+
+        The references found are remembered in a DependencyIndex for
+        each library, by the hash of the file; if index_dir is given,
+        the indices are saved there as <libname>.json by save_indices(),
+        and used again in the next run. The references found by the
+        scanner do not say what the thing is, so they are resolved
+        again with the files in the library each time.
+    """
 
-    def __init__(self, library):
+    def __init__(self, library, index_dir=None):
         self.library = library
         self.default_library_name = library.library_name
         self.visited = {}
+        self.index_dir = index_dir
+        # libname -> DependencyIndex
+        self.indices = {}
 
     def create_graph(self):
         """ Create a graph where each node is a an Entry """
@@ -121,6 +166,8 @@ class FindDependencies():
     def __setstate__(self, x):
         self.default_library_name = x['default_library_name']
         self.visited = x['visited']
+        self.index_dir = x.get('index_dir', None)
+        self.indices = x.get('indices', {})
         self.library = 'not-set-after-pickle'
 
     def __getstate__(self):
@@ -154,28 +201,103 @@ class FindDependencies():
 
             print('%s -> %s' % (s, self.visited[s]))
 
+    def get_index(self, libname):
+        """ Returns the DependencyIndex for the library. """
+        if not libname in self.indices:
+            if self.index_dir is None:
+                filename = None
+            else:
+                filename = os.path.join(self.index_dir, '%s.json' % libname)
+            self.indices[libname] = DependencyIndex(filename)
+        return self.indices[libname]
+
+    def save_indices(self):
+        for index in self.indices.values():
+            index.save()
+
     def get_dependencies(self, s):
         assert isinstance(s, Entry), s
         if isinstance(s, EntryNDP):
             parse_expr = Syntax.ndpt_dp_rvalue
-            ext = MCDPConstants.ext_ndps
         elif isinstance(s, EntryTemplate):
             parse_expr = Syntax.template
-            ext = MCDPConstants.ext_templates
         elif isinstance(s, EntryPoset):
             parse_expr = Syntax.space
-            ext = MCDPConstants.ext_posets
         else:
             raise NotImplementedError(s.__repr__())
+        ext = get_entry_ext(s)
 
         library = self.get_library(s.libname)
         basename = s.name + '.' + ext
 
         d = library._get_file_data(basename)
         string = d['data']
+        h = source_hash(string)
+
+        index = self.get_index(s.libname)
+        refs = index.lookup(basename, h)
+        if refs is None:
+            refs = self.scan_references(s, string)
+            if refs is not None:
+                index.update(basename, h, refs)
+
+        if refs is not None:
+            res = self.resolve_references(refs)
+            if res is not None:
+                return res
+
+        # The parser says what each thing is.
         x = parse_wrap(parse_expr, string)[0]
+        res = self.collect_dependencies(s, x)
+        index.update(basename, h, [dep_from_entry(e) for e in res])
+        return res
+
+    def scan_references(self, s, string):
+        """ Returns the references (None, libname, name) found by
+            scan_load_references(), or None if the parser is needed. """
+        refs = scan_load_references(string)
+        if refs is None:
+            return None
+        res = []
+        for ref in refs:
+            libname = ref.libname if ref.libname is not None else s.libname
+            res.append((None, libname, ref.name))
+        return res
+
+    def resolve_references(self, refs):
+        """ Returns the set of entries for the references (ext, libname,
+            name); if ext is None, it is found from the files in the
+            library. Returns None if the parser is needed. """
+        deps = set()
+        for ext, libname, name in refs:
+            if ext is not None:
+                deps.add(entry_from_dep((ext, libname, name)))
+                continue
+            try:
+                library = self.get_library(libname)
+            except DPSemanticError:
+                return None
+            found = [klass for klass, ext2 in types
+                     if library.file_exists(name + '.' + ext2)]
+            if len(found) != 1:
+                # not found, or ambiguous
+                return None
+            klass, = found
+            deps.add(klass(libname=libname, name=name))
+        return deps
 
-        return self.collect_dependencies(s, x)
+    def get_dependents(self, s):
+        """ Returns the set of entries that depend directly on s, among
+            the files of the libraries whose dependencies are indexed
+            (and that might depend on it, for the references found by
+            the scanner). """
+        ext, libname, name = dep_from_entry(s)
+        res = set()
+        for libname2, index in self.indices.items():
+            for basename in index.get_dependents(ext, libname, name):
+                name2, ext2 = os.path.splitext(basename)
+                res.add(entry_from_dep((ext2[1:], libname2, name2)))
+        return res
 
     def collect_dependencies(self, s, x):
         assert isnamedtuplewhere(x), x
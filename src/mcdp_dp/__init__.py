@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 from .primitive import *
+from .solve_cache import *
+from .solve_pool import *
 from .dp_loop2 import *
 from .dp_series import *
 from .dp_parallel import *
@@ -9,6 +11,7 @@ from .dp_identity import *
 from .dp_sum import *
 
 from .dp_flatten import *
+from .dp_hash_consing import *
 
 from .dp_max import *
 from .dp_terminator import *
@@ -2,8 +2,11 @@
 from contracts import contract
 from contracts.utils import raise_desc
 from mcdp_dp import NotFeasible
-from mcdp_posets import LowerSet, Poset, UpperSet, poset_maxima, poset_minima
+from mcdp_posets import (LowerSet, Poset, UpperSet, get_vector_key,
+    poset_maxima_for, poset_minima, poset_minima_for)
+from mcdp_posets.find_poset_minima.skyline import skyline_minima_keyed
 from mcdp.development import do_extra_checks
+import numpy as np
 
 from .primitive import PrimitiveDP
 
@@ -28,26 +31,52 @@ class CatalogueDP(PrimitiveDP):
         self.entries = entries
         PrimitiveDP.__init__(self, F=F, R=R, I=I)
 
+    def __getstate__(self):
+        state = dict(**self.__dict__)
+        state.pop('_index', None)
+        return state
+
+    def _get_index(self):
+        """ The index is built at the first query. """
+        if not '_index' in self.__dict__:
+            self._index = CatalogueIndex(self.F, self.R, self.entries)
+        return self._index
+
     def solve(self, f):
         R = self.R
-        F = self.F
-        options_r = []
-        for _name, f_max, r_min in self.entries:
-            if F.leq(f, f_max):
-                options_r.append(r_min)
-
-        rs = poset_minima(options_r, R.leq)
+        index = self._get_index()
+        options_r = [e[2] for e in index.pruned_feasible_f(f)]
+        rs = poset_minima_for(R, options_r)
         return R.Us(rs)
 
-    def solve_r(self, r):
+    def solve_many(self, fs):
+        """ If F is a product of chains, checks the feasibility of
+            all the Pareto-optimal entries for all the points as one
+            array comparison. """
+        index = self._get_index()
+        a = _as_array(self.F, fs)
+        if a is None or index.pruned_f is None:
+            return PrimitiveDP.solve_many(self, fs)
+        f_max = index.pruned_f.keys
+        entries = index.pruned
         R = self.R
-        F = self.F
-        options_f = []
-        for _name, f_max, r_min in self.entries:
-            if R.leq(r_min, r):
-                options_f.append(f_max)
+        res = []
+        # bound the size of the n×m×k temporary
+        block = max(1, 2**20 // (f_max.size + 1))
+        for i0 in range(0, len(fs), block):
+            b = a[i0:i0 + block]
+            feasible = np.all(b[:, None, :] <= f_max[None, :, :], axis=2)
+            for row in feasible:
+                options_r = [entries[j][2] for j in np.flatnonzero(row)]
+                rs = poset_minima_for(R, options_r)
+                res.append(R.Us(rs))
+        return res
 
-        rs = poset_maxima(options_f, F.leq)
+    def solve_r(self, r):
+        F = self.F
+        index = self._get_index()
+        options_f = [e[1] for e in index.pruned_feasible_r(r)]
+        rs = poset_maxima_for(F, options_f)
         return F.Ls(rs)
     
     def evaluate(self, i):
@@ -56,15 +85,12 @@ class CatalogueDP(PrimitiveDP):
         options_r = []
         options_f = []
 
-        for name, f_max, r_min in self.entries:
-            if name != i:
-                continue
-
+        for _name, f_max, r_min in self._get_index().by_name.get(i, []):
             options_f.append(f_max)
             options_r.append(r_min)
 
-        rs = poset_minima(options_r, self.R.leq)
-        fs = poset_maxima(options_f, self.F.leq)
+        rs = poset_minima_for(self.R, options_r)
+        fs = poset_maxima_for(self.F, options_f)
         ur = UpperSet(rs, self.R)
         lf = LowerSet(fs, self.F)
         return lf, ur
@@ -73,9 +99,8 @@ class CatalogueDP(PrimitiveDP):
         R = self.R
         F = self.F
         options_m = set()
-        for name, f_max, r_min in self.entries:
-            if F.leq(f, f_max) and R.leq(r_min, r):
-                options_m.add(name)
+        for name, _f_max, _r_min in self._get_index().feasible_f_r(f, r):
+            options_m.add(name)
         if not options_m:
             msg = 'Not feasible.'
             raise_desc(NotFeasible, msg, f=F.format(f), r=R.format(r))
@@ -91,3 +116,155 @@ class CatalogueDP(PrimitiveDP):
         return 'r ⟼ Max { f_i | r_i ≼ f}'
     
 
+
+
+class CatalogueIndex(object):
+    """
+        Indices over the entries (name, f_max, r_min) of a catalogue.
+
+        - pruned: the Pareto-optimal entries. An entry is dominated
+          if another one provides at least as much functionality
+          with at most the same resources; the dominated entries
+          never change the result of solve() and solve_r().
+        - by_name: name -> entries, for evaluate().
+
+        If F (resp. R) is a product of chains, each dimension of the
+        entries is sorted, so that the entries feasible for f
+        (resp. r) are found by bisection on the most selective
+        dimension and by checking only those candidates.
+        Otherwise the entries are scanned.
+    """
+
+    def __init__(self, F, R, entries):
+        self.F = F
+        self.R = R
+        self.entries = entries
+        self.by_name = {}
+        for e in entries:
+            self.by_name.setdefault(e[0], []).append(e)
+
+        self.pruned = pareto_prune_entries(F, R, entries)
+
+        self.all_f = SortedColumns.create(F, [e[1] for e in entries])
+        self.all_r = SortedColumns.create(R, [e[2] for e in entries])
+        self.pruned_f = SortedColumns.create(F, [e[1] for e in self.pruned])
+        self.pruned_r = SortedColumns.create(R, [e[2] for e in self.pruned])
+
+    def pruned_feasible_f(self, f):
+        """ The Pareto-optimal entries with f ≼ f_max. """
+        return self._select(self.pruned, self.pruned_f, self.F, 1, f, True)
+
+    def pruned_feasible_r(self, r):
+        """ The Pareto-optimal entries with r_min ≼ r. """
+        return self._select(self.pruned, self.pruned_r, self.R, 2, r, False)
+
+    def feasible_f_r(self, f, r):
+        """ All the entries with f ≼ f_max and r_min ≼ r. """
+        if self.all_f is not None and self.all_r is not None:
+            i_f = self.all_f.select(f, above=True)
+            i_r = self.all_r.select(r, above=False)
+            if i_f is not None and i_r is not None:
+                indices = np.intersect1d(i_f, i_r, assume_unique=True)
+                return [self.entries[j] for j in indices]
+        candidates = self._select(self.entries, self.all_f, self.F, 1, f, True)
+        R = self.R
+        return [e for e in candidates if R.leq(e[2], r)]
+
+    @staticmethod
+    def _select(entries, columns, P, i, x, above):
+        if columns is not None:
+            indices = columns.select(x, above)
+            if indices is not None:
+                return [entries[j] for j in indices]
+        if above:
+            return [e for e in entries if P.leq(x, e[i])]
+        else:
+            return [e for e in entries if P.leq(e[i], x)]
+
+
+class SortedColumns(object):
+    """ The keys of a list of points of a product of chains,
+        and for each dimension the order that sorts them. """
+
+    def __init__(self, P, keys):
+        self.P = P
+        self.keys = keys
+        self.order = []
+        self.sorted = []
+        for i in range(keys.shape[1]):
+            order = np.argsort(keys[:, i], kind='mergesort')
+            self.order.append(order)
+            self.sorted.append(keys[order, i])
+
+    @staticmethod
+    def create(P, xs):
+        """ Returns None if P is not a product of chains. """
+        keys = _as_array(P, xs)
+        if keys is None:
+            return None
+        return SortedColumns(P, keys)
+
+    def select(self, x, above):
+        """
+            Returns the sorted indices of the points y such that
+            x ≼ y (above) or y ≼ x (not above); or None if x
+            cannot be represented.
+        """
+        xk = _as_array(self.P, [x])
+        if xk is None:
+            return None
+        xk = xk[0]
+        best = None
+        for i, col in enumerate(self.sorted):
+            if above:
+                lo = np.searchsorted(col, xk[i], side='left')
+                candidates = self.order[i][lo:]
+            else:
+                hi = np.searchsorted(col, xk[i], side='right')
+                candidates = self.order[i][:hi]
+            if best is None or len(candidates) < len(best):
+                best = candidates
+        sub = self.keys[best]
+        if above:
+            ok = np.all(sub >= xk, axis=1)
+        else:
+            ok = np.all(sub <= xk, axis=1)
+        return np.sort(best[ok])
+
+
+def pareto_prune_entries(F, R, entries):
+    """
+        Returns the entries that are not dominated by another entry,
+        in the original order. Of the entries with the same f_max
+        and r_min, only the first one is kept.
+    """
+    fkey = get_vector_key(F)
+    rkey = get_vector_key(R)
+    if fkey is not None and rkey is not None:
+        def key(i):
+            _, f_max, r_min = entries[i]
+            return [-x for x in fkey(f_max)] + rkey(r_min)
+        keep = skyline_minima_keyed(range(len(entries)), key)
+    else:
+        def leq(i, j):
+            _, f1, r1 = entries[i]
+            _, f2, r2 = entries[j]
+            return F.leq(f2, f1) and R.leq(r1, r2)
+        keep = poset_minima(range(len(entries)), leq)
+    return tuple(entries[i] for i in sorted(keep))
+
+
+def _as_array(P, xs):
+    """ Returns the n×k float array of the keys of xs, or None if
+        P is not a product of chains. """
+    key = get_vector_key(P)
+    if key is None:
+        return None
+    a = np.array([key(x) for x in xs], dtype='float64')
+    if a.ndim != 2:
+        return None
+    # large integers are not represented exactly
+    finite = a[np.isfinite(a)]
+    if finite.size and np.max(np.abs(finite)) >= 2**53:
+        return None
+    return a
@@ -2,8 +2,7 @@
 from contracts import contract
 from contracts.utils import check_isinstance, indent, raise_desc
 from mcdp_posets import (
-    Coproduct1, NotBelongs, NotEqual, get_types_universe, poset_minima)
-from mcdp_posets.find_poset_minima.baseline_n2 import poset_maxima
+    Coproduct1, NotBelongs, NotEqual, get_types_universe, poset_minima_for, poset_maxima_for)
 from mcdp.development import do_extra_checks, mcdp_dev_warning
 
 from .primitive import NotFeasible, PrimitiveDP
@@ -96,7 +95,7 @@ class CoProductDP(PrimitiveDP):
             rs = dp.solve(f)
             s.extend(rs.minimals)
 
-        res = R.Us(poset_minima(s, R.leq))
+        res = R.Us(poset_minima_for(R, s))
 
         return res
 
@@ -110,7 +109,7 @@ class CoProductDP(PrimitiveDP):
             lf = dp.solve_r(r)
             s.extend(lf.maximals)
 
-        res = F.Ls(poset_maxima(s, F.leq))
+        res = F.Ls(poset_maxima_for(F, s))
 
         return res
 
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from mcdp import logger
+
+from .primitive import PrimitiveDP
+from .solve_cache import dp_structural_key
+
+
+__all__ = [
+    'dp_hash_cons',
+]
+
+
+def dp_hash_cons(dp):
+    """
+        Merges the structurally identical nodes of the DP tree,
+        so that each sub-design is represented by one instance.
+
+        Two nodes are identical if they have the same structural key
+        (same type, spaces, parameters and children; see
+        dp_structural_key()). The children attributes are rewired
+        in place to the first instance found, which is returned
+        for the root.
+    """
+    table = {}  # structural key -> instance
+    seen = {}  # id(instance) -> canonical instance
+    res = _hash_cons(dp, table, seen)
+    nmerged = len(seen) - len(table)
+    if nmerged:
+        logger.debug('dp_hash_cons: %d nodes, %d merged.' % (len(seen), nmerged))
+    return res
+
+
+def _hash_cons(dp, table, seen):
+    canonical = seen.get(id(dp), None)
+    if canonical is not None:
+        return canonical
+
+    for k, v in list(dp.__dict__.items()):
+        if isinstance(v, PrimitiveDP):
+            v2 = _hash_cons(v, table, seen)
+        elif (isinstance(v, (tuple, list)) and v and
+              all(isinstance(x, PrimitiveDP) for x in v)):
+            v2 = type(v)(_hash_cons(x, table, seen) for x in v)
+            if all(a is b for a, b in zip(v, v2)):
+                v2 = v
+        else:
+            continue
+        if v2 is not v:
+            dp.__dict__[k] = v2
+
+    key = dp_structural_key(dp)
+    canonical = table.setdefault(key, dp)
+    seen[id(dp)] = canonical
+    return canonical
@@ -9,7 +9,9 @@ from mcdp.exceptions import mcdp_dev_warning
 
 from .primitive import ApproximableDP, NotSolvableNeedsApprox, PrimitiveDP
 from .repr_strings import repr_h_map_invmult
-from .sequences_invplus import Nat_mult_antichain_Min, invmultL_solve_options, invmultU_solve_options
+from .sequences_invplus import (
+    Nat_mult_antichain_Min, invmult_upperset, invmultL_solve_options,
+    invmultU_solve_options)
 from mcdp import MCDPConstants
 
 
@@ -91,7 +93,7 @@ class InvMult2U(PrimitiveDP):
     def solve(self, f):
         algo = InvMult2.ALGO
         options = invmultU_solve_options(F=self.F, R=self.R, f=f, n=self.n, algo=algo)
-        return self.R.Us(options)
+        return invmult_upperset(self.R, options)
     
     def solve_r(self, r):
         mcdp_dev_warning('this is not coherent with solve()')
@@ -136,7 +138,7 @@ class InvMult2L(PrimitiveDP):
     def solve(self, f):
         algo = InvMult2.ALGO
         options = invmultL_solve_options(F=self.F, R=self.R, f=f, n=self.n, algo=algo)
-        return self.R.Us(options)
+        return invmult_upperset(self.R, options)
         
     def repr_h_map(self):
         return repr_h_map_invmult(len(self.Rs))
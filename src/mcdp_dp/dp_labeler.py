@@ -33,6 +33,9 @@ class LabelerDP(PrimitiveDP):
     def solve(self, f):
         return self.dp.solve(f)
 
+    def solve_many(self, fs):
+        return self.dp.solve_many(fs)
+
     def solve_r(self, r):
         return self.dp.solve_r(r)
     
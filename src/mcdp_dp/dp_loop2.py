@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
-from collections import namedtuple
+from collections import OrderedDict, deque, namedtuple
 
 from contracts.utils import indent, raise_desc, raise_wrapped
+from mcdp import MCDPConstants
 from mcdp.development import do_extra_checks
 from mcdp_posets import (LowerSet, NotEqual, NotLeq, PosetProduct, UpperSet,
-    UpperSets, get_types_universe, poset_maxima, poset_minima)
+    UpperSets, get_types_universe, poset_maxima_for, poset_minima_for)
 from mcdp_posets.uppersets import upperset_project, LowerSets, lowerset_project
 
 from .primitive import Feasible, NotFeasible, PrimitiveDP
-from .tracer import Tracer
+from .solve_cache import solve_cache_get, solve_cache_set
+from .solve_pool import solve_many_in_pool, solve_pool_enabled
+from .tracer import NullTracer
 
 
 __all__ = [
@@ -69,9 +72,12 @@ class DPLoop2(PrimitiveDP):
         self.R1 = R1
         self.R2 = R2
 
-        self._solve_cache = {}
         PrimitiveDP.__init__(self, F=F, R=R, I=M)
 
+    def __getstate__(self):
+        state = dict(**self.__dict__)
+        state.pop('_recent_queries', None)
+        return state
 
     def _unpack_m(self, m):
         if do_extra_checks():
@@ -95,13 +101,13 @@ class DPLoop2(PrimitiveDP):
         for fi in LF0.maximals:
             fi1, _ = fi
             f1s.add(fi1)
-        f1s = poset_maxima(f1s, self.F.leq)
+        f1s = poset_maxima_for(self.F, f1s)
         LF = self.F.Ls(f1s)
         r1s = set()
         for ri in UR0.minimals:
             ri1, _ = ri
             r1s.add(ri1)
-        r1s = poset_minima(r1s, self.F.leq)
+        r1s = poset_minima_for(self.R, r1s)
         UR = self.R.Us(r1s)
         return LF, UR
 
@@ -111,7 +117,7 @@ class DPLoop2(PrimitiveDP):
         M, M_pack, _ = get_product_compact(self.M0, self.F2, self.R2)
         options = set()
 
-        R = self.solve_all_cached(f1, Tracer())
+        R = self.solve_all_cached(f1, NullTracer())
         res = R['res_all']
 
         for (r1_, r2_) in res.minimals:
@@ -196,7 +202,7 @@ class DPLoop2(PrimitiveDP):
         return s
 
     def solve(self, f1):
-        t = Tracer()
+        t = NullTracer()
         res = self.solve_trace(f1, t)
         return res
     
@@ -205,7 +211,7 @@ class DPLoop2(PrimitiveDP):
         return res['res_r1']
 
     def solve_r(self, r):
-        t = Tracer()
+        t = NullTracer()
         res = self.solve_r_trace(r, t)
         return res
     
@@ -214,41 +220,156 @@ class DPLoop2(PrimitiveDP):
         return res['res_f1']
 
     def solve_all_cached(self, f1, trace):
-        if not f1 in self._solve_cache:
+        R = solve_cache_get(self, 'solve_all', f1)
+        if R is None:
             #print('solving again %s' % f1.__str__())
-            R = self.solve_all(f1, trace)
-            self._solve_cache[f1] = R
+            seed = self._get_warm_start(f1)
+            R = self.solve_all(f1, trace, seed=seed)
+            self._set_solved(f1, R)
             
-        return trace.result(self._solve_cache[f1])
-    
-    def solve_all(self, f1, trace):
+        return trace.result(R)
+
+    def _set_solved(self, f1, R):
+        solve_cache_set(self, 'solve_all', f1, R)
+        if MCDPConstants.loop_warm_start:
+            if not '_recent_queries' in self.__dict__:
+                n = MCDPConstants.loop_warm_start_candidates
+                self._recent_queries = deque(maxlen=n)
+            self._recent_queries.append(f1)
+
+    def _get_warm_start(self, f1):
+        """
+            Returns the cached result for the largest recent query
+            f1' ≼ f1, or None.
+
+            For f1' ≼ f1, the fixed point for f1' is below the
+            fixed point for f1, and the iteration for f1 can start
+            from it rather than from the bottom.
+        """
+        if not MCDPConstants.loop_warm_start:
+            return None
+        F1 = self.F1
+        best_f = None
+        best = None
+        # most recent first
+        for f in reversed(self.__dict__.get('_recent_queries', [])):
+            if not F1.leq(f, f1):
+                continue
+            if best_f is not None and F1.leq(f, best_f):
+                continue
+            cached = solve_cache_get(self, 'solve_all', f)
+            if cached is not None:
+                best_f, best = f, cached
+        return best
+
+    def solve_many(self, f1s):
+        res = {}
+        todo = []
+        for f1 in OrderedDict.fromkeys(f1s):
+            cached = solve_cache_get(self, 'solve_all', f1)
+            if cached is not None:
+                res[f1] = cached
+            else:
+                todo.append(f1)
+        if todo:
+            results = self.solve_all_many(todo)
+            for f1 in todo:
+                self._set_solved(f1, results[f1])
+            res.update(results)
+        return [res[f1]['res_r1'] for f1 in f1s]
+
+    def solve_all_many(self, f1s):
+        """ Same as solve_all() for many values of f1, returning a
+            dict f1 -> result. The iterations proceed in lockstep: at
+            each step the queries for all the points that have not
+            converged yet are solved in one batch. """
+        dp0 = self.dp1
+        R = dp0.get_res_space()
+        UR = UpperSets(R)
+
+        s0 = R.Us(R.get_minimal_elements())
+        states = OrderedDict()
+        memos = {}
+        for f1 in f1s:
+            seed = self._get_warm_start(f1)
+            states[f1] = s0 if seed is None else seed['res_all']
+            memos[f1] = FrontierMemo()
+        results = {}
+        while states:
+            queries = set()
+            for f1, si_prev in states.items():
+                memo = memos[f1]
+                for ra in memo.get_frontier(si_prev):
+                    if not ra[1] in memo.solutions:
+                        queries.add((f1, ra[1]))
+            queries = list(queries)
+            hrs = solve_many_in_pool([(dp0, queries)])[0]
+            for (f1, r2), hr in zip(queries, hrs):
+                memos[f1].solutions[r2] = hr
+
+            for f1, si_prev in list(states.items()):
+                si_next, converged = next_iterate_f(R, si_prev, memos[f1])
+
+                if do_extra_checks():
+                    try:
+                        UR.check_leq(si_prev, si_next)
+                    except NotLeq as e:
+                        msg = 'Loop iteration invariant not satisfied.'
+                        raise_wrapped(Exception, e, msg, si_prev=si_prev,
+                                      si_next=si_next, dp=self.dp1)
+
+                if UR.leq(si_next, si_prev):
+                    del states[f1]
+                    del memos[f1]
+                    results[f1] = loop_result(si_next, converged)
+                else:
+                    states[f1] = si_next
+
+        return results
+
+    def solve_all(self, f1, trace, seed=None):
         """ Returns an upperset in UR. You want to project
-            it to R1 to use as the output. """
+            it to R1 to use as the output. 
+            
+            If seed is given, it is the result for some f1' ≼ f1, 
+            from which the iteration starts. """
         dp0 = self.dp1
         R = dp0.get_res_space()
-        R1 = R[0]
         UR = UpperSets(R)
 
         # we consider a set of iterates
-        # we start from the bottom
-        trace.log('Iterating in UR = %s' % UR.__str__())
+        trace.log(lambda: 'Iterating in UR = %s' % UR.__str__())
         
-        s0 = R.Us(R.get_minimal_elements()) 
-        S = [KleeneIteration(s=s0, s_converged=R.Us(set()),
+        if seed is None:
+            # we start from the bottom
+            s0 = R.Us(R.get_minimal_elements()) 
+            s0_converged = R.Us(set())
+        else:
+            trace.log('Warm start from a previous fixed point')
+            s0 = seed['res_all']
+            s0_converged = seed['res_converged']
+        S = [KleeneIteration(s=s0, s_converged=s0_converged,
                                 r=upperset_project(s0, 0),
-                                r_converged=R1.Us(set()))]
+                                r_converged=upperset_project(s0_converged, 0))]
+        trace.values(state0=S[0])
             
+        memo = FrontierMemo()
         for i in range(1, 1000000):  # XXX
             with trace.iteration(i) as t:
                 si_prev = S[-1].s
-                si_next, converged = solve_f_iterate(dp0, f1, R, si_prev, t)
+                si_next, converged = solve_f_iterate(dp0, f1, R, si_prev, t,
+                                                     memo=memo)
                 iteration = KleeneIteration(s=si_next, 
                                             s_converged=converged,
                                             r=upperset_project(si_next, 0),
                                             r_converged=upperset_project(converged, 0))
+                if not trace.enabled or trace.streaming:
+                    # nobody will look at the history, or it can be
+                    # rebuilt from the "state" of each iteration
+                    del S[:-1]
                 S.append(iteration)
                 
-                t.log('R = %s' % UR.format(si_next))
+                t.log(lambda: 'R = %s' % UR.format(si_next))
 
                 if do_extra_checks():
                     try:
@@ -266,13 +387,11 @@ class DPLoop2(PrimitiveDP):
                     # todo: add reason why interrupted
                     break
 
-        trace.values(type='loop2', UR=UR, R=R, dp=self, iterations=S)
-        
-        res_all = S[-1].s
-        res_r1 = upperset_project(res_all, 0)
-        result = dict(res_all=res_all, res_r1=res_r1)
+        trace.values(type='loop2', UR=UR, R=R, dp=self)
+        if not trace.streaming:
+            trace.values(iterations=S)
         
-        return result
+        return loop_result(S[-1].s, S[-1].s_converged)
 
     def solve_r_all(self, r1, trace):
         """ Returns an upperset in UR. You want to project
@@ -284,12 +403,13 @@ class DPLoop2(PrimitiveDP):
 
         # we consider a set of iterates
         # we start from the bottom
-        trace.log('Iterating in LF = %s' % LF.__str__())
+        trace.log(lambda: 'Iterating in LF = %s' % LF.__str__())
         
         s0 = F.Ls(F.get_maximal_elements()) 
         S = [KleeneIteration(s=s0, s_converged=F.Ls(set()),
                                 r=lowerset_project(s0, 0),
                                 r_converged=F1.Ls(set()))]
+        trace.values(state0=S[0])
             
         for i in range(1, 1000000):  # XXX
             with trace.iteration(i) as t:
@@ -299,9 +419,11 @@ class DPLoop2(PrimitiveDP):
                                             s_converged=converged,
                                             r=lowerset_project(si_next, 0),
                                             r_converged=lowerset_project(converged, 0))
+                if not trace.enabled or trace.streaming:
+                    del S[:-1]
                 S.append(iteration)
                 
-                t.log('si_next = %s' % LF.format(si_next))
+                t.log(lambda: 'si_next = %s' % LF.format(si_next))
 
                 if do_extra_checks():
                     try:
@@ -317,7 +439,9 @@ class DPLoop2(PrimitiveDP):
                     t.log('Breaking because converged (iteration %s) ' % i)
                     break
 
-        trace.values(type='loop2r', LF=LF, F=F, dp=self, iterations=S)
+        trace.values(type='loop2r', LF=LF, F=F, dp=self)
+        if not trace.streaming:
+            trace.values(iterations=S)
         
         res_all = S[-1].s
         res_f1 = lowerset_project(res_all, 0)
@@ -326,38 +450,115 @@ class DPLoop2(PrimitiveDP):
         return result
 
 
-def solve_f_iterate(dp0, f1, R, S, trace):
+def loop_result(res_all, res_converged):
+    """ The result of solve_all(). """
+    res_r1 = upperset_project(res_all, 0)
+    return dict(res_all=res_all, res_r1=res_r1, res_converged=res_converged)
+
+
+class FrontierMemo(object):
+    """
+        What solve_f_iterate() remembers between iterations, so that
+        only the minimals that were not in the previous iterate
+        need to be expanded:
+
+        - solutions: r2 -> h(f1, r2), the solutions of dp0
+        - contributions: ra -> (next, converged), the points that ra
+          contributes to the next iterate and to the converged set.
+
+        The minimals of the iterates that are not in the current one
+        never come back (the iterates are a chain in UR), so they are
+        forgotten at each iteration.
+    """
+
+    def __init__(self):
+        self.solutions = {}
+        self.contributions = {}
+
+    def get_frontier(self, S):
+        """ The minimals of S that were not expanded yet. """
+        return [ra for ra in S.minimals if not ra in self.contributions]
+
+    def forget_others(self, S):
+        """ Forgets everything not relative to the minimals of S. """
+        minimals = S.minimals
+        r2s = set(ra[1] for ra in minimals)
+        for ra in list(self.contributions):
+            if not ra in minimals:
+                del self.contributions[ra]
+        for r2 in list(self.solutions):
+            if not r2 in r2s:
+                del self.solutions[r2]
+
+
+def solve_f_iterate(dp0, f1, R, S, trace, memo=None):
     """ 
     
         Returns the next iteration  si \in UR 
 
         Min ( h(f1, r20) \cup  !r20 ) 
         
+        If memo (a FrontierMemo) is passed, only the minimals of S 
+        that were not in the previous iterate are expanded. 
     """
     UR = UpperSets(R)
     if do_extra_checks():
         UR.belongs(S)
-    R2 = R[1]
+
+    if memo is None:
+        memo = FrontierMemo()
+
+    r2s = [ra[1] for ra in memo.get_frontier(S)]
+    todo = [r2 for r2 in OrderedDict.fromkeys(r2s) if not r2 in memo.solutions]
+    if solve_pool_enabled() and len(todo) > 1:
+        # the traces of the sub-problems are not recorded
+        queries = [(f1, r2) for r2 in todo]
+        hrs = solve_many_in_pool([(dp0, queries)])[0]
+        memo.solutions.update(zip(todo, hrs))
+    else:
+        for r2 in todo:
+            memo.solutions[r2] = dp0.solve_trace((f1, r2), trace)
+
+    return next_iterate_f(R, S, memo)
+
+
+def next_iterate_f(R, S, memo):
+    """
+        Returns the next iteration and the converged points, given
+        a FrontierMemo that contains the solutions h(f1, ra[1]) for 
+        each minimal ra of S.
+    """
+    for ra in memo.get_frontier(S):
+        hr = memo.solutions[ra[1]]
+        memo.contributions[ra] = _contribution(R, ra, hr)
+    memo.forget_others(S)
+
     converged = set()  # subset of solutions for which they converged
     nextit = set()
-    # find the set of all r2s
-
     for ra in S.minimals:
-        hr = dp0.solve_trace((f1, ra[1]), trace)
+        ra_next, ra_converged = memo.contributions[ra]
+        nextit.update(ra_next)
+        converged.update(ra_converged)
 
-        for rb in hr.minimals:
-            valid = R.leq(ra, rb) 
+    nextit = R.Us(poset_minima_for(R, nextit))
+    converged = R.Us(poset_minima_for(R, converged))
 
-            if valid:
-                nextit.add(rb)
+    return nextit, converged
 
-                feasible = R2.leq(rb[1], ra[1])
-                if feasible:
-                    converged.add(rb)
 
-    nextit = R.Us(poset_minima(nextit, R.leq))
-    converged = R.Us(poset_minima(converged, R.leq))
+def _contribution(R, ra, hr):
+    R2 = R[1]
+    nextit = []
+    converged = []
+    for rb in hr.minimals:
+        valid = R.leq(ra, rb) 
+
+        if valid:
+            nextit.append(rb)
 
+            feasible = R2.leq(rb[1], ra[1])
+            if feasible:
+                converged.append(rb)
     return nextit, converged
 
 def solve_r_iterate(dp0, r1, F, S, trace):
@@ -384,8 +585,8 @@ def solve_r_iterate(dp0, r1, F, S, trace):
                 if feasible:
                     converged.add(fb)
 
-    nextit = F.Ls(poset_maxima(nextit, F.leq))
-    converged = F.Ls(poset_maxima(converged, F.leq))
+    nextit = F.Ls(poset_maxima_for(F, nextit))
+    converged = F.Ls(poset_maxima_for(F, converged))
 
     return nextit, converged
 
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
 import itertools
 
 from contracts.utils import indent, raise_wrapped
@@ -9,6 +10,7 @@ from mcdp.development import do_extra_checks
 
 from .dp_series import get_product_compact
 from .primitive import PrimitiveDP
+from .solve_pool import solve_in_pool, solve_many_in_pool
 from .repr_strings import repr_h_map_parallel
 
 
@@ -117,9 +119,10 @@ class Parallel(PrimitiveDP):
 
         f1, f2 = f
 
-        r1 = self.dp1.solve(f1)
-        r2 = self.dp2.solve(f2)
-        
+        r1, r2 = solve_in_pool([(self.dp1, f1), (self.dp2, f2)])
+        return self._combine(r1, r2)
+
+    def _combine(self, r1, r2):
         R = self.get_res_space()
         s = []
         for m1, m2 in itertools.product(r1.minimals, r2.minimals):
@@ -129,6 +132,16 @@ class Parallel(PrimitiveDP):
 
         return res
 
+    def solve_many(self, fs):
+        """ Solves each branch once for all the distinct components. """
+        f1s = list(OrderedDict.fromkeys(f[0] for f in fs))
+        f2s = list(OrderedDict.fromkeys(f[1] for f in fs))
+        batches = [(self.dp1, f1s), (self.dp2, f2s)]
+        res1, res2 = solve_many_in_pool(batches)
+        r1s = dict(zip(f1s, res1))
+        r2s = dict(zip(f2s, res2))
+        return [self._combine(r1s[f1], r2s[f2]) for f1, f2 in fs]
+
     def solve_r(self, r):
         r1, r2 = r
         lf1 = self.dp1.solve_r(r1)
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
 import itertools
 
 from contracts import contract
@@ -10,6 +11,7 @@ from mcdp.development import do_extra_checks
 
 from .dp_series import get_product_compact
 from .primitive import PrimitiveDP
+from .solve_pool import solve_in_pool, solve_many_in_pool
 
 
 __all__ = [
@@ -61,12 +63,21 @@ class ParallelN(PrimitiveDP):
             F = self.get_fun_space()
             F.belongs(f)
 
-        res = []
-        for i, dp in enumerate(self.dps):
-            ri = dp.solve(f[i])
-            res.append(ri)
-            
+        res = solve_in_pool(zip(self.dps, f))
         return upperset_product_multi(tuple(res))
+
+    def solve_many(self, fs):
+        """ Solves each branch once for all the distinct components. """
+        uniques = []
+        for i, dp in enumerate(self.dps):
+            uniques.append(list(OrderedDict.fromkeys(f[i] for f in fs)))
+        results = solve_many_in_pool(zip(self.dps, uniques))
+        sols = [dict(zip(u, r)) for u, r in zip(uniques, results)]
+        res = []
+        for f in fs:
+            ri = tuple(sol[fi] for sol, fi in zip(sols, f))
+            res.append(upperset_product_multi(ri))
+        return res
         
     def solve_r(self, r):
         res = []
@@ -3,7 +3,7 @@ from contracts import contract
 from contracts.utils import raise_desc, check_isinstance
 from mcdp_dp.dp_inv_mult import invmultU_solve_options, invmultL_solve_options
 from mcdp_dp.repr_strings import repr_hd_map_productn
-from mcdp_dp.sequences_invplus import Nat_mult_antichain_Max
+from mcdp_dp.sequences_invplus import Nat_mult_antichain_Max, invmult_lowerset
 from mcdp_maps import ProductNMap, ProductNNatMap
 from mcdp_posets import Rcomp, RcompUnits
 from mcdp_posets.rcomp_units import check_mult_units_consistency_seq
@@ -106,7 +106,7 @@ class Product2DP_L(WrapAMap):
         algo = InvMult2.ALGO
         mcdp_dev_warning('Not sure about this: is it L or U?')
         options = invmultU_solve_options(F=self.R, R=self.F, f=r, n=self.nl, algo=algo)
-        return self.F.Ls(options)
+        return invmult_lowerset(self.F, options)
 
     def repr_hd_map(self):
         return repr_hd_map_productn(2, 'L')
@@ -125,7 +125,7 @@ class Product2DP_U(WrapAMap):
         mcdp_dev_warning('Not sure about this: is it L or U?')
         algo = InvMult2.ALGO
         options = invmultL_solve_options(F=self.R, R=self.F, f=r, n=self.nu, algo=algo)
-        return self.F.Ls(options)
+        return invmult_lowerset(self.F, options)
 
     def repr_hd_map(self):
         return repr_hd_map_productn(2, 'U')
@@ -209,7 +209,7 @@ class Product2RcompDP_L(WrapAMap):
         mcdp_dev_warning('Not sure about this')
         algo = InvMult2.ALGO
         options = invmultU_solve_options(F=self.R, R=self.F, f=r, n=self.nl, algo=algo)
-        return self.F.Ls(options)
+        return invmult_lowerset(self.F, options)
 
     def repr_hd_map(self):
         return repr_hd_map_productn(2, 'L', self.nl)
@@ -229,7 +229,7 @@ class Product2RcompDP_U(WrapAMap):
         mcdp_dev_warning('Not sure about this')
         algo = InvMult2.ALGO
         options = invmultL_solve_options(F=self.R, R=self.F, f=r, n=self.nl, algo=algo)
-        return self.F.Ls(options)
+        return invmult_lowerset(self.F, options)
 
     def repr_hd_map(self):
         return repr_hd_map_productn(2, 'U', self.nl)
@@ -1,13 +1,13 @@
 # -*- coding: utf-8 -*-
 from contracts.utils import indent, raise_desc, raise_wrapped
 from mcdp_posets import (NotBelongs, UpperSet,
-    UpperSets, get_product_compact, poset_minima)
+    UpperSets, get_product_compact, poset_minima_for, poset_maxima_for)
 from mcdp_posets import LowerSets, LowerSet
-from mcdp_posets.find_poset_minima.baseline_n2 import poset_maxima
 from mcdp.exceptions import DPInternalError
 from mcdp_utils_misc.memoize_simple_imp import memoize_simple
-from .primitive import NotFeasible, PrimitiveDP
-from .tracer import Tracer
+from .primitive import NotFeasible, PrimitiveDP, solve_many_dict
+from .solve_cache import solve_cache_get, solve_cache_set
+from .tracer import NullTracer
 from mcdp.development import do_extra_checks, mcdp_dev_warning
 
 
@@ -38,7 +38,6 @@ class Series(PrimitiveDP):
         self.M2 = self.dp2.get_imp_space()
 
         M, _, _ = self._get_product()
-        self._solve_cache = {}
         PrimitiveDP.__init__(self, F=F1, R=R2, I=M)
 
     def __getstate__(self):
@@ -154,13 +153,14 @@ class Series(PrimitiveDP):
 
     # @memoize_simple
     def solve(self, func):
-        trace = Tracer()
+        trace = NullTracer()
         return self.solve_trace(func, trace)
 
     def solve_trace(self, func, trace):
-        if func in self._solve_cache:
+        cached = solve_cache_get(self, 'solve', func)
+        if cached is not None:
             # trace.log('using cache for %s' % str(func))
-            return trace.result(self._solve_cache[func])
+            return trace.result(cached)
 
         trace.values(type='series')
 
@@ -180,15 +180,51 @@ class Series(PrimitiveDP):
             mins.update(v.minimals)
 
         R = self.get_res_space()
-        minimals = poset_minima(mins, R.leq)
+        minimals = poset_minima_for(R, mins)
 
         us = UpperSet(minimals, R)
 
-        self._solve_cache[func] = us
+        solve_cache_set(self, 'solve', func, us)
         return trace.result(us)
 
+    def solve_many(self, fs):
+        """ Solves dp1 for all the points at once, then solves dp2
+            once for the union of the intermediate minimals. """
+        res = {}
+        todo = []
+        for f in fs:
+            cached = solve_cache_get(self, 'solve', f)
+            if cached is not None:
+                res[f] = cached
+            else:
+                todo.append(f)
+        if todo:
+            u1s = solve_many_dict(self.dp1, todo)
+            f2s = set()
+            for u1 in u1s.values():
+                f2s.update(u1.minimals)
+            u2s = solve_many_dict(self.dp2, f2s)
+
+            R = self.get_res_space()
+            for f, u1 in u1s.items():
+                mins = set()
+                for f2 in u1.minimals:
+                    mins.update(u2s[f2].minimals)
+                minimals = poset_minima_for(R, mins)
+                res[f] = UpperSet(minimals, R)
+                solve_cache_set(self, 'solve', f, res[f])
+
+        return [res[f] for f in fs]
+
     def solve_r(self, r):
-        l2 = self.dp2.solve_r(r)
+        trace = NullTracer()
+        return self.solve_r_trace(r, trace)
+
+    def solve_r_trace(self, r, trace):
+        trace.values(type='series')
+
+        with trace.child('dp2') as t:
+            l2 = self.dp2.solve_r_trace(r, t)
 
         if do_extra_checks():
             F2 = self.dp2.get_fun_space()
@@ -199,14 +235,15 @@ class Series(PrimitiveDP):
         
         # todo: express as operation on antichains
         for l in l2.maximals:    
-            v = self.dp1.solve_r(l)
+            with trace.child('dp1') as t:
+                v = self.dp1.solve_r_trace(l, t)
             maxs.update(v.maximals)
 
         F = self.get_fun_space()
-        maximals = poset_maxima(maxs, F.leq)
+        maximals = poset_maxima_for(F, maxs)
 
         lf = LowerSet(maximals, F)
-        return lf
+        return trace.result(lf)
 
     def __repr__(self):
         return 'Series(%r, %r)' % (self.dp1, self.dp2)
@@ -1,15 +1,17 @@
 # -*- coding: utf-8 -*-
 from abc import abstractmethod
+from collections import OrderedDict
 
 from decent_logs import WithInternalLog
 
 from contracts import contract
 from contracts.utils import indent, raise_desc
 from mcdp_posets import (LowerSet, NotBelongs, Poset, Space,
-    SpaceProduct, UpperSet, UpperSets, poset_minima)
+    SpaceProduct, UpperSet, UpperSets, poset_minima_for)
 from mcdp.development import do_extra_checks
 
 from .primitive_meta import PrimitiveMeta
+from .solve_cache import solve_cache_get, solve_cache_set
 
 
 _ = LowerSet  # used by PyContracts
@@ -22,6 +24,7 @@ __all__ = [
     'EmptyDP',
     'ApproximableDP',
     'WrongUseOfUncertain',
+    'solve_many_dict',
 ]
 
 
@@ -70,6 +73,29 @@ class PrimitiveDP(WithInternalLog):
         '''
             Given one f point, returns an UpperSet of resources.
         '''
+
+    @contract(fs='seq', returns='list($UpperSet)')
+    def solve_many(self, fs):
+        '''
+            Given a sequence of f points, returns the list of the
+            UpperSets of resources, in the same order.
+
+            Subclasses override this to push the whole batch
+            through their children at once.
+        '''
+        return [self.solve(f) for f in fs]
+
+    @contract(returns=UpperSet)
+    def solve_cached(self, f):
+        '''
+            Same as solve(), but uses the cache shared by all the
+            DPs with the same structure (see solve_cache.py).
+        '''
+        res = solve_cache_get(self, 'solve', f)
+        if res is None:
+            res = self.solve(f)
+            solve_cache_set(self, 'solve', f, res)
+        return res
         
     @contract(returns=LowerSet)
     def solve_r(self, r):  # @UnusedVariable
@@ -199,7 +225,7 @@ class PrimitiveDP(WithInternalLog):
             u = self.solve(m)
             res.update(u.minimals)
         ressp = self.get_res_space()
-        minima = poset_minima(res, ressp.leq)
+        minima = poset_minima_for(ressp, res)
         return ressp.Us(minima)
 
 #     def get_normal_form(self):
@@ -324,6 +350,14 @@ class PrimitiveDP(WithInternalLog):
         return head
 
 
+@contract(dp=PrimitiveDP, fs='seq|set|$frozenset', returns='dict')
+def solve_many_dict(dp, fs):
+    """ Solves dp for each of the distinct points in fs at once,
+        and returns a dict f -> UpperSet. """
+    unique = list(OrderedDict.fromkeys(fs))
+    return dict(zip(unique, dp.solve_many(unique)))
+
+
 class EmptyDP(PrimitiveDP):
     """ 
         This is a DP for which implementations = functions.
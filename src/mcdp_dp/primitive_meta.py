@@ -60,6 +60,30 @@ class PrimitiveMeta(ABCMeta):
 
                 setattr(cls, 'solve', solve2)
 
+            if 'solve_many' in cls.__dict__:
+                solve_many = cls.__dict__['solve_many']
+
+                def solve_many2(self, fs):
+                    if all_disabled():
+                        return solve_many(self, fs)
+
+                    F = self.get_fun_space()
+                    for f in fs:
+                        try:
+                            F.belongs(f)
+                        except NotBelongs as e:
+                            msg = "Function passed to solve_many() is not in function space."
+                            raise_wrapped(NotBelongs, e, msg,
+                                          F=F, f=f, dp=self.repr_long(), exc=sys.exc_info())
+
+                    res = solve_many(self, fs)
+                    if len(res) != len(fs):
+                        msg = 'solve_many() returned %d results for %d points.'
+                        raise ValueError(msg % (len(res), len(fs)))
+                    return res
+
+                setattr(cls, 'solve_many', solve_many2)
+
             if 'get_implementations_f_m' in cls.__dict__:
                 get_implementations_f_r = cls.__dict__['get_implementations_f_r']
 
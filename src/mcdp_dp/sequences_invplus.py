@@ -2,6 +2,8 @@
 from contracts import contract
 from contracts.utils import check_isinstance, raise_desc, raise_wrapped
 from mcdp_posets import PosetProduct, is_top, Nat
+from mcdp_posets.antichain_array import (
+    LowerSetArray, UpperSetArray, array_to_points, is_array_poset)
 from mcdp_posets.rcomp import finfo
 from mcdp_posets.utils import check_minimal
 from mcdp import MCDPConstants
@@ -10,93 +12,129 @@ import numpy as np
 
 
 def invmultU_solve_options(F, R, f, n, algo):
-    """ Returns a set of points in R that are on the line r1*r2=f. """
+    """ 
+        Returns n points in R that are on the line r1*r2=f, as the rows
+        of a n×2 array sorted by r1 (the top is represented as +inf).
+    """
     from .dp_inv_mult import InvMult2
 
     assert algo in [InvMult2.ALGO_UNIFORM, InvMult2.ALGO_VAN_DER_CORPUT]
     if is_top(F, f):
         mcdp_dev_warning('FIXME Need much more thought about this')
-        top1 = R[0].get_top()
-        top2 = R[1].get_top()
-        s = set([(top1, top2)])
-        return s
+        return np.array([[np.inf, np.inf]])
 
     check_isinstance(f, float)
             
     if f == 0.0:
-        return set([(0.0, 0.0)])
+        return np.zeros((1, 2))
 
     if algo == InvMult2.ALGO_UNIFORM:
-        mcdp_dev_warning('TODO: add ALGO as parameter. ')
-        ps = samplec(n, f)
+        # the points on the curve xy=1, scaled by sqrt(f)
+        return get_invmult_normalized(algo, n) * np.sqrt(f)
     elif algo == InvMult2.ALGO_VAN_DER_CORPUT:
-        x1, x2 = generate_exp_van_der_corput_sequence(n=n, C=f)
-        ps = zip(x1, x2)
+        # x1 does not depend on f; log(x2) = log(f) - log(x1)
+        logx1, x1 = get_invmult_normalized(algo, n)
+        x2 = exp_clipped(np.log(f) - logx1)
+        return np.column_stack((x1, x2))
     else: # pragma: no cover
         assert False
-    return ps
 
 def invmultL_solve_options(F, R, f, n, algo):
-    """ Returns a set of points that are *below* r1*r2 = f """
+    """ 
+        Returns n points that are *below* r1*r2 = f, as the rows
+        of a n×2 array (the top is represented as +inf). 
+    """
     from .dp_inv_mult import InvMult2
     assert algo in [InvMult2.ALGO_UNIFORM, InvMult2.ALGO_VAN_DER_CORPUT]
     
     if f == 0.0:
-        return set([(0.0, 0.0)])
+        return np.zeros((1, 2))
 
     if is_top(F, f):
         mcdp_dev_warning('FIXME Need much more thought about this')
-        top1 = R[0].get_top()
-        top2 = R[1].get_top()
-        s = set([(top1, top2)])
-        return s
-
-    if algo == InvMult2.ALGO_UNIFORM:
-        if n == 1:
-            points = [(0.0, 0.0)]
-        elif n == 2:
-            points = [(0.0, 0.0)]
-        else:
-            pu = sorted(samplec(n - 1, f), key=lambda _: _[0])
-            assert len(pu) == n - 1, (len(pu), n - 1)
-            nu = len(pu)
-
-            points = set()
-            points.add((0.0, pu[0][1]))
-            points.add((pu[-1][0], 0.0))
-            for i in range(nu - 1):
-                p = (pu[i][0], pu[i + 1][1])
-                points.add(p)
+        return np.array([[np.inf, np.inf]])
 
-    elif algo == InvMult2.ALGO_VAN_DER_CORPUT:
+    if n == 1:
+        return np.zeros((1, 2))
 
-        if n == 1:
-            points = set([(0.0, 0.0)])
-        else:
-            x1, x2 = generate_exp_van_der_corput_sequence(n=n - 1, C=f)
-            pu = zip(x1, x2)
-            assert len(pu) == n - 1, pu
+    # n - 1 points on the curve, sorted by the first coordinate
+    pu = invmultU_solve_options(F=F, R=R, f=f, n=n - 1, algo=algo)
+    assert pu.shape[0] == n - 1, (pu.shape, n - 1)
 
-            if do_extra_checks():
-                check_minimal(pu, R)
+    if do_extra_checks():
+        check_minimal(array_to_points(R, pu), R)
 
-            nu = len(pu)
-            points = []
-            points.append((0.0, pu[0][1]))
+    # (0, y_0), (x_0, y_1), ..., (x_{n-3}, y_{n-2}), (x_{n-2}, 0)
+    xs = np.concatenate(([0.0], pu[:, 0]))
+    ys = np.concatenate((pu[:, 1], [0.0]))
+    points = np.column_stack((xs, ys))
 
-            for i in range(nu - 1):
-                p = (pu[i][0], pu[i + 1][1])
-                points.append(p)
+    assert points.shape[0] == n, (n, points.shape)
+    return points
 
-            points.append((pu[-1][0], 0.0))
+def invmult_upperset(R, options):
+    """ The upper set in R generated by the rows of the array returned 
+        by invmultU_solve_options() or invmultL_solve_options(). """
+    if is_array_poset(R):
+        return UpperSetArray(options, R)
+    return R.Us(array_to_points(R, options))
 
-            points = set(points)
-    else: # pragma: no cover
-        assert False
+def invmult_lowerset(R, options):
+    """ The lower set in R generated by the rows of the array returned 
+        by invmultU_solve_options() or invmultL_solve_options(). """
+    if is_array_poset(R):
+        return LowerSetArray(options, R)
+    return R.Ls(array_to_points(R, options))
 
-    assert len(points) == n, (n, len(points), points)
+# (algo, n) -> normalized points, see get_invmult_normalized()
+_invmult_normalized = {}
 
-    return points
+def get_invmult_normalized(algo, n):
+    """
+        Returns the points for the curve xy=1, computed once for
+        each (algo, n):
+        
+        - for ALGO_UNIFORM, a n×2 array sorted by x;
+        - for ALGO_VAN_DER_CORPUT, the pair of arrays (log(x), x), 
+          sorted by x.
+    """
+    from .dp_inv_mult import InvMult2
+    key = (algo, n)
+    res = _invmult_normalized.get(key, None)
+    if res is None:
+        if algo == InvMult2.ALGO_UNIFORM:
+            a = np.array(sorted(sample(n)), dtype='float64')
+            a.flags.writeable = False
+            res = a
+        elif algo == InvMult2.ALGO_VAN_DER_CORPUT:
+            v = np.array(van_der_corput_sequence(n))
+            logx1 = exp_van_der_corput_mapping(v)
+            x1 = exp_clipped(logx1)
+            logx1.flags.writeable = False
+            x1.flags.writeable = False
+            res = logx1, x1
+        else: # pragma: no cover
+            assert False, algo
+        _invmult_normalized[key] = res
+    return res
+
+def exp_van_der_corput_mapping(v):
+    """ Maps [0, 1] to [-inf, inf]. """
+    return np.tan(((v - 0.5) * 2) * (np.pi / 2))
+
+def exp_clipped(x):
+    """ 
+        np.exp(x) for an array, but returns 1/eps where it would
+        overflow and eps where it would underflow 
+        (eps = MCDPConstants.inv_relations_eps).
+    """
+    eps = MCDPConstants.inv_relations_eps 
+    maxi = 1 / eps
+    with np.errstate(over='ignore', under='ignore'):
+        y = np.exp(x)
+    y[np.isinf(y)] = maxi
+    y[y < finfo.tiny] = eps
+    return y
 
 def samplec(n, c):
     """ Samples n points on the curve xy=c """
@@ -140,7 +178,7 @@ def generate_exp_van_der_corput_sequence(n, C=1.0, mapping_function=None):
     v = np.array(van_der_corput_sequence(n))
 
     if mapping_function is None:
-        mapping_function = lambda x: np.tan(((x - 0.5) * 2) * (np.pi / 2))
+        mapping_function = exp_van_der_corput_mapping
     v2 = np.array(map(mapping_function, v))
     M = np.log(C)
     logx1 = v2
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+from contextlib import contextmanager
+import time
+
+from contracts import contract
+from mcdp import MCDPConstants
+from mcdp_posets import (
+    NotJoinable, PosetProduct, UpperSet, UpperSets, poset_minima_for)
+from mcdp_posets.antichain_array import is_array_poset, points_to_array
+from mcdp_posets.rcomp import RcompBase
+import numpy as np
+
+from .dp_transformations import get_dp_bounds
+from .primitive import PrimitiveDP
+from .tracer import NullTracer, Tracer
+
+
+__all__ = [
+    'AnytimeBounds',
+    'DeadlineExpired',
+    'DeadlineTracer',
+    'solve_anytime',
+    'get_bounds_gap',
+]
+
+AnytimeBounds = namedtuple('AnytimeBounds', 'n lower upper gap')
+
+
+@contract(dp=PrimitiveDP, n0='int,>=1', factor='int,>=2')
+def solve_anytime(dp, f, n0=1, factor=2, n_max=None, gap_tolerance=0.0,
+                  deadline=None, tracer=None):
+    """
+        Solves f with the approximations get_dp_bounds(dp, n, n), for
+        n = n0, n0 * factor, n0 * factor^2, ... and yields
+        AnytimeBounds(n, lower, upper, gap) after each level.
+
+        lower and upper are the best bounds so far: the join of the lower
+        bounds and the meet of the upper bounds of all levels.
+
+        Stops when the gap (see get_bounds_gap()) is at most gap_tolerance,
+        when the bounds coincide, when n reaches n_max (by default
+        MCDPConstants.anytime_n_max) or when time.time() passes deadline.
+        At least one level is always computed; the deadline is also
+        checked during the solves of the following levels, and a level
+        that is not finished in time is discarded.
+    """
+    if n_max is None:
+        n_max = MCDPConstants.anytime_n_max
+    if tracer is None:
+        tracer = NullTracer()
+    R = dp.get_res_space()
+    UR = UpperSets(R)
+
+    lower = None
+    upper = None
+    n = n0
+    while True:
+        dpL, dpU = get_dp_bounds(dp, n, n)
+        try:
+            with tracer.child('n%d' % n) as t:
+                if deadline is not None and lower is not None:
+                    t = DeadlineTracer(t, deadline)
+                with t.child('lower') as t2:
+                    rL = dpL.solve_trace(f, t2)
+                with t.child('upper') as t2:
+                    rU = dpU.solve_trace(f, t2)
+        except DeadlineExpired:
+            tracer.log('n = %d: deadline expired' % n)
+            break
+
+        lower = rL if lower is None else upperset_join(R, lower, rL)
+        upper = rU if upper is None else UR.meet(upper, rU)
+        gap = get_bounds_gap(R, lower, upper)
+        tracer.log(lambda: 'n = %d: gap = %s' % (n, gap))
+        yield AnytimeBounds(n=n, lower=lower, upper=upper, gap=gap)
+
+        if UR.leq(upper, lower):
+            break
+        if gap is not None and gap <= gap_tolerance:
+            break
+        if deadline is not None and time.time() >= deadline:
+            break
+        if n * factor > n_max:
+            break
+        n *= factor
+
+
+class DeadlineExpired(Exception):
+    pass
+
+
+class DeadlineTracer(Tracer):
+    """
+        Passes everything to tracer, but raises DeadlineExpired in
+        child() and iteration() once time.time() passes deadline.
+    """
+
+    def __init__(self, tracer, deadline):
+        Tracer.__init__(self, prefix=tracer.prefix, logger=None)
+        self.tracer = tracer
+        self.deadline = deadline
+        self.enabled = tracer.enabled
+        self.streaming = tracer.streaming
+
+    def __repr__(self):
+        return 'DeadlineTracer(%r)' % self.tracer
+
+    def _check_deadline(self):
+        if time.time() >= self.deadline:
+            raise DeadlineExpired()
+
+    def log(self, s):
+        self.tracer.log(s)
+
+    @contextmanager
+    def child(self, name):
+        self._check_deadline()
+        with self.tracer.child(name) as t:
+            yield DeadlineTracer(t, self.deadline)
+
+    @contextmanager
+    def iteration(self, i):
+        self._check_deadline()
+        with self.tracer.iteration(i) as t:
+            yield DeadlineTracer(t, self.deadline)
+
+    def values(self, **args):
+        self.tracer.values(**args)
+
+    def value(self, name, value):
+        self.tracer.value(name, value)
+
+    def result(self, ob):
+        return self.tracer.result(ob)
+
+    def format(self):
+        return self.tracer.format()
+
+
+def upperset_join(R, a, b):
+    """
+        The join of two upper sets, that is, their intersection.
+        If R does not have joins, returns b.
+    """
+    points = set()
+    try:
+        for x in a.minimals:
+            for y in b.minimals:
+                points.add(R.join(x, y))
+    except NotJoinable:
+        return b
+    return UpperSet(poset_minima_for(R, points), R)
+
+
+def get_bounds_gap(R, lower, upper):
+    """
+        Returns the distance between the two upper sets, as the largest
+        distance (in the max norm) of a minimal of upper from the closest
+        minimal of lower. Returns None if R is not a product of Rcomp.
+    """
+    if isinstance(R, RcompBase):
+        a = points_to_array(PosetProduct((R,)), [(x,) for x in lower.minimals])
+        b = points_to_array(PosetProduct((R,)), [(x,) for x in upper.minimals])
+    elif isinstance(R, PosetProduct) and is_array_poset(R):
+        a = points_to_array(R, lower.minimals)
+        b = points_to_array(R, upper.minimals)
+    else:
+        return None
+
+    if b.shape[0] == 0:
+        # the upper bound says unfeasible
+        return 0.0 if a.shape[0] == 0 else np.inf
+    if a.shape[0] == 0:
+        return np.inf
+
+    with np.errstate(invalid='ignore'):
+        # d[i, j, k] = |b_i,k - a_j,k|
+        d = np.abs(b[:, np.newaxis, :] - a[np.newaxis, :, :])
+    # inf - inf: the two coincide
+    d[np.isnan(d)] = 0.0
+    return float(np.max(np.min(np.max(d, axis=2), axis=1)))
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+import hashlib
+import itertools
+import os
+import pickle
+from StringIO import StringIO
+import threading
+
+from contracts import contract
+from mcdp import MCDPConstants, logger
+
+
+__all__ = [
+    'SolveCache',
+    'get_solve_cache',
+    'dp_structural_key',
+    'solve_cache_get',
+    'solve_cache_set',
+]
+
+
+class SolveCache(object):
+    """
+        A bounded LRU cache for the results of solve() and friends.
+
+        The size of an entry is the number of points in the result,
+        so that large antichains count for more than small ones.
+        When the total size exceeds max_size, the least recently
+        used entries are evicted.
+    """
+
+    @contract(max_size='int,>=0')
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """ Returns the value for key, or None if it is not cached. """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            # move it to the end
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        size = _result_size(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            if size > self.max_size:
+                return
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_size:
+                _, (_, s) = self._entries.popitem(last=False)
+                self._size -= s
+                self.evictions += 1
+
+    @contract(max_size='int,>=0')
+    def set_max_size(self, max_size):
+        with self._lock:
+            self.max_size = max_size
+            while self._size > self.max_size:
+                _, (_, s) = self._entries.popitem(last=False)
+                self._size -= s
+                self.evictions += 1
+
+    def clear(self):
+        """ Removes all entries (the statistics are kept). """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @contract(returns='dict(str:int)')
+    def get_stats(self):
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses,
+                        evictions=self.evictions,
+                        entries=len(self._entries),
+                        size=self._size, max_size=self.max_size)
+
+    def __repr__(self):
+        return ('SolveCache(hits=%(hits)d misses=%(misses)d '
+                'evictions=%(evictions)d entries=%(entries)d '
+                'size=%(size)d/%(max_size)d)' % self.get_stats())
+
+
+def _result_size(value):
+    """ Number of points in an upper set, lower set, or in the
+        values of a dict of them. """
+    if isinstance(value, dict):
+        return 1 + sum(_result_size(v) for v in value.values())
+    for attr in ['minimals', 'maximals']:
+        points = getattr(value, attr, None)
+        if points is not None:
+            return 1 + len(points)
+    return 1
+
+
+_solve_cache = SolveCache(MCDPConstants.solve_cache_max_size)
+
+
+@contract(returns=SolveCache)
+def get_solve_cache():
+    """ Returns the cache shared by all the DPs in this process. """
+    return _solve_cache
+
+
+_unique = itertools.count()
+
+
+def dp_structural_key(dp):
+    """
+        Returns a string that identifies the DP by its structure:
+        two DPs with the same key compute the same function.
+
+        This is the hash of the pickled state of the DP, in which
+        the children DPs are replaced by their own keys. It is
+        computed once and memoized in the attribute _structural_key.
+        If the DP cannot be pickled, the key is unique to this instance
+        (see is_instance_key()).
+
+        The keys of the children are computed first, bottom-up with
+        an explicit stack, so that deep trees (long chains of Series,
+        for example) do not exhaust the recursion limit.
+    """
+    key = dp.__dict__.get('_structural_key', None)
+    if key is not None:
+        return key
+
+    in_progress = set()
+    stack = [(dp, False)]
+    while stack:
+        x, children_done = stack.pop()
+        if '_structural_key' in x.__dict__:
+            continue
+        if children_done:
+            x._structural_key = _compute_structural_key(x)
+            in_progress.discard(id(x))
+            continue
+        in_progress.add(id(x))
+        stack.append((x, True))
+        for c in _children_dps(x):
+            if not '_structural_key' in c.__dict__ and not id(c) in in_progress:
+                stack.append((c, False))
+    return dp._structural_key
+
+
+def is_instance_key(key):
+    """ True if the key is unique to one instance (the DP could not
+        be pickled), so it is not worth caching by it. """
+    return key.startswith('instance-')
+
+
+def _children_dps(dp):
+    """ The DPs in the attributes of dp, directly or in a list or tuple. """
+    from .primitive import PrimitiveDP
+    for v in dp.__dict__.values():
+        if isinstance(v, PrimitiveDP):
+            yield v
+        elif isinstance(v, (tuple, list)):
+            for x in v:
+                if isinstance(x, PrimitiveDP):
+                    yield x
+
+
+class _StructuralPickler(pickle.Pickler):
+    """
+        A pickler whose output does not depend on the iteration order
+        of dicts and sets, and that replaces the DPs other than the
+        root with their structural key.
+    """
+    dispatch = dict(pickle.Pickler.dispatch)
+
+    def __init__(self, f, root):
+        pickle.Pickler.__init__(self, f, pickle.HIGHEST_PROTOCOL)
+        self.root = root
+
+    def persistent_id(self, x):
+        from .primitive import PrimitiveDP
+        if x is not self.root and isinstance(x, PrimitiveDP):
+            return dp_structural_key(x)
+        return None
+
+    def save_dict(self, obj):
+        self.write(pickle.EMPTY_DICT)
+        self.memoize(obj)
+        items = sorted(obj.iteritems(), key=lambda kv: repr(kv[0]))
+        self._batch_setitems(iter(items))
+
+    dispatch[dict] = save_dict
+
+    def save_set(self, obj):
+        elements = sorted(obj, key=repr)
+        self.save_reduce(type(obj), (elements,), obj=obj)
+
+    dispatch[set] = save_set
+    dispatch[frozenset] = save_set
+
+
+def _compute_structural_key(dp):
+    sio = StringIO()
+    pickler = _StructuralPickler(sio, root=dp)
+    try:
+        pickler.dump(dp)
+    except (pickle.PicklingError, TypeError, RuntimeError) as e:
+        # RuntimeError: maximum recursion depth exceeded
+        msg = 'Cannot compute structural key of %s: %s' % (type(dp).__name__, e)
+        logger.debug(msg)
+        # the pid makes it unique also among the processes of a pool
+        return 'instance-%d-%d' % (os.getpid(), next(_unique))
+    return hashlib.sha1(sio.getvalue()).hexdigest()
+
+
+def solve_cache_get(dp, method, x):
+    """ Returns the cached result of dp.method(x), or None. """
+    if not MCDPConstants.solve_cache_enabled:
+        return None
+    dp_key = dp_structural_key(dp)
+    if is_instance_key(dp_key):
+        return None
+    return _solve_cache.get((dp_key, method, x))
+
+
+def solve_cache_set(dp, method, x, result):
+    if not MCDPConstants.solve_cache_enabled:
+        return
+    dp_key = dp_structural_key(dp)
+    if is_instance_key(dp_key):
+        return
+    _solve_cache.set((dp_key, method, x), result)
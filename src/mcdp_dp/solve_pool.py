@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+from contextlib import contextmanager
+import atexit
+import cPickle as pickle
+import multiprocessing
+import traceback
+
+from contracts import contract
+from mcdp import MCDPConstants, logger
+from mcdp.exceptions import DPInternalError
+
+from .solve_cache import dp_structural_key
+
+
+__all__ = [
+    'set_solve_processes',
+    'get_solve_processes',
+    'solve_processes',
+    'solve_in_pool',
+    'solve_many_in_pool',
+    'solve_pool_enabled',
+]
+
+"""
+    Opt-in solving of independent sub-problems in a pool of processes.
+
+    Parallel and ParallelN solve their children, and DPLoop2 solves
+    the points of the frontier, through solve_in_pool() and
+    solve_many_in_pool(). If the pool is not enabled (the default),
+    or we are inside a worker, these just solve sequentially.
+
+    The results are returned in the same order as the tasks, so that
+    they are merged in the same way as in the sequential case.
+"""
+
+
+@contract(n='int,>=0')
+def set_solve_processes(n):
+    """ Uses a pool of n processes for solving; 0 or 1 disables it. """
+    if n != MCDPConstants.solve_processes:
+        _close_pool()
+        MCDPConstants.solve_processes = n
+
+
+def get_solve_processes():
+    """ Returns the number of processes used for solving (0 or 1 means
+        that the pool is not used). """
+    return MCDPConstants.solve_processes
+
+
+@contextmanager
+def solve_processes(n):
+    """
+        Context manager to solve using n processes:
+
+            with solve_processes(8):
+                dp.solve(f)
+    """
+    previous = get_solve_processes()
+    set_solve_processes(n)
+    try:
+        yield
+    finally:
+        set_solve_processes(previous)
+
+
+def solve_in_pool(tasks):
+    """
+        tasks: a list of (dp, f).
+
+        Returns the list [dp.solve(f) for dp, f in tasks].
+    """
+    batches = [(dp, [f]) for dp, f in tasks]
+    return [res[0] for res in solve_many_in_pool(batches)]
+
+
+def solve_many_in_pool(batches):
+    """
+        batches: a list of (dp, fs).
+
+        Returns the list [dp.solve_many(fs) for dp, fs in batches].
+        The batches are split in chunks of about the same size,
+        one job for each chunk.
+    """
+    if not solve_pool_enabled() or sum(len(fs) for _, fs in batches) < 2:
+        return [_solve_batch(dp, fs) for dp, fs in batches]
+
+    payloads = []
+    for dp, _ in batches:
+        payload = _get_payload(dp)
+        if payload is None:
+            return [_solve_batch(dp, fs) for dp, fs in batches]
+        payloads.append(payload)
+
+    n = get_solve_processes()
+    total = sum(len(fs) for _, fs in batches)
+    chunk_size = max(1, -(-total // n))
+    jobs = []
+    for payload, (_, fs) in zip(payloads, batches):
+        for i in range(0, len(fs), chunk_size):
+            jobs.append((payload, list(fs[i:i + chunk_size])))
+    results = iter(_run_jobs(jobs))
+    res = []
+    for _, fs in batches:
+        r = []
+        for _ in range(0, len(fs), chunk_size):
+            r.extend(next(results))
+        res.append(r)
+    return res
+
+
+def _solve_batch(dp, fs):
+    if len(fs) == 1:
+        return [dp.solve(fs[0])]
+    return dp.solve_many(list(fs))
+
+
+_pool = None
+_in_worker = False
+
+
+def solve_pool_enabled():
+    """ True if solve_in_pool() and solve_many_in_pool() use the pool
+        (it is enabled and we are not in a worker). """
+    return not _in_worker and get_solve_processes() > 1
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        n = get_solve_processes()
+        logger.info('Creating pool of %d processes for solving.' % n)
+        _pool = multiprocessing.Pool(n, initializer=_worker_init)
+    return _pool
+
+
+def _close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.terminate()
+        _pool.join()
+        _pool = None
+
+
+atexit.register(_close_pool)
+
+
+def _get_payload(dp):
+    """
+        Returns (key, pickled dp), or None if the DP cannot be pickled.
+        The pickles are memoized by structural key, and the workers
+        keep the unpickled DPs by key, so big trees are unpickled only
+        once per worker.
+    """
+    key = dp_structural_key(dp)
+    s = _payloads.get(key, None)
+    if s is None:
+        try:
+            s = pickle.dumps(dp, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, RuntimeError) as e:
+            msg = 'Cannot solve %s in the pool: %s' % (type(dp).__name__, e)
+            logger.debug(msg)
+            return None
+        if len(_payloads) >= _max_payloads:
+            _payloads.clear()
+        _payloads[key] = s
+    return key, s
+
+
+# seconds
+_wait = 365 * 24 * 3600
+
+# structural key -> pickled dp
+_payloads = {}
+_max_payloads = 256
+
+
+def _run_jobs(jobs):
+    pool = _get_pool()
+    try:
+        # With a timeout, the wait can be interrupted by signals
+        # (such as KeyboardInterrupt).
+        results = pool.map_async(_worker_solve, jobs, chunksize=1).get(_wait)
+    except BaseException:
+        # do not leave jobs running in the workers
+        _close_pool()
+        raise
+    for ok, r in results:
+        if not ok:
+            raise r
+    return [r for _, r in results]
+
+
+def _worker_init():
+    global _in_worker
+    _in_worker = True
+
+
+# key -> dp, in the workers
+_worker_dps = {}
+
+
+def _worker_solve(job):
+    """ Returns (True, results) or (False, exception). """
+    (key, s), fs = job
+    try:
+        dp = _worker_dps.get(key, None)
+        if dp is None:
+            if len(_worker_dps) >= _max_payloads:
+                _worker_dps.clear()
+            dp = _worker_dps[key] = pickle.loads(s)
+        return True, _solve_batch(dp, fs)
+    except Exception as e:
+        # An exception that cannot be unpickled would hang the pool.
+        try:
+            pickle.loads(pickle.dumps(e, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            msg = 'Error while solving in the pool:\n%s' % traceback.format_exc()
+            e = DPInternalError(msg)
+        return False, e
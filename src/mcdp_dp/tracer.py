@@ -20,8 +20,22 @@ class Tracer(object):
            with t.child('dp1') as t2:
                solve(t2)
         
+        The messages passed to log() can be thunks, which are called
+        only if the message is recorded:
+        
+           t.log(lambda: 'R = %s' % UR.format(r))
+           
+        Check the attribute "enabled" before doing any other work
+        that is only needed for the trace.
+        
+        If the attribute "streaming" is True, the events are not kept
+        in memory, so it is better not to record values that grow
+        with the number of iterations.
     """
     
+    enabled = True
+    streaming = False
+    
     def __init__(self, prefix="", logger=None):
         """
             If logger is not None, the output is to the logger as well.
@@ -45,7 +59,9 @@ class Tracer(object):
         self.chronology.append(e)
             
     def log(self, s):
-        """ Records a string """
+        """ Records a string, or the result of calling s(). """
+        if callable(s):
+            s = s()
         if self.logger is not None:
             self.logger.info(self.prefix + ":" + s)
         self._log_event(TracerLog(s))
@@ -125,6 +141,14 @@ class Tracer(object):
             for _ in i.trace.get_value(name):
                 yield _
 
+    def get_loop_iterations(self):
+        """ For the trace of a loop, yields the KleeneIteration's,
+            starting from the initial state. """
+        for _ in self.get_value('state0'):
+            yield _
+        for _ in self.get_iteration_values('state'):
+            yield _
+
     def get_value1(self, name):
         l = list(self.get_value(name))
         if len(l) > 1:
@@ -140,6 +164,42 @@ class Tracer(object):
             if isinstance(x, TracerValue) and x.name == name:
                 yield x.value
 
+
+class NullTracer(Tracer):
+    """ 
+        A Tracer that does not record anything, for when nobody 
+        is going to read the trace. 
+    """
+    
+    enabled = False
+    
+    def __init__(self, prefix="", logger=None):
+        Tracer.__init__(self, prefix=prefix, logger=None)
+    
+    def __repr__(self):
+        return 'NullTracer()'
+
+    def log(self, s):
+        pass
+
+    @contextmanager
+    def child(self, name):
+        yield self
+
+    @contextmanager
+    def iteration(self, i):
+        yield self
+
+    def values(self, **args):
+        pass
+
+    def value(self, name, value):
+        pass
+
+    def result(self, ob):
+        return ob
+
+
 class TracerRecursion(TracerEvent):
     @contract(name='str', trace=Tracer)
     def __init__(self, name, trace, result):
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+from collections import deque, namedtuple
+from contextlib import contextmanager
+import cPickle as pickle
+
+from contracts.utils import indent, raise_desc
+from mcdp import MCDPConstants
+
+from .tracer import Tracer, TracerLog, TracerResult, TracerValue
+
+
+__all__ = [
+    'StreamingTracer',
+    'StreamedTrace',
+]
+
+"""
+    A Tracer that does not keep the events in memory, but appends them
+    to a file, as a sequence of pickled records:
+
+        ('child', parent, node, name)
+        ('log', node, s)
+        ('value', node, name, value)
+        ('result', node, value)
+
+    where node is an integer that identifies the child tracer (the
+    root is 0). Only the last few events are kept in memory, so the
+    loops do not record the whole list of iterations; it can be rebuilt
+    with get_loop_iterations().
+
+    StreamedTrace gives the same read interface as Tracer
+    (find_loops(), get_value1(), rec_get_value(), ...) by scanning the
+    file, without loading the whole trace.
+"""
+
+StreamedRecursion = namedtuple('StreamedRecursion', 'name trace')
+
+
+class _TraceWriter(object):
+    """ The file and the ring buffer shared by a tree of StreamingTracers. """
+
+    def __init__(self, filename, ring_size):
+        self.filename = filename
+        self.f = open(filename, 'wb')
+        self.next_node = 1
+        # (prefix, TracerEvent)
+        self.recent = deque(maxlen=ring_size)
+
+    def write(self, record):
+        try:
+            s = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            # Keep going with a description of the value
+            record = record[:-1] + ('(cannot pickle %s: %s)' %
+                                    (type(record[-1]).__name__, e),)
+            s = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+        self.f.write(s)
+
+    def new_node(self):
+        node = self.next_node
+        self.next_node += 1
+        return node
+
+    def flush(self):
+        if not self.f.closed:
+            self.f.flush()
+
+    def close(self):
+        if not self.f.closed:
+            self.f.close()
+
+
+class StreamingTracer(Tracer):
+    """
+        A Tracer that streams the events to the file filename,
+        keeping in memory only the last ring_size events
+        (by default MCDPConstants.trace_ring_buffer_size).
+
+            t = StreamingTracer('trace.pickle')
+            dp.solve_trace(f, t)
+            loops = list(t.find_loops())
+    """
+
+    streaming = True
+
+    def __init__(self, filename, prefix="", logger=None, ring_size=None):
+        Tracer.__init__(self, prefix=prefix, logger=logger)
+        if ring_size is None:
+            ring_size = MCDPConstants.trace_ring_buffer_size
+        self.writer = _TraceWriter(filename, ring_size)
+        self.node = 0
+
+    def __repr__(self):
+        return 'StreamingTracer(%r)' % self.writer.filename
+
+    def __getstate__(self):
+        msg = 'Cannot pickle a StreamingTracer; use get_reader().'
+        raise_desc(TypeError, msg, filename=self.writer.filename)
+
+    def _log_event(self, e):
+        node = self.node
+        if isinstance(e, TracerResult):
+            record = ('result', node, e.value)
+        elif isinstance(e, TracerValue):
+            record = ('value', node, e.name, e.value)
+        elif isinstance(e, TracerLog):
+            record = ('log', node, e.s)
+        else:
+            assert False, e
+        self.writer.write(record)
+        self.writer.recent.append((self.prefix, e))
+
+    @contextmanager
+    def child(self, name):
+        node = self.writer.new_node()
+        self.writer.write(('child', self.node, node, name))
+        t = object.__new__(StreamingTracer)
+        Tracer.__init__(t, prefix=self.prefix + ":" + name, logger=self.logger)
+        t.writer = self.writer
+        t.node = node
+        yield t
+
+    def format(self):
+        """ Formats the most recent events. """
+        if not self.writer.recent:
+            return '(empty)'
+        fs = []
+        for prefix, e in self.writer.recent:
+            s = indent(e.format(), '  ', first='- %s: ' % prefix)
+            fs.append(s)
+        return "\n".join(fs)
+
+    def close(self):
+        self.writer.close()
+
+    def get_reader(self):
+        """ Returns a StreamedTrace for this node. """
+        self.writer.flush()
+        return StreamedTrace(self.writer.filename, self.node)
+
+    # read interface
+    def get_iterations(self):
+        return self.get_reader().get_iterations()
+
+    def find_loops(self):
+        return self.get_reader().find_loops()
+
+    def rec_find_has_value(self, name, value):
+        return self.get_reader().rec_find_has_value(name, value)
+
+    def rec_get_value(self, name):
+        return self.get_reader().rec_get_value(name)
+
+    def get_iteration_values(self, name):
+        return self.get_reader().get_iteration_values(name)
+
+    def get_loop_iterations(self):
+        return self.get_reader().get_loop_iterations()
+
+    def get_value1(self, name):
+        return self.get_reader().get_value1(name)
+
+    def get_value(self, name):
+        return self.get_reader().get_value(name)
+
+
+def read_trace_records(filename):
+    """ Yields the records in the trace file one by one. """
+    with open(filename, 'rb') as f:
+        unpickler = pickle.Unpickler(f)
+        while True:
+            try:
+                yield unpickler.load()
+            except EOFError:
+                break
+
+
+class StreamedTrace(object):
+    """
+        Read interface for the trace written by a StreamingTracer,
+        relative to one node. Each query scans the file once.
+    """
+
+    def __init__(self, filename, node=0):
+        self.filename = filename
+        self.node = node
+
+    def __repr__(self):
+        return 'StreamedTrace(%r, %s)' % (self.filename, self.node)
+
+    def _records(self, recursive):
+        """ Yields the records of this node, and of its
+            descendants if recursive is True. """
+        nodes = set([self.node])
+        for record in read_trace_records(self.filename):
+            if record[0] == 'child':
+                _, parent, node, _ = record
+                if recursive and parent in nodes:
+                    nodes.add(node)
+                if parent == self.node:
+                    yield record
+            elif record[1] in nodes:
+                yield record
+
+    def get_iterations(self):
+        for record in self._records(recursive=False):
+            if record[0] == 'child':
+                _, _, node, name = record
+                yield StreamedRecursion(name, StreamedTrace(self.filename, node))
+
+    def find_loops(self):
+        for x in self.rec_find_has_value('type', 'loop2'):
+            yield x
+
+    def rec_find_has_value(self, name, value):
+        found = []
+        for record in self._records(recursive=True):
+            if record[0] == 'value' and record[2] == name and record[3] == value:
+                if not record[1] in found:
+                    found.append(record[1])
+        for node in found:
+            yield StreamedTrace(self.filename, node)
+
+    def rec_get_value(self, name):
+        for record in self._records(recursive=True):
+            if record[0] == 'value' and record[2] == name:
+                yield record[3]
+
+    def get_iteration_values(self, name):
+        # one scan of the file, for all the iterations
+        iterations = set()
+        for record in read_trace_records(self.filename):
+            if record[0] == 'child':
+                _, parent, node, _ = record
+                if parent == self.node:
+                    iterations.add(node)
+            elif (record[0] == 'value' and record[1] in iterations
+                  and record[2] == name):
+                yield record[3]
+
+    def get_loop_iterations(self):
+        """ For the trace of a loop, yields the KleeneIteration's,
+            starting from the initial state. """
+        for _ in self.get_value('state0'):
+            yield _
+        for _ in self.get_iteration_values('state'):
+            yield _
+
+    def get_value1(self, name):
+        l = list(self.get_value(name))
+        if len(l) > 1:
+            msg = 'Multiple values found.'
+            raise_desc(ValueError, msg, name=name, l=l)
+        if not l:
+            msg = 'No values found.'
+            raise_desc(ValueError, msg, name=name)
+        return l[0]
+
+    def get_value(self, name):
+        for record in self._records(recursive=False):
+            if record[0] == 'value' and record[2] == name:
+                yield record[3]
@@ -10,4 +10,9 @@ from .approximation import *
 from .invmult2_tests import *
 from .products import *
 from .corner_case import *
-from .dual import *
\ No newline at end of file
+from .dual import *
+from .caching import *
+from .solve_pool_tests import *
+from .catalogue_index import *
+from .tracer_tests import *
+from .anytime_tests import *
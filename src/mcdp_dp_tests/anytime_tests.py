@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from comptests.registrar import comptest
+from mcdp_dp import InvMult2, get_solve_cache
+from mcdp_dp.dp_transformations import get_dp_bounds
+from mcdp_dp.solve_anytime import (DeadlineExpired, DeadlineTracer,
+                                   get_bounds_gap, solve_anytime)
+from mcdp_dp.tracer import Tracer
+from mcdp_lang.parse_interface import parse_poset
+from mcdp_posets import UpperSet, UpperSets
+from nose.tools import assert_equal
+import numpy as np
+
+from .loop_models import get_battery_loop_dp
+
+
+@comptest
+def check_solve_anytime():
+    F = parse_poset('m')
+    R1 = parse_poset('m/s')
+    R2 = parse_poset('s')
+    dp = InvMult2(F, (R1, R2))
+    UR = UpperSets(dp.get_res_space())
+
+    levels = list(solve_anytime(dp, 10.0, n0=2, factor=2, n_max=64))
+    assert_equal([_.n for _ in levels], [2, 4, 8, 16, 32, 64])
+    for i, b in enumerate(levels):
+        UR.check_leq(b.lower, b.upper)
+        if i > 0:
+            # the bounds only get tighter
+            UR.check_leq(levels[i - 1].lower, b.lower)
+            UR.check_leq(b.upper, levels[i - 1].upper)
+
+    # stops as soon as the gap is small enough
+    tol = levels[2].gap
+    first = min(i for i, b in enumerate(levels) if b.gap <= tol)
+    levels2 = list(solve_anytime(dp, 10.0, n0=2, n_max=64, gap_tolerance=tol))
+    assert_equal(len(levels2), first + 1)
+
+    # stops after the first level if the deadline passed
+    levels3 = list(solve_anytime(dp, 10.0, n0=2, n_max=64, deadline=0))
+    assert_equal(len(levels3), 1)
+
+
+@comptest
+def check_deadline_tracer():
+    dpL, _ = get_dp_bounds(get_battery_loop_dp(), 4, 4)
+    get_solve_cache().clear()
+    # the loop is interrupted at the first iteration
+    trace = Tracer()
+    try:
+        dpL.solve_trace((60.0, 1.0), DeadlineTracer(trace, deadline=0))
+    except DeadlineExpired:
+        pass
+    else:
+        raise Exception('DeadlineExpired not raised')
+
+    trace = Tracer()
+    dpL.solve_trace((60.0, 1.0), DeadlineTracer(trace, deadline=float('inf')))
+    assert_equal(len(list(trace.find_loops())), 1)
+
+
+@comptest
+def check_bounds_gap():
+    R = parse_poset('m x s')
+    a = UpperSet([(1.0, 2.0), (2.0, 1.0)], R)
+    b = UpperSet([(1.5, 2.0), (2.0, 1.5)], R)
+    assert_equal(get_bounds_gap(R, a, a), 0.0)
+    assert_equal(get_bounds_gap(R, a, b), 0.5)
+    empty = UpperSet([], R)
+    assert_equal(get_bounds_gap(R, empty, empty), 0.0)
+    assert_equal(get_bounds_gap(R, a, empty), np.inf)
@@ -3,7 +3,8 @@ from contracts.utils import raise_wrapped, raise_desc
 from mcdp_dp import NotSolvableNeedsApprox
 from mcdp_dp.dp_transformations import get_dp_bounds
 from mcdp_dp.primitive import ApproximableDP
-from mcdp_posets import LowerSets, NotBounded, UpperSets, NotLeq
+from mcdp_dp.solve_cache import get_solve_cache
+from mcdp_posets import LowerSets, NotBounded, NotEqual, UpperSets, NotLeq
 from mcdp_tests.generation import for_all_dps, primitive_dp_test
 from mcdp.exceptions import DPNotImplementedError
 
@@ -95,6 +96,35 @@ def check_solve_f_chain(id_dp, dp):
                           trchain=trchain, compact=True)
 
 
+@for_all_dps
+def check_solve_many(id_dp, dp):
+    with primitive_dp_test(id_dp, dp):
+        F = dp.get_fun_space()
+        R = dp.get_res_space()
+        UR = UpperSets(R)
+
+        f_chain = F.get_test_chain(n=8)
+        # also with repeated points
+        fs = f_chain + f_chain[::2]
+        # Clear the cache before each method, so that the results
+        # are not shared through the cache.
+        get_solve_cache().clear()
+        try:
+            expected = map(dp.solve, fs)
+        except NotSolvableNeedsApprox:
+            return try_with_approximations(id_dp, dp, check_solve_many)
+
+        get_solve_cache().clear()
+        obtained = dp.solve_many(fs)
+        assert len(obtained) == len(fs)
+        for f, a, b in zip(fs, expected, obtained):
+            try:
+                UR.check_equal(a, b)
+            except NotEqual as e:
+                msg = 'solve_many() and solve() differ for %r.' % id_dp
+                raise_wrapped(Exception, e, msg, f=f, compact=True)
+
+
 @for_all_dps
 def check_solve_r_chain(id_dp, dp):
     with primitive_dp_test(id_dp, dp):
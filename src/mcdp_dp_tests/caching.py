@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+from copy import deepcopy
+
+from comptests.registrar import comptest
+from mcdp_dp import (IdentityDP, MultValueDP, Series, SolveCache,
+    dp_structural_key, get_solve_cache)
+from mcdp import MCDPConstants
+from mcdp_dp.dp_loop2 import FrontierMemo, solve_f_iterate
+from mcdp_dp.solve_cache import is_instance_key
+from mcdp_dp.tracer import Tracer
+from mcdp_lang.parse_interface import parse_poset
+from mcdp_posets import Nat, PosetProduct
+from nose.tools import assert_equal
+
+from .loop_models import get_battery_loop_dp
+
+
+@comptest
+def check_solve_cache_lru():
+    c = SolveCache(max_size=4)
+    c.set('a', 1)
+    c.set('b', 2)
+    assert_equal(c.get('a'), 1)
+    # 'b' is now the least recently used
+    c.set('c', 3)
+    c.set('d', 4)
+    c.set('e', 5)
+    assert_equal(c.get('b'), None)
+    assert_equal(c.get('a'), 1)
+    stats = c.get_stats()
+    assert_equal(stats['hits'], 2)
+    assert_equal(stats['misses'], 1)
+    assert_equal(stats['evictions'], 1)
+    assert_equal(stats['entries'], 4)
+
+    c.set_max_size(2)
+    assert_equal(c.get_stats()['entries'], 2)
+    assert_equal(c.get_stats()['evictions'], 3)
+    c.clear()
+    assert_equal(c.get_stats()['entries'], 0)
+
+
+@comptest
+def check_solve_cache_structural_key():
+    F = parse_poset('m')
+    U = parse_poset('dimensionless')
+    dp1 = Series(IdentityDP(F), MultValueDP(F, F, U, 2.0))
+    dp2 = Series(IdentityDP(F), MultValueDP(F, F, U, 2.0))
+    dp3 = Series(IdentityDP(F), MultValueDP(F, F, U, 3.0))
+    assert_equal(dp_structural_key(dp1), dp_structural_key(dp2))
+    assert dp_structural_key(dp1) != dp_structural_key(dp3)
+    assert_equal(dp_structural_key(deepcopy(dp1)), dp_structural_key(dp1))
+
+
+@comptest
+def check_solve_cache_deep_series():
+    # the keys are computed without recursion
+    F = parse_poset('m')
+    dp = IdentityDP(F)
+    for _ in range(150):
+        dp = Series(dp, IdentityDP(F))
+    assert_equal(dp.solve(1.0).minimals, set([1.0]))
+    assert not is_instance_key(dp_structural_key(dp))
+
+
+@comptest
+def check_solve_cache_shared():
+    F = parse_poset('m')
+    U = parse_poset('dimensionless')
+    dp1 = Series(IdentityDP(F), MultValueDP(F, F, U, 2.0))
+    dp2 = deepcopy(dp1)
+    cache = get_solve_cache()
+    cache.clear()
+    dp1.solve(1.0)
+    hits = cache.get_stats()['hits']
+    # a structurally identical DP uses the same entries
+    assert_equal(dp2.solve(1.0).minimals, set([2.0]))
+    assert_equal(cache.get_stats()['hits'], hits + 1)
+
+
+@comptest
+def check_loop_warm_start():
+    dp = get_battery_loop_dp()
+    fs = [(e * 60.0, 1.0) for e in range(1, 6)]
+    cache = get_solve_cache()
+    cache.clear()
+    expected = [dp.solve(f) for f in fs]
+
+    use = MCDPConstants.loop_warm_start
+    MCDPConstants.loop_warm_start = True
+    try:
+        cache.clear()
+        dp2 = deepcopy(dp)
+        traces = []
+        for f in fs:
+            trace = Tracer()
+            traces.append(trace)
+            assert_equal(dp2.solve_trace(f, trace).minimals,
+                         expected[fs.index(f)].minimals)
+
+        # all but the first started from the previous one
+        s = [t.format() for t in traces]
+        assert not 'Warm start' in s[0]
+        assert all('Warm start' in _ for _ in s[1:])
+
+        cache.clear()
+        obtained = deepcopy(dp).solve_many(fs)
+        for a, b in zip(expected, obtained):
+            assert_equal(a.minimals, b.minimals)
+    finally:
+        MCDPConstants.loop_warm_start = use
+
+
+@comptest
+def check_loop_frontier_memo():
+    N = Nat()
+    R = PosetProduct((N, N))
+    queries = []
+
+    class H(object):
+        """ h(f1, r2) = ↑{⟨f1 + r2, r2 + 1⟩} """
+        def solve_trace(self, f, trace):  # @UnusedVariable
+            queries.append(f)
+            f1, r2 = f
+            return R.U((f1 + r2, r2 + 1))
+
+    dp0 = H()
+    f1 = 1
+    S = R.Us(set([(0, 3), (1, 2), (2, 1), (3, 0)]))
+    memo = FrontierMemo()
+    S1, c1 = solve_f_iterate(dp0, f1, R, S, Tracer(), memo=memo)
+    assert_equal(len(queries), 4)
+    # nothing new to expand
+    S1b, c1b = solve_f_iterate(dp0, f1, R, S, Tracer(), memo=memo)
+    assert_equal(len(queries), 4)
+    assert_equal((S1b.minimals, c1b.minimals), (S1.minimals, c1.minimals))
+
+    # only the new minimals are expanded
+    S2 = R.Us(set([(0, 4), (1, 2), (3, 0)]))
+    S2a, c2a = solve_f_iterate(dp0, f1, R, S2, Tracer(), memo=memo)
+    assert_equal(queries[4:], [(f1, 4)])
+    S2b, c2b = solve_f_iterate(dp0, f1, R, S2, Tracer())
+    assert_equal((S2a.minimals, c2a.minimals), (S2b.minimals, c2b.minimals))
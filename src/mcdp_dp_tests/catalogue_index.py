@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from comptests.registrar import comptest
+from mcdp_dp import CatalogueDP, NotFeasible
+from mcdp_posets import (FiniteCollectionAsSpace, FinitePoset, Nat,
+    PosetProduct, Rcomp, poset_maxima_for, poset_minima_for)
+from nose.tools import assert_equal
+import numpy as np
+
+
+def random_catalogue(F, R, n, random_f, random_r):
+    names = ['m%d' % (i % (n // 2 + 1)) for i in range(n)]
+    entries = [(name, random_f(), random_r()) for name in names]
+    I = FiniteCollectionAsSpace(names)
+    return CatalogueDP(F, R, I, entries)
+
+
+def check_against_scan(dp, fs, rs):
+    """ Compares the indexed queries with a scan of all the entries. """
+    F, R = dp.get_fun_space(), dp.get_res_space()
+    entries = dp.entries
+    for f in fs:
+        expected = poset_minima_for(R, [e[2] for e in entries if F.leq(f, e[1])])
+        assert_equal(set(dp.solve(f).minimals), expected)
+    for f, res in zip(fs, dp.solve_many(fs)):
+        assert_equal(set(res.minimals), set(dp.solve(f).minimals))
+    for r in rs:
+        expected = poset_maxima_for(F, [e[1] for e in entries if R.leq(e[2], r)])
+        assert_equal(set(dp.solve_r(r).maximals), expected)
+    for f in fs:
+        for r in rs:
+            expected = set(e[0] for e in entries
+                           if F.leq(f, e[1]) and R.leq(e[2], r))
+            try:
+                obtained = dp.get_implementations_f_r(f, r)
+            except NotFeasible:
+                obtained = set()
+            assert_equal(obtained, expected)
+    for name in set(e[0] for e in entries):
+        lf, ur = dp.evaluate(name)
+        mine = [e for e in entries if e[0] == name]
+        assert_equal(set(ur.minimals), poset_minima_for(R, [e[2] for e in mine]))
+        assert_equal(set(lf.maximals), poset_maxima_for(F, [e[1] for e in mine]))
+
+
+@comptest
+def check_catalogue_index_chains():
+    np.random.seed(0)
+    F = PosetProduct((Rcomp(), Rcomp()))
+    R = PosetProduct((Rcomp(), Nat()))
+    def random_f():
+        return tuple(float(np.random.randint(0, 20)) for _ in range(2))
+    def random_r():
+        return (float(np.random.randint(0, 20)), int(np.random.randint(0, 5)))
+    dp = random_catalogue(F, R, 300, random_f, random_r)
+    fs = [random_f() for _ in range(15)] + [(F[0].get_top(), 0.0)]
+    rs = [random_r() for _ in range(15)] + [(R[0].get_top(), R[1].get_top())]
+    check_against_scan(dp, fs, rs)
+    index = dp._get_index()
+    assert len(index.pruned) < len(dp.entries)
+
+
+@comptest
+def check_catalogue_index_generic():
+    np.random.seed(1)
+    # not a chain: scanned
+    F = FinitePoset(set(['a', 'b', 'c', 'd']),
+                    [('a', 'b'), ('a', 'c'), ('b', 'd'), ('c', 'd')])
+    R = Rcomp()
+    def random_f():
+        return str(np.random.choice(['a', 'b', 'c', 'd']))
+    def random_r():
+        return float(np.random.randint(0, 10))
+    dp = random_catalogue(F, R, 40, random_f, random_r)
+    check_against_scan(dp, ['a', 'b', 'c', 'd'], [0.0, 3.0, 9.0])
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import itertools
+
 from nose.tools import assert_raises, assert_equal
 
 from comptests.registrar import comptest, run_module_tests, comptest_fails
@@ -29,7 +31,30 @@ def check_product1():
     assert amap((1,3,4,5)) == 5*4*3
     
     # TODO: make separate tests
-    
+
+
+@comptest
+def check_maps_call_many():
+    from mcdp_lang.parse_interface import parse_poset
+    from mcdp_maps import ProductNMap, SumNMap, SumNRcompMap
+    from mcdp_posets import Rcomp
+
+    P = Rcomp()
+    top = P.get_top()
+    g = parse_poset('g')
+    kg = parse_poset('kg')
+    values = [0.0, 1.5, 3.0, 1e10, top]
+    maps = [
+        SumNRcompMap(3),
+        SumNMap((g, kg), kg),
+        ProductNMap((P, P, P), P),
+    ]
+    for amap in maps:
+        D = amap.get_domain()
+        xs = [x for x in itertools.product(values, repeat=len(D.subs))]
+        expected = [amap(x) for x in xs]
+        assert_equal(amap.call_many(xs), expected)
+
 @comptest
 def check_join_meet_1():
     # test meet 
@@ -244,3 +244,38 @@ def invmult2_check5():
     pass
     
 
+
+
+@comptest
+def invmult2_check_options():
+    from mcdp_dp.sequences_invplus import (generate_exp_van_der_corput_sequence,
+        get_invmult_normalized, invmultL_solve_options, invmultU_solve_options,
+        samplec)
+    from mcdp_posets.antichain_array import UpperSetArray
+
+    F = parse_poset('m')
+    R = parse_poset('m x s')
+
+    for f in [0.01, 1.0, 7.5]:
+        for n in [1, 2, 5, 10]:
+            algo = InvMult2.ALGO_VAN_DER_CORPUT
+            a = invmultU_solve_options(F, R, f, n, algo)
+            x1, x2 = generate_exp_van_der_corput_sequence(n=n, C=f)
+            assert_allclose(a, np.column_stack((x1, x2)))
+
+            algo = InvMult2.ALGO_UNIFORM
+            a = invmultU_solve_options(F, R, f, n, algo)
+            expected = np.array(sorted(samplec(n, f)))
+            assert_allclose(a, expected)
+
+            for algo in [InvMult2.ALGO_UNIFORM, InvMult2.ALGO_VAN_DER_CORPUT]:
+                b = invmultL_solve_options(F, R, f, n, algo)
+                assert b.shape == (n, 2), (b.shape, n)
+                assert np.all(b[:, 0] * b[:, 1] <= f)
+
+    # computed only once for each (algo, n)
+    algo = InvMult2.ALGO_VAN_DER_CORPUT
+    assert get_invmult_normalized(algo, 10) is get_invmult_normalized(algo, 10)
+
+    im = InvMult2(F, (R[0], R[1]))
+    assert isinstance(im.get_upper_bound(10).solve(2.0), UpperSetArray)
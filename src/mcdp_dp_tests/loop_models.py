@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from mcdp_lang.parse_interface import parse_ndp
+
+
+# A battery that must carry its own mass: the model has a loop.
+# The functionality is (endurance, payload).
+battery_loop_model = """
+mcdp {
+    provides endurance [s]
+    provides payload [kg]
+    requires total_mass [kg]
+
+    battery = instance mcdp {
+        provides capacity [J]
+        requires mass [kg]
+        specific_energy = 500 Wh/kg
+        required mass >= provided capacity / specific_energy
+    }
+    actuation = instance mcdp {
+        provides lift [N]
+        requires power [W]
+        required power >= provided lift * 5 W/N
+    }
+    required total_mass >= mass required by battery + provided payload
+    capacity provided by battery >= provided endurance * power required by actuation
+    lift provided by actuation >= (mass required by battery + provided payload) * 9.81 m/s^2
+}
+"""
+
+
+def get_battery_loop_dp():
+    """ Returns the DP of battery_loop_model. """
+    ndp = parse_ndp(battery_loop_model)
+    return ndp.get_dp()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from comptests.registrar import comptest
+from mcdp_dp import (ParallelN, Parallel, get_solve_cache, solve_many_in_pool,
+    solve_processes)
+from nose.tools import assert_equal
+
+from .loop_models import get_battery_loop_dp
+
+
+@comptest
+def check_solve_pool():
+    dp = get_battery_loop_dp()
+    par = Parallel(dp, dp)
+    parn = ParallelN((dp, dp, dp))
+    fs = [(e * 60.0, 1.0) for e in range(1, 5)]
+    f2s = [(fs[0], fs[1]), (fs[2], fs[3])]
+    f3s = [(fs[0], fs[1], fs[2])]
+
+    cache = get_solve_cache()
+    cache.clear()
+    expected = [dp.solve(f) for f in fs]
+    expected2 = [par.solve(f) for f in f2s]
+    expected3 = [parn.solve(f) for f in f3s]
+
+    with solve_processes(2):
+        cache.clear()
+        obtained = solve_many_in_pool([(dp, fs), (dp, fs[::-1])])
+        assert_equal([r.minimals for r in obtained[0]],
+                     [r.minimals for r in expected])
+        assert_equal([r.minimals for r in obtained[1]],
+                     [r.minimals for r in expected[::-1]])
+
+        cache.clear()
+        assert_equal([par.solve(f).minimals for f in f2s],
+                     [r.minimals for r in expected2])
+        assert_equal([r.minimals for r in par.solve_many(f2s)],
+                     [r.minimals for r in expected2])
+        assert_equal([parn.solve(f).minimals for f in f3s],
+                     [r.minimals for r in expected3])
+
+        # the loop solves the points of the frontier in the pool
+        cache.clear()
+        assert_equal([dp.solve(f).minimals for f in fs],
+                     [r.minimals for r in expected])
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+
+from comptests.registrar import comptest
+from mcdp_dp import get_solve_cache
+from mcdp_dp.tracer import NullTracer, Tracer
+from mcdp_dp.tracer_stream import StreamedTrace, StreamingTracer
+from mcdp_utils_misc import get_mcdp_tmp_dir
+from nose.tools import assert_equal
+
+from .loop_models import get_battery_loop_dp
+
+
+@comptest
+def check_null_tracer():
+    called = []
+
+    def message():
+        called.append(1)
+        return 'message'
+
+    t = NullTracer()
+    t.log(message)
+    with t.child('a') as t2:
+        with t2.iteration(1) as t3:
+            t3.values(a=1)
+            t3.log(message)
+    assert_equal(t.result(42), 42)
+    assert_equal(called, [])
+    assert_equal(t.chronology, [])
+    assert not t.enabled
+
+    t = Tracer()
+    t.log(message)
+    assert_equal(called, [1])
+    assert_equal(t.format(), '- message')
+
+
+@comptest
+def check_null_tracer_loop():
+    dp = get_battery_loop_dp()
+    f = (60.0, 1.0)
+    cache = get_solve_cache()
+
+    cache.clear()
+    trace = Tracer()
+    expected = dp.solve_trace(f, trace)
+    loops = list(trace.find_loops())
+    assert_equal(len(loops), 1)
+    iterations = loops[0].get_value1('iterations')
+    assert len(iterations) > 2
+    assert_equal(len(list(loops[0].get_loop_iterations())), len(iterations))
+
+    cache.clear()
+    obtained = dp.solve_trace(f, NullTracer())
+    assert_equal(obtained.minimals, expected.minimals)
+
+
+@comptest
+def check_streaming_tracer():
+    dp = get_battery_loop_dp()
+    f = (60.0, 1.0)
+    cache = get_solve_cache()
+
+    cache.clear()
+    trace = Tracer()
+    expected = dp.solve_trace(f, trace)
+    iterations = list(trace.find_loops())[0].get_value1('iterations')
+
+    d = tempfile.mkdtemp(dir=get_mcdp_tmp_dir(), prefix='trace')
+    filename = os.path.join(d, 'trace.pickle')
+    cache.clear()
+    trace2 = StreamingTracer(filename, ring_size=3)
+    obtained = dp.solve_trace(f, trace2)
+    assert_equal(obtained.minimals, expected.minimals)
+    assert_equal(trace2.chronology, [])
+    assert_equal(len(trace2.writer.recent), 3)
+
+    loops = list(trace2.find_loops())
+    assert_equal(len(loops), 1)
+    # the history is not recorded, but rebuilt from each iteration
+    assert_equal(list(loops[0].get_value('iterations')), [])
+    iterations2 = list(loops[0].get_loop_iterations())
+    assert_equal([_.s.minimals for _ in iterations2],
+                 [_.s.minimals for _ in iterations])
+    assert_equal(len(list(loops[0].get_iterations())), len(iterations) - 1)
+    states = list(loops[0].get_iteration_values('state'))
+    assert_equal(len(states), len(iterations) - 1)
+    trace2.close()
+
+    # the file can be read later
+    reader = StreamedTrace(filename)
+    assert_equal(len(list(reader.rec_get_value('state0'))), 1)
+    iterations3 = list(list(reader.find_loops())[0].get_loop_iterations())
+    assert_equal(len(iterations3), len(iterations))
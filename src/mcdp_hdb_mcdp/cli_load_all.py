@@ -1,8 +1,9 @@
 #!/usr/bin/env python
+import hashlib
 import os
 import shutil
 import time
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from copy import deepcopy
 
 from contracts import contract
@@ -36,6 +37,7 @@ class LoadAll(QuickApp):
         params.add_string('dirname', short='-d', help='Directory for the repo.')
         params.add_string('filter', short='-f', help='Filter for this name.', default=None)
         params.add_flag('errors_only', help='Only show errored in the summary')
+        params.add_flag('per_thing', help='One job for each thing, rather than one per library.')
 
     def define_jobs_context(self, context):
         options = self.get_options()
@@ -44,34 +46,77 @@ class LoadAll(QuickApp):
         errors_only = options.errors_only
         dirname = options.dirname
         outdir = os.path.join(options.output, 'results')
+        group_by_library = not options.per_thing
 
-        define_load_all_jobs(context, dirname=dirname, outdir=outdir, name_filter=_filter, errors_only=errors_only)
+        define_load_all_jobs(context, dirname=dirname, outdir=outdir, name_filter=_filter,
+                             errors_only=errors_only, group_by_library=group_by_library)
 
 
-@contract(name_filter='None|str', errors_only=bool, outdir=str, dirname=str)
-def define_load_all_jobs(context, dirname, outdir, name_filter=None, errors_only=False):
+@contract(name_filter='None|str', errors_only=bool, outdir=str, dirname=str,
+          group_by_library=bool)
+def define_load_all_jobs(context, dirname, outdir, name_filter=None, errors_only=False,
+                         group_by_library=True):
+    """
+        If group_by_library is True, there is one job for each library,
+        so that the things imported by the models of the same library
+        are parsed only once. In any case, each worker process keeps the
+        repository and the parsed things in memory across jobs
+        (see get_worker_state()).
+    """
     if not os.path.exists(outdir):
         os.makedirs(outdir)
     rmtree_only_contents(outdir)
 
-    results = {}
-
     db_view = db_view_from_dirname(dirname)
 
+    # (repo_name, shelf_name, library_name) -> list of EnvironmentMockup
+    libraries = OrderedDict()
     for e in iterate_all(db_view):
         if name_filter is not None:
             # case insensitive
             if not name_filter.lower() in e.id.lower():
                 continue
-        c = context.comp(process, dirname, e, job_id=e.id)
-        results[e.id] = (e, c)
-    if not results:
+        k = (e.repo_name, e.shelf_name, e.library_name)
+        libraries.setdefault(k, []).append(e)
+
+    if not libraries:
         msg = 'Could not find anything to parse. (filter: %s)' % name_filter
         raise Exception(msg)
+
+    if group_by_library:
+        partial = []
+        for (repo_name, shelf_name, library_name), es in libraries.items():
+            job_id = '%s-%s-%s' % (repo_name, shelf_name, library_name)
+            partial.append(context.comp(process_library, dirname, es, job_id=job_id))
+        results = context.comp(merge_results, partial)
+    else:
+        results = {}
+        for es in libraries.values():
+            for e in es:
+                c = context.comp(process, dirname, e, job_id=e.id)
+                results[e.id] = (e, c)
+
     context.comp(summary, results, outdir, errors_only)
     context.comp(raise_if_any_error, results)
 
 
+def process_library(dirname, es):
+    """ Processes the things of one library; returns a dict
+        id -> (e, result). """
+    db_view, host_cache = get_worker_state(dirname)
+    results = {}
+    for e in es:
+        results[e.id] = (e, process_with_state(db_view, host_cache, e))
+    return results
+
+
+def merge_results(partial):
+    results = {}
+    for x in partial:
+        results.update(x)
+    return results
+
+
 def raise_if_any_error(results):
     errors = {}
 
@@ -200,9 +245,51 @@ def summary(results, out, errors_only):
 import numpy as np
 
 
-def process(dirname, e):
+# dirname -> (fingerprint, db_view, host_cache)
+_worker_state = {}
+
+
+def get_worker_state(dirname):
+    """
+        Returns the db_view and the HostCache for dirname.
+
+        They are created once for each process and kept across jobs,
+        as long as the contents of the directory do not change.
+    """
+    fingerprint = dirname_fingerprint(dirname)
+    if dirname in _worker_state:
+        fingerprint0, db_view, host_cache = _worker_state[dirname]
+        if fingerprint0 == fingerprint:
+            return db_view, host_cache
+        logger.info('The contents of %s changed; reloading.' % dirname)
     db_view = db_view_from_dirname(dirname)
     host_cache = HostCache(db_view)
+    _worker_state[dirname] = fingerprint, db_view, host_cache
+    return db_view, host_cache
+
+
+def dirname_fingerprint(dirname):
+    """ A hash of the names, sizes and modification times of
+        the files in dirname. """
+    h = hashlib.sha1()
+    for root, dirs, files in os.walk(dirname):
+        dirs.sort()
+        for fn in sorted(files):
+            filename = os.path.join(root, fn)
+            try:
+                st = os.stat(filename)
+            except OSError:
+                continue
+            h.update('%s %s %s\n' % (filename, st.st_size, st.st_mtime))
+    return h.hexdigest()
+
+
+def process(dirname, e):
+    db_view, host_cache = get_worker_state(dirname)
+    return process_with_state(db_view, host_cache, e)
+
+
+def process_with_state(db_view, host_cache, e):
     e.repo = db_view.repos[e.repo_name]
     e.shelf = e.repo.shelves[e.shelf_name]
     e.library = e.shelf.libraries[e.library_name]
@@ -1,3 +1,8 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
+import threading
+
 from mcdp.exceptions import DPSemanticError
 from mcdp import logger
 from mcdp.constants import MCDPConstants
@@ -10,46 +15,200 @@ import time
 
 
 class HostCache(object):
-    
-    def __init__(self, db_view):
+    """
+        Caches the parsing and the evaluation of the things in db_view.
+
+        The parsing only depends on the source, so parsing_cache is
+        keyed on (spec_name, hash of the source).
+
+        The evaluation depends also on the things loaded, transitively.
+        Each entry of evaluated remembers the hashes of the sources of
+        the thing and of all its dependencies; it is used only if they
+        are all unchanged. invalidate() drops the entries of a thing
+        and of all the things that depend on it.
+
+        Both caches are LRU with at most max_parsed and max_evaluated
+        entries (by default, from MCDPConstants).
+    """
+
+    def __init__(self, db_view, max_parsed=None, max_evaluated=None):
+        if max_parsed is None:
+            max_parsed = MCDPConstants.host_cache_max_parsed
+        if max_evaluated is None:
+            max_evaluated = MCDPConstants.host_cache_max_evaluated
         self.db_view = db_view
-        # key = (spec_name, source)
-        self.parsing_cache = {} # key -> namedtuplewhere
+        self.max_parsed = max_parsed
+        self.max_evaluated = max_evaluated
+        # key = (spec_name, hash of source)
+        self.parsing_cache = OrderedDict() # key -> namedtuplewhere
         self.parsing_cache_time_ms = {} # key -> ms
         # key = (repo_name, shelf_name, library_name, spec_name, thing_name)
-        self.evaluated= {}
-        
+        # key -> (res, dict(key -> hash of source))
+        self.evaluated = OrderedDict()
+        # key -> set of keys of the evaluated things that depend on it
+        self.dependents = {}
+        self._lock = threading.RLock()
+        # stack of dict(key -> hash) for the things being evaluated
+        self._loading = threading.local()
+
     def load_spec(self, repo_name, shelf_name, library_name, spec_name, thing_name, context):
         db_view = self.db_view
-        
+
         key0 = (repo_name, shelf_name, library_name, spec_name, thing_name)
-        if not key0 in self.evaluated:
+        # The thing being evaluated (if any) depends on this one, also
+        # if this one does not exist or cannot be evaluated: otherwise
+        # an error would be remembered after the source is fixed.
+        stack = self._loading.__dict__.setdefault('stack', [])
+        caller = stack[-1] if stack else None
+        try:
             x = get_source(db_view, repo_name, shelf_name, library_name, spec_name, thing_name)
-            source = x['data']
-            # We can do the parsing only once. It only depends on the string 
-            # and nothing else
-            key = (spec_name, source)
-            if not key in self.parsing_cache:
-                t0 = time.clock()
-                self.parsing_cache[key] = \
-                    self.parse_source(spec_name, source, context)
-                t1 = time.clock()
-                dms = 1000 * (t1-t0)
-                self.parsing_cache_time_ms[key] = dms
-                logger.warn('Parsing %s: %s ms' % (thing_name, dms))
-            else:
-                dms =  self.parsing_cache_time_ms[key]
+        except (DPSemanticError, KeyError):
+            if caller is not None:
+                caller[key0] = MISSING_SOURCE
+            raise
+        source = x['data']
+        h = get_source_hash(source)
+
+        with self._lock:
+            res, hashes = self._get_evaluated(key0, h)
+
+        if res is None:
+            hashes = {key0: h}
+            stack.append(hashes)
+            try:
+                res = self._evaluate(spec_name, thing_name, source, h, context)
+            finally:
+                stack.pop()
+                if caller is not None:
+                    caller.update(hashes)
+            with self._lock:
+                self._set_evaluated(key0, res, hashes)
+        elif caller is not None:
+            caller.update(hashes)
+
+        return res
+
+    def _evaluate(self, spec_name, thing_name, source, h, context):
+        # We can do the parsing only once. It only depends on the string
+        # and nothing else
+        key = (spec_name, h)
+        with self._lock:
+            parsed = self.parsing_cache.pop(key, None)
+            if parsed is not None:
+                self.parsing_cache[key] = parsed
+                dms = self.parsing_cache_time_ms[key]
                 logger.debug('Parsing %s: saved %s' % (thing_name, dms))
-                
-            parsed = self.parsing_cache[key] 
-            
-            parse_eval = specs[spec_name].parse_eval
-            res = parse_eval(parsed, context)
-            self.evaluated[key0] = res
-        
-        return self.evaluated[key0]
-        
-        
+
+        if parsed is None:
+            t0 = time.clock()
+            parsed = self.parse_source(spec_name, source, context)
+            t1 = time.clock()
+            dms = 1000 * (t1-t0)
+            logger.warn('Parsing %s: %s ms' % (thing_name, dms))
+            with self._lock:
+                self.parsing_cache[key] = parsed
+                self.parsing_cache_time_ms[key] = dms
+                while len(self.parsing_cache) > self.max_parsed:
+                    k, _ = self.parsing_cache.popitem(last=False)
+                    del self.parsing_cache_time_ms[k]
+
+        parse_eval = specs[spec_name].parse_eval
+        return parse_eval(parsed, context)
+
+    def _get_evaluated(self, key0, h):
+        """ Returns (res, hashes), or (None, None) if not cached
+            or if the sources changed. """
+        entry = self.evaluated.get(key0, None)
+        if entry is None:
+            return None, None
+        res, hashes = entry
+        if hashes[key0] != h or not self._dependencies_unchanged(key0, hashes):
+            logger.debug('Source of %s or of its dependencies changed.' % (key0,))
+            self.invalidate(*key0)
+            return None, None
+        # move it to the end
+        del self.evaluated[key0]
+        self.evaluated[key0] = entry
+        return res, hashes
+
+    def _dependencies_unchanged(self, key0, hashes):
+        for key, h in hashes.items():
+            if key == key0:
+                continue
+            try:
+                x = get_source(self.db_view, *key)
+            except (DPSemanticError, KeyError):
+                if h == MISSING_SOURCE:
+                    # still missing
+                    continue
+                return False
+            if h == MISSING_SOURCE or get_source_hash(x['data']) != h:
+                return False
+        return True
+
+    def _set_evaluated(self, key0, res, hashes):
+        self._forget(key0)
+        self.evaluated[key0] = (res, hashes)
+        for key in hashes:
+            self.dependents.setdefault(key, set()).add(key0)
+        while len(self.evaluated) > self.max_evaluated:
+            key, _ = self.evaluated.popitem(last=False)
+            self._forget(key)
+
+    def _forget(self, key0):
+        """ Removes the evaluated entry and its edges in the graph. """
+        entry = self.evaluated.pop(key0, None)
+        if entry is not None:
+            _, hashes = entry
+            for key in hashes:
+                s = self.dependents.get(key, None)
+                if s is not None:
+                    s.discard(key0)
+                    if not s:
+                        del self.dependents[key]
+
+    def get_content_hash(self, repo_name, shelf_name, library_name, spec_name, thing_name):
+        """ Returns a hash of the sources of the thing and of its
+            dependencies, as of the last load_spec(), or None if
+            the thing is not cached. """
+        key0 = (repo_name, shelf_name, library_name, spec_name, thing_name)
+        with self._lock:
+            entry = self.evaluated.get(key0, None)
+        if entry is None:
+            return None
+        _, hashes = entry
+        return get_source_hash(repr(sorted(hashes.items())))
+
+    @contextmanager
+    def recording_sources(self):
+        """ Yields a dict to which are added (key -> hash of source) 
+            the things loaded in the context, and their dependencies,
+            also if the loading failed (MISSING_SOURCE if the thing
+            does not exist). Use sources_unchanged() to check them later. """
+        hashes = {}
+        stack = self._loading.__dict__.setdefault('stack', [])
+        stack.append(hashes)
+        try:
+            yield hashes
+        finally:
+            stack.pop()
+
+    def sources_unchanged(self, hashes):
+        """ True if the sources recorded by recording_sources() 
+            did not change. """
+        return self._dependencies_unchanged(None, hashes)
+
+    def invalidate(self, repo_name, shelf_name, library_name, spec_name, thing_name):
+        """ Call when the thing changed: forgets it and the things
+            that depend on it. """
+        key0 = (repo_name, shelf_name, library_name, spec_name, thing_name)
+        with self._lock:
+            # these include the transitive dependents
+            todo = set(self.dependents.get(key0, set()))
+            todo.add(key0)
+            for key in todo:
+                self._forget(key)
+
     def parse_source(self, spec_name, source, context):
         parse_expr = specs[spec_name].parse_expr
         parse_refine = specs[spec_name].parse_refine
@@ -58,6 +217,17 @@ class HostCache(object):
         expr2 = parse_refine(expr, context)
         return expr2
 
+
+# The hash recorded for a thing that does not exist.
+MISSING_SOURCE = None
+
+
+def get_source_hash(source):
+    if isinstance(source, unicode):
+        source = source.encode('utf-8')
+    return hashlib.sha1(source).hexdigest()
+
+
 def get_source(db_view, repo_name, shelf_name, library_name, spec_name, thing_name):
     
     from mcdp_hdb_mcdp.library_view import get_soft_match
@@ -5,6 +5,7 @@ from mcdp_hdb.gitrepo_map import create_empty_dir_from_schema
 from mcdp_hdb.memdataview_utils import host_name
 from mcdp_hdb.pipes import mount_git_repo, WriteToRepoCallback, mount_directory
 from mcdp_hdb_mcdp.host_cache import HostCache
+from mcdp_hdb_mcdp.search_index import SearchIndex, SearchIndexCallback
 from mcdp_utils_misc import format_list
 import os
 
@@ -90,6 +91,8 @@ class HostInstance(object):
         db_view._who = self.who
         db_view.set_root()
         self.db_view = db_view
+        # kept up to date by the callbacks of the mounted views
+        self.search_index = SearchIndex()
         
         disk_map = DB.dm 
         view_repos = db_view.child('repos')
@@ -97,22 +100,30 @@ class HostInstance(object):
         for repo_name, dirname in self.repo_local.items():
             if repo_name == 'user_db':
                 mount_directory(view0=db_view, child_name='user_db', disk_map=disk_map, dirname=dirname)
+                this_view = db_view.child('user_db')
+                prefix = ('user_db',)
             else:
                 mount_directory(view0=view_repos, child_name=repo_name, disk_map=disk_map, dirname=dirname)
             
                 repo = view_repos[repo_name] 
+                this_view = view_repos.child(repo_name)
+                prefix = ('repos', repo_name)
+            SearchIndexCallback.add_to(this_view, self.search_index, prefix)
             
         for repo_name, repo in self.repos.items():
             if repo_name == 'user_db':
                 mount_git_repo(view0=db_view, child_name='user_db', disk_map=disk_map, repo=repo)
                 this_view = db_view.child('user_db')
+                prefix = ('user_db',)
             else:
                 mount_git_repo(view0=view_repos, child_name=repo_name, disk_map=disk_map, repo=repo)
                 this_view = view_repos.child(repo_name)
                 repo = view_repos[repo_name]
+                prefix = ('repos', repo_name)
             assert this_view._notify_callback is not None
             #logger.info('callback for repo.%s: %s' % (repo_name, view_repo._notify_callback)
             PushCallback.add_to(this_view)
+            SearchIndexCallback.add_to(this_view, self.search_index, prefix)
          
         all_repo_names = set(list(self.repos) + list(self.repo_local))
         all_repo_names.remove('user_db')
@@ -136,6 +147,8 @@ class HostInstance(object):
             user = DB.user.generate_empty(info=info)
             db_view.user_db.users[username_anonymous] = user
         
+        self.search_index.build(db_view)
+        
     def set_local_permission_mode(self):
         ''' The anonymous user is renamed 'Local User' and given group admin. '''
         username_anonymous = MCDPConstants.USER_ANONYMOUS
@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+from bisect import bisect_left
+from collections import namedtuple
+import re
+import threading
+
+from mcdp_hdb.memdata_events import DataEvents, event_add_prefix
+from mcdp_library.specs_def import specs
+
+
+__all__ = [
+    'SearchIndex',
+    'SearchResult',
+    'SearchIndexCallback',
+]
+
+"""
+    An inverted index (token -> documents) over the users, repos,
+    shelves, libraries and things of a db_view, for the search page.
+
+    Each document is identified by (kind, key), where kind is one of
+    'user', 'repo', 'shelf', 'library', 'thing' and key is the path:
+
+        ('user', (username,))
+        ('repo', (repo_name,))
+        ('shelf', (repo_name, shelf_name))
+        ('library', (repo_name, shelf_name, library_name))
+        ('thing', (repo_name, shelf_name, library_name, spec_name, thing_name))
+
+    The tokens of a document are the words in its own name (weight
+    WEIGHT_NAME), in the names of the containers (WEIGHT_CONTEXT), and,
+    for things, the identifiers and the words of the docstrings and
+    comments in the source (WEIGHT_BODY).
+
+    The index is filled once with build(db_view) and then kept up to
+    date by apply_event() with the dict_setitem, dict_delitem and
+    dict_rename events of the views (see SearchIndexCallback).
+"""
+
+SearchResult = namedtuple('SearchResult', 'kind key score')
+
+WEIGHT_NAME = 10
+WEIGHT_CONTEXT = 2
+WEIGHT_BODY = 1
+
+# order in which the results with the same score are shown
+KINDS = ['user', 'repo', 'shelf', 'library', 'thing']
+
+_words = re.compile(r'[A-Za-z0-9_]+')
+_word_parts = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+
+def get_search_tokens(s):
+    """ Returns the lowercase tokens in s: each word, and the parts
+        of the words with underscores or in CamelCase. """
+    res = set()
+    for word in _words.findall(s):
+        res.add(word.lower())
+        for piece in word.split('_'):
+            res.add(piece.lower())
+            for part in _word_parts.findall(piece):
+                res.add(part.lower())
+    res.discard('')
+    return res
+
+
+def get_query_terms(q):
+    """ Returns the lowercase words in the query. """
+    return [w.lower() for w in _words.findall(q)]
+
+
+class SearchIndex(object):
+    """
+        Inverted index for the search page.
+
+            index = SearchIndex()
+            index.build(db_view)
+            total, results = index.query('battery', offset=0, limit=20)
+
+        Each query term matches the tokens that start with it; a document
+        must match all the terms. Results are ranked by the sum over the
+        terms of the largest weight of a matching token (doubled if the
+        token is equal to the term).
+    """
+
+    def __init__(self):
+        # (kind, key) -> dict(token -> weight)
+        self.docs = {}
+        # (kind, key) -> source (only for things)
+        self.sources = {}
+        # username -> name of the user
+        self.user_names = {}
+        # token -> dict((kind, key) -> weight)
+        self.postings = {}
+        # sorted list of tokens, for prefix queries; None if it
+        # needs to be recomputed
+        self._vocabulary = None
+        self._lock = threading.RLock()
+
+    def build(self, db_view):
+        """ Indexes everything in db_view, forgetting what was there. """
+        with self._lock:
+            self.docs = {}
+            self.sources = {}
+            self.user_names = {}
+            self.postings = {}
+            self._vocabulary = None
+
+            for username, user in db_view.user_db.users.items():
+                self._add_user(username, user.info.name)
+
+            for repo_name, repo in db_view.repos.items():
+                self._add('repo', (repo_name,))
+                for shelf_name, shelf in repo.shelves.items():
+                    self._add('shelf', (repo_name, shelf_name))
+                    for library_name, library in shelf.libraries.items():
+                        self._add('library', (repo_name, shelf_name, library_name))
+                        for spec_name in specs:
+                            things = library.things.child(spec_name)
+                            for thing_name in things:
+                                # items() would give the views of the strings
+                                source = things[thing_name]
+                                key = (repo_name, shelf_name, library_name,
+                                       spec_name, thing_name)
+                                self._add_thing(key, source)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def query(self, q, offset=0, limit=None):
+        """
+            Returns (total, results), where results is the list of
+            SearchResult in positions offset, ..., offset + limit - 1
+            of the ranking, and total the number of matches.
+
+            An empty query matches everything.
+        """
+        terms = get_query_terms(q)
+        with self._lock:
+            if not terms:
+                scores = dict((doc, 0) for doc in self.docs)
+            else:
+                scores = None
+                for term in terms:
+                    found = self._match_term(term)
+                    if scores is None:
+                        scores = found
+                    else:
+                        scores = dict((doc, score + found[doc])
+                                      for doc, score in scores.items()
+                                      if doc in found)
+                    if not scores:
+                        break
+
+        def order(x):
+            (kind, key), score = x
+            return (-score, KINDS.index(kind), key)
+
+        ranked = sorted(scores.items(), key=order)
+        total = len(ranked)
+        if limit is None:
+            page = ranked[offset:]
+        else:
+            page = ranked[offset:offset + limit]
+        results = [SearchResult(kind=kind, key=key, score=score)
+                   for (kind, key), score in page]
+        return total, results
+
+    def _match_term(self, term):
+        """ Returns dict(doc -> score) for the documents that have
+            a token that starts with term. """
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        found = {}
+        i = bisect_left(vocabulary, term)
+        while i < len(vocabulary) and vocabulary[i].startswith(term):
+            token = vocabulary[i]
+            i += 1
+            factor = 2 if token == term else 1
+            for doc, weight in self.postings.get(token, {}).items():
+                score = weight * factor
+                if score > found.get(doc, 0):
+                    found[doc] = score
+        return found
+
+    def apply_event(self, event):
+        """
+            Updates the index after a data event on db_view, whose name
+            is relative to the root of db_view (see event_add_prefix()).
+            Events that do not add, remove or rename documents are ignored.
+        """
+        operation = event['operation']
+        if not operation in [DataEvents.dict_setitem,
+                             DataEvents.dict_delitem,
+                             DataEvents.dict_rename]:
+            return
+        arguments = event['arguments']
+        name = tuple(arguments['name'])
+        key = arguments['key']
+
+        with self._lock:
+            if name == ('user_db', 'users'):
+                doc = ('user', (key,))
+                if operation == DataEvents.dict_setitem:
+                    self._add_user(key, arguments['value']['info']['name'])
+                elif operation == DataEvents.dict_delitem:
+                    self._remove(doc)
+                else:
+                    user_name = self.user_names.get(key, None)
+                    self._remove(doc)
+                    self._add_user(arguments['key2'], user_name)
+                return
+
+            if len(name) < 3 or name[0] != 'repos' or name[2] != 'shelves':
+                return
+            repo_name = name[1]
+            rest = name[3:]
+            if rest == ():
+                # a shelf
+                prefix = (repo_name, key)
+                add = self._add_shelf
+            elif len(rest) == 2 and rest[1] == 'libraries':
+                # a library
+                prefix = (repo_name, rest[0], key)
+                add = self._add_library
+            elif len(rest) == 5 and rest[1] == 'libraries' and rest[3] == 'things':
+                # a thing
+                shelf_name, _, library_name, _, spec_name = rest
+                prefix = (repo_name, shelf_name, library_name, spec_name, key)
+                add = self._add_thing
+            else:
+                return
+
+            if operation == DataEvents.dict_setitem:
+                self._remove_prefix(prefix)
+                add(prefix, arguments['value'])
+            elif operation == DataEvents.dict_delitem:
+                self._remove_prefix(prefix)
+            else:
+                self._rename_prefix(prefix, arguments['key2'])
+
+    def _add_user(self, username, name):
+        doc = ('user', (username,))
+        self._remove(doc)
+        tokens = {}
+        _add_tokens(tokens, username, WEIGHT_NAME)
+        if name:
+            _add_tokens(tokens, name, WEIGHT_NAME)
+        self._set_doc(doc, tokens)
+        self.user_names[username] = name
+
+    def _add_shelf(self, prefix, shelf):
+        self._add('shelf', prefix)
+        for library_name, library in shelf['libraries'].items():
+            self._add_library(prefix + (library_name,), library)
+
+    def _add_library(self, prefix, library):
+        self._add('library', prefix)
+        for spec_name, things in library['things'].items():
+            for thing_name, source in things.items():
+                self._add_thing(prefix + (spec_name, thing_name), source)
+
+    def _add_thing(self, key, source):
+        self._add('thing', key, source)
+
+    def _add(self, kind, key, source=None):
+        doc = (kind, key)
+        self._remove(doc)
+        tokens = {}
+        for x in key[:-1]:
+            _add_tokens(tokens, x, WEIGHT_CONTEXT)
+        _add_tokens(tokens, key[-1], WEIGHT_NAME)
+        if source is not None:
+            _add_tokens(tokens, source, WEIGHT_BODY)
+            self.sources[doc] = source
+        self._set_doc(doc, tokens)
+
+    def _set_doc(self, doc, tokens):
+        self.docs[doc] = tokens
+        for token, weight in tokens.items():
+            if not token in self.postings:
+                self.postings[token] = {}
+                self._vocabulary = None
+            self.postings[token][doc] = weight
+
+    def _remove(self, doc):
+        tokens = self.docs.pop(doc, None)
+        self.sources.pop(doc, None)
+        kind, key = doc
+        if kind == 'user':
+            self.user_names.pop(key[0], None)
+        if tokens is None:
+            return
+        for token in tokens:
+            p = self.postings[token]
+            del p[doc]
+            if not p:
+                # it stays in the vocabulary until the next rebuild
+                del self.postings[token]
+
+    def _docs_with_prefix(self, prefix):
+        n = len(prefix)
+        return [(kind, key) for (kind, key) in self.docs
+                if kind != 'user' and key[:n] == prefix]
+
+    def _remove_prefix(self, prefix):
+        for doc in self._docs_with_prefix(prefix):
+            self._remove(doc)
+
+    def _rename_prefix(self, prefix, name2):
+        n = len(prefix)
+        for doc in self._docs_with_prefix(prefix):
+            kind, key = doc
+            source = self.sources.get(doc, None)
+            self._remove(doc)
+            key2 = key[:n - 1] + (name2,) + key[n:]
+            self._add(kind, key2, source)
+
+
+def _add_tokens(tokens, s, weight):
+    for token in get_search_tokens(s):
+        if weight > tokens.get(token, 0):
+            tokens[token] = weight
+
+
+class SearchIndexCallback(object):
+    """
+        Wraps the notify callback of a mounted view so that
+        the events are also applied to the SearchIndex.
+
+        prefix is the name of the mounted view in db_view,
+        such as ('repos', repo_name) or ('user_db',).
+    """
+
+    @staticmethod
+    def add_to(view, search_index, prefix):
+        view._notify_callback = SearchIndexCallback(view._notify_callback,
+                                                    search_index, prefix)
+
+    def __init__(self, other, search_index, prefix):
+        self.other = other
+        self.search_index = search_index
+        self.prefix = tuple(prefix)
+
+    def __call__(self, event):
+        if self.other is not None:
+            self.other(event)
+        self.search_index.apply_event(event_add_prefix(self.prefix, event))
@@ -3,4 +3,6 @@ from .test_creating_user import *
 from .test_db import *
 from .test_complete_pipeline import *
 from .testcases import *
-from .load_all import *
\ No newline at end of file
+from .load_all import *
+from .host_cache_tests import *
+from .search_index_tests import *
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+from comptests.registrar import comptest
+from mcdp.exceptions import DPSemanticError, DPSyntaxError
+from mcdp_hdb_mcdp.host_cache import HostCache
+from mcdp_hdb_mcdp.library_view import TheContext
+from nose.tools import assert_equal
+
+
+class Bag(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class Things(dict):
+    def child(self, spec_name):
+        return self[spec_name]
+
+
+def get_db_view(posets, models):
+    things = Things(posets=posets, models=models)
+    library = Bag(things=things)
+    shelf = Bag(libraries={'lib': library})
+    repo = Bag(shelves={'shelf': shelf})
+    return Bag(repos={'repo': repo})
+
+
+def load(host_cache, spec_name, thing_name):
+    context = TheContext(host_cache, host_cache.db_view, ['shelf'], 'lib')
+    return host_cache.load_spec('repo', 'shelf', 'lib', spec_name, thing_name,
+                                context=context)
+
+
+@comptest
+def check_host_cache_dependencies():
+    posets = {'unit': 'g', 'other': 'm'}
+    models = {'model1': "mcdp { provides x [`unit] }",
+              'model2': "mcdp { provides x [`other] }"}
+    db_view = get_db_view(posets, models)
+    host_cache = HostCache(db_view)
+
+    ndp1 = load(host_cache, 'models', 'model1')
+    ndp2 = load(host_cache, 'models', 'model2')
+    assert_equal(str(ndp1.get_ftype('x')), 'R[g]')
+    assert load(host_cache, 'models', 'model1') is ndp1
+    h1 = host_cache.get_content_hash('repo', 'shelf', 'lib', 'models', 'model1')
+
+    # editing a dependency is detected from the content
+    posets['unit'] = 'kg'
+    ndp1b = load(host_cache, 'models', 'model1')
+    assert_equal(str(ndp1b.get_ftype('x')), 'R[kg]')
+    h1b = host_cache.get_content_hash('repo', 'shelf', 'lib', 'models', 'model1')
+    assert h1 != h1b
+    # the other model is not affected
+    assert load(host_cache, 'models', 'model2') is ndp2
+
+    # explicit invalidation drops exactly the dependents
+    host_cache.invalidate('repo', 'shelf', 'lib', 'posets', 'unit')
+    key1 = ('repo', 'shelf', 'lib', 'models', 'model1')
+    key2 = ('repo', 'shelf', 'lib', 'models', 'model2')
+    assert not key1 in host_cache.evaluated
+    assert key2 in host_cache.evaluated
+
+
+@comptest
+def check_host_cache_bounded():
+    posets = dict(('p%d' % i, 'g') for i in range(10))
+    db_view = get_db_view(posets, {})
+    host_cache = HostCache(db_view, max_parsed=3, max_evaluated=4)
+    for i in range(10):
+        load(host_cache, 'posets', 'p%d' % i)
+    assert_equal(len(host_cache.evaluated), 4)
+    # all have the same source
+    assert_equal(len(host_cache.parsing_cache), 1)
+
+
+@comptest
+def check_host_cache_fixed_dependency():
+    """ The sources are recorded also when the loading fails, so that
+        the error is not remembered after the dependency is fixed. """
+    posets = {}
+    models = {'model1': "mcdp { provides x [`unit] }"}
+    db_view = get_db_view(posets, models)
+    host_cache = HostCache(db_view)
+
+    def load_fails():
+        with host_cache.recording_sources() as hashes:
+            try:
+                load(host_cache, 'models', 'model1')
+            except (DPSemanticError, DPSyntaxError):
+                pass
+            else:
+                raise Exception('Expected an error.')
+        return hashes
+
+    # the dependency does not exist
+    hashes = load_fails()
+    assert host_cache.sources_unchanged(hashes)
+    posets['unit'] = 'g'
+    assert not host_cache.sources_unchanged(hashes)
+    with host_cache.recording_sources() as hashes:
+        ndp = load(host_cache, 'models', 'model1')
+    assert_equal(str(ndp.get_ftype('x')), 'R[g]')
+    assert host_cache.sources_unchanged(hashes)
+
+    # the dependency does not parse
+    posets['unit'] = 'not a poset'
+    hashes = load_fails()
+    assert host_cache.sources_unchanged(hashes)
+    posets['unit'] = 'kg'
+    assert not host_cache.sources_unchanged(hashes)
+    ndp = load(host_cache, 'models', 'model1')
+    assert_equal(str(ndp.get_ftype('x')), 'R[kg]')
@@ -1,12 +1,26 @@
-from comptests.registrar import comptest_dynamic
-from mcdp_hdb_mcdp.cli_load_all import define_load_all_jobs
+from comptests.registrar import comptest_dynamic, comptest
+from mcdp_hdb_mcdp.cli_load_all import define_load_all_jobs, get_worker_state
 from mcdp_utils_misc.dir_from_package_nam import dir_from_package_name
 import os
 
 
+def get_bundled_repo():
+    mcdp_data = dir_from_package_name('mcdp_data')
+    return os.path.join(mcdp_data, 'bundled.mcdp_repo')
+
+
 @comptest_dynamic
 def load_all(context):
     outdir = os.path.join('out/comptests/load_all')
-    mcdp_data = dir_from_package_name('mcdp_data')
-    dirname = os.path.join(mcdp_data, 'bundled.mcdp_repo')
+    dirname = get_bundled_repo()
     define_load_all_jobs(context, dirname, outdir, name_filter=None, errors_only=False)
+
+
+@comptest
+def check_load_all_worker_state():
+    dirname = get_bundled_repo()
+    db_view, host_cache = get_worker_state(dirname)
+    db_view2, host_cache2 = get_worker_state(dirname)
+    # reused across jobs in the same process
+    assert db_view is db_view2
+    assert host_cache is host_cache2
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from comptests.registrar import comptest
+from mcdp_hdb.memdata_events import (event_dict_delitem, event_dict_rename,
+                                     event_dict_setitem)
+from mcdp_hdb_mcdp.search_index import SearchIndex
+from nose.tools import assert_equal
+
+from .host_cache_tests import Bag, Things
+
+
+def get_db_view(models):
+    things = Things(posets={}, models=models, templates={}, values={},
+                    primitivedps={})
+    library = Bag(things=things)
+    shelf = Bag(libraries={'lib': library})
+    repo = Bag(shelves={'shelf': shelf})
+    user = Bag(info=Bag(name='John Doe'))
+    user_db = Bag(users={'john': user})
+    return Bag(repos={'repo': repo}, user_db=user_db)
+
+
+def found(index, q):
+    _, results = index.query(q)
+    return [(r.kind, r.key[-1]) for r in results]
+
+
+@comptest
+def check_search_index_query():
+    models = {'Battery_LiPo': 'mcdp { "A lithium battery." provides capacity [J] }',
+              'ElectricMotor': 'mcdp { requires current [A] }',
+              'Lithium': 'mcdp { }'}
+    index = SearchIndex()
+    index.build(get_db_view(models))
+
+    # parts of the name, docstring and identifiers
+    assert_equal(found(index, 'lipo'), [('thing', 'Battery_LiPo')])
+    assert_equal(found(index, 'motor'), [('thing', 'ElectricMotor')])
+    assert_equal(found(index, 'current'), [('thing', 'ElectricMotor')])
+    assert_equal(found(index, 'doe'), [('user', 'john')])
+    # prefixes, and all the terms must match
+    assert_equal(found(index, 'batt capa'), [('thing', 'Battery_LiPo')])
+    assert_equal(found(index, 'batt current'), [])
+    # the name counts more than the body
+    assert_equal(found(index, 'lithium'),
+                 [('thing', 'Lithium'), ('thing', 'Battery_LiPo')])
+
+    # pagination
+    total, results = index.query('', offset=1, limit=2)
+    assert_equal(total, len(index))
+    assert_equal(len(results), 2)
+    _, all_results = index.query('')
+    assert_equal(results, all_results[1:3])
+
+
+@comptest
+def check_search_index_events():
+    index = SearchIndex()
+    index.build(get_db_view({'motor': 'mcdp { }'}))
+    kwargs = dict(_id='id', who=None)
+    things = ['repos', 'repo', 'shelves', 'shelf', 'libraries', 'lib',
+              'things', 'models']
+    libraries = ['repos', 'repo', 'shelves', 'shelf', 'libraries']
+
+    e = event_dict_setitem(things, 'engine', 'mcdp { provides torque [N*m] }', **kwargs)
+    index.apply_event(e)
+    assert_equal(found(index, 'torque'), [('thing', 'engine')])
+
+    # a new version of the source replaces the old one
+    e = event_dict_setitem(things, 'engine', 'mcdp { provides power [W] }', **kwargs)
+    index.apply_event(e)
+    assert_equal(found(index, 'torque'), [])
+    assert_equal(found(index, 'power'), [('thing', 'engine')])
+
+    e = event_dict_delitem(things, 'engine', **kwargs)
+    index.apply_event(e)
+    assert_equal(found(index, 'engine'), [])
+
+    # renaming a library renames the things inside
+    e = event_dict_rename(libraries, 'lib', 'propulsion', **kwargs)
+    index.apply_event(e)
+    assert_equal(found(index, 'propulsion'),
+                 [('library', 'propulsion'), ('thing', 'motor')])
+    assert_equal(found(index, 'lib'), [])
+
+    library = {'images': {}, 'documents': {},
+               'things': {'models': {'wheel': 'mcdp { }'}}}
+    e = event_dict_setitem(libraries, 'chassis', library, **kwargs)
+    index.apply_event(e)
+    assert_equal(found(index, 'wheel'), [('thing', 'wheel')])
+    e = event_dict_delitem(libraries, 'chassis', **kwargs)
+    index.apply_event(e)
+    assert_equal(found(index, 'chassis'), [])
+    assert_equal(found(index, 'wheel'), [])
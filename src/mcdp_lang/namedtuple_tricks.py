@@ -16,8 +16,7 @@ def isnamedtupleinstance(x):
 def isnamedtuplewhere(x):
     if not isnamedtupleinstance(x):
         return False
-    d = x._asdict()
-    return 'where' in d
+    return 'where' in type(x)._fields
 
 
 def namedtuplewhere(a, b):
@@ -38,12 +37,7 @@ def namedtuplewhere(a, b):
 
 
 def get_copy_with_where(x, where):
-    d = x._asdict()
-    del d['where']
-    d['where'] = where
-    T = type(x)
-    x1 = T(**d)
-    return x1
+    return x._replace(where=where)
 
 
 def get_copy_with_warning(x, warning):
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import sys
+import threading
 import traceback
+from collections import OrderedDict
 from contextlib import contextmanager
 
 from contracts import contract
@@ -12,14 +14,15 @@ from mcdp import logger, MCDPConstants
 from mcdp.development import mcdp_dev_warning, do_extra_checks
 from mcdp.exceptions import (DPInternalError, DPSemanticError, DPSyntaxError,
                              MCDPExceptionWithWhere)
-from mcdp_lang_utils import Where, line_and_col, location
+from mcdp_lang_utils import Where, get_line_index
 from mcdp_lang_utils.where import format_where
 from mcdp_utils_misc.timing import timeit
 from .find_parsing_el import find_parsing_element
 from .fix_whitespace_imp import fix_whitespace
 from .namedtuple_tricks import get_copy_with_where, recursive_print
+from .parse_compiled import parse_string_compiled
 from .parts import CDPLanguage
-from .pyparsing_bundled import ParseException, ParseFatalException
+from .pyparsing_bundled import ParseException, ParseFatalException, ParserElement
 from .utils import isnamedtupleinstance, parse_action
 from .utils_lists import make_list, unwrap_list
 
@@ -172,10 +175,19 @@ def spa(x, b):
     @parse_action
     def p(tokens, loc, s):
         # print('spa(): parsing %s %r %r %r ' % (x, tokens, loc, s))
+        # where the match ends; this is the same as x.tryParse(s, loc)
+        # but does not parse again
+        character_end = ParserElement.getParseActionEnd()
         res = bb(tokens, loc, s)
         # if we are here, then it means the parse was successful
-        # we try again to get loc_end
-        character_end = x.tryParse(s, loc)
+        if character_end is None or MCDPConstants.parse_where_end_with_tryparse:
+            character_end2 = x.tryParse(s, loc)
+            if character_end is not None and character_end != character_end2:
+                msg = 'Inconsistent end of the match.'
+                raise_desc(DPInternalError, msg, x=x, loc=loc,
+                           character_end=character_end,
+                           character_end2=character_end2)
+            character_end = character_end2
 
         if isnamedtupleinstance(res):
             if res.where is not None:
@@ -328,28 +340,35 @@ def translate_where(where0, string):
         This assumes that string and where0.string have the same number of lines.
     """
 
-    nlines = len(string.split('\n'))
-    nlines0 = len(where0.string.split('\n'))
+    index0 = get_line_index(where0.string)
+    index = get_line_index(string)
+    nlines = index.nlines
+    nlines0 = index0.nlines
     if nlines != nlines0:
         msg = 'I expected they have the same lines.'
         msg += '\n         string (%d lines): %r' % (nlines, string)
         msg += '\n  where0.string (%d lines): %r' % (nlines0, where0.string)
         raise_desc(DPInternalError, msg)
 
-    string0 = where0.string
-    line, col = line_and_col(where0.character, string0)
-    character2 = location(line, col, string)
+    line, col = index0.line_and_col(where0.character)
+    character2 = index.location(line, col)
 
     if where0.character_end is None:
         character_end2 = None
     else:
-        line, col = line_and_col(where0.character_end, string0)
-        character_end2 = location(line, col, string)
+        line, col = index0.line_and_col(where0.character_end)
+        character_end2 = index.location(line, col)
 
     where = Where(string=string, character=character2, character_end=character_end2)
     return where
 
 
+# (expr, string) -> result of parse_wrap(); the ASTs are immutable,
+# so they can be shared.
+_parse_wrap_cache = OrderedDict()
+_parse_wrap_lock = threading.Lock()
+
+
 def parse_wrap(expr, string):
     """
 
@@ -366,6 +385,16 @@ def parse_wrap(expr, string):
 
     check_isinstance(string, bytes)
 
+    key = (expr, string)
+    with _parse_wrap_lock:
+        res = _parse_wrap_cache.pop(key, None)
+        if res is not None:
+            if hasattr(res, 'where') and res.where.string is not string:
+                # an equal string: the Where refer to this one
+                res = replace_where_string(res, string)
+            _parse_wrap_cache[key] = res
+            return [res]
+
     # Nice trick: the remove_comments doesn't change the number of lines
     # it only truncates them...
 
@@ -385,7 +414,12 @@ def parse_wrap(expr, string):
         with timeit(w, MCDPConstants.parsing_too_slow_threshold):
             expr.parseWithTabs()
 
-            parsed = expr.parseString(string0, parseAll=True)  # [0]
+            parsed = None
+            if MCDPConstants.parse_with_compiled_grammar:
+                parsed = parse_string_compiled(expr, string0)
+            if parsed is None:
+                # this also gives the error messages
+                parsed = expr.parseString(string0, parseAll=True)  # [0]
 
             def transform(x, parents):  # @UnusedVariable
                 if x.where is None:  # pragma: no cover
@@ -403,6 +437,10 @@ def parse_wrap(expr, string):
                 assert_equal(parsed_transformed.where.string, string)
 
             res = fix_whitespace(parsed_transformed)
+            with _parse_wrap_lock:
+                _parse_wrap_cache[key] = res
+                while len(_parse_wrap_cache) > MCDPConstants.parse_wrap_cache_size:
+                    _parse_wrap_cache.popitem(last=False)
             return [res]
 
     except (ParseException, ParseFatalException) as e:
@@ -431,6 +469,18 @@ def parse_wrap(expr, string):
         raise_wrapped(DPInternalError, e, msg)
 
 
+def replace_where_string(x, string):
+    """ Returns a copy of x whose Where refer to string (equal to theirs). """
+    from .refinement import namedtuple_visitor_ext
+
+    def transform(x, parents):  # @UnusedVariable
+        where = Where(string=string, character=x.where.character,
+                      character_end=x.where.character_end)
+        return get_copy_with_where(x, where)
+
+    return namedtuple_visitor_ext(x, transform)
+
+
 def remove_comments(s):
     lines = s.split("\n")
 
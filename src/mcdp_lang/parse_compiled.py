@@ -0,0 +1,566 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from .pyparsing_bundled import (And, CaselessKeyword, CaselessLiteral, Combine,
+    Empty, FollowedBy, Forward, Group, Keyword, LineEnd, Literal, MatchFirst,
+    NoMatch, NotAny, OneOrMore, Optional, Or, ParseElementEnhance,
+    ParseException, ParseResults, ParserElement, QuotedString, Regex,
+    StringEnd, StringStart, Suppress, Word, ZeroOrMore, _optionalNotMatched,
+    _parseActionState)
+
+
+__all__ = [
+    'parse_string_compiled',
+]
+
+"""
+    A second backend for the grammar in syntax.py.
+
+    The pyparsing elements reachable from an expression are translated,
+    once, into a table of Python closures that follow the same rules as
+    the bundled pyparsing: whitespace skipping, longest match for Or,
+    first match for MatchFirst, "-" (ErrorStop) in And, lookaheads, and
+    the packrat memo. The parse actions of the grammar are the same
+    objects and are called with the same arguments, so the result is
+    the same CDPLanguage tree, with the same Where.
+
+    The closures return None instead of raising ParseException, do not
+    build a ParseResults for each match, and look up the whitespace
+    and the first character of each alternative in tables computed in
+    advance; this is where the speed comes from.
+
+    parse_string_compiled() returns None if it cannot parse the string,
+    or if the expression uses something that is not translated
+    (results names, ignore(), ...). In that case the caller uses
+    expr.parseString(), so that the errors are exactly pyparsing's.
+"""
+
+
+class _Fatal(Exception):
+    """ A ParseFatalException would be raised here (after a "-"). """
+
+
+class _Unsupported(Exception):
+    """ The element cannot be translated. """
+
+
+_FATAL = object()
+_MISSING = object()
+
+# Token classes whose parseImpl() can be called directly: they do not
+# override preParse() or postParse() and do not parse other elements.
+_SIMPLE_TOKENS = (Empty, NoMatch, CaselessLiteral, CaselessKeyword,
+                  QuotedString, LineEnd, StringStart, StringEnd)
+
+
+def _as_list(tokens):
+    """ The list of tokens in ParseResults(tokens). """
+    if isinstance(tokens, ParseResults):
+        return list(tokens)
+    if isinstance(tokens, list):
+        return tokens
+    return [tokens]
+
+
+def _compose_white(w1, first):
+    """ Skipping the whitespace w1 and then the one in first = (w2, chars). """
+    if first is None:
+        return None
+    w2, chars = first
+    if not w2 or set(w2) <= set(w1):
+        return w1, chars
+    if not w1 or set(w1) <= set(w2):
+        return w2, chars
+    return None
+
+
+def _first_pre(e, seen):
+    """
+        For e._parse(s, loc, act, callPreParse=True): returns (white, chars)
+        if every match starts with a character in chars, after skipping
+        the characters in white from loc; None if we do not know
+        (e.g. e can match the empty string).
+    """
+    if e.callPreparse:
+        white = e.whiteChars if e.skipWhitespace else ''
+        return _compose_white(white, _first_nopre(e, seen))
+    return _first_nopre(e, seen)
+
+
+def _first_nopre(e, seen):
+    """ Same as _first_pre(), for callPreParse=False. """
+    k = id(e)
+    if k in seen:
+        return None
+    seen = seen | set([k])
+    t = type(e)
+    if t is Literal or (t is Keyword and not e.caseless):
+        return '', set(e.match[0])
+    if t is Word:
+        return '', set(e.initChars)
+    if t is And:
+        if isinstance(e.exprs[0], And._ErrorStop):
+            return None
+        return _first_nopre(e.exprs[0], seen)
+    if t is MatchFirst or t is Or:
+        firsts = [_first_pre(x, seen) for x in e.exprs]
+        if not firsts or None in firsts:
+            return None
+        whites = set(white for white, _ in firsts)
+        if len(whites) != 1:
+            return None
+        chars = set()
+        for _, c in firsts:
+            chars.update(c)
+        return whites.pop(), chars
+    if t in (Forward, Group, Suppress, Combine, OneOrMore,
+             ParseElementEnhance):
+        if e.expr is None:
+            return None
+        return _first_nopre(e.expr, seen)
+    return None
+
+
+class CompiledGrammar(object):
+    """ The closures for the elements reachable from one expression. """
+
+    def __init__(self, root):
+        self.root = root
+        self.memo = {}
+        # whitespace characters -> list: position -> first position
+        # at or after it that is not whitespace
+        self.skip_tables = {}
+        self.n = 0
+        self.functions = {}
+        self.in_progress = {}
+        self.lock = threading.Lock()
+        self.stride = [None]
+        self.root_f = self._compile(root)
+        self.stride[0] = 4 * self.n
+        self.end_table = self._skip_table(ParserElement.DEFAULT_WHITE_CHARS)
+        self.root_table = self._skip_table(root.whiteChars)
+
+    def _skip_table(self, white):
+        white = "".join(sorted(set(white)))
+        if not white in self.skip_tables:
+            self.skip_tables[white] = []
+        return self.skip_tables[white]
+
+    def prepare(self, s):
+        self.memo.clear()
+        n = len(s)
+        for white, table in self.skip_tables.items():
+            t = [n] * (n + 2)
+            last = n
+            for i in range(n - 1, -1, -1):
+                if not s[i] in white:
+                    last = i
+                t[i] = last
+            table[:] = t
+
+    def parse(self, s):
+        """ Returns the ParseResults, or None if the string does not parse. """
+        with self.lock:
+            self.prepare(s)
+            try:
+                r = self.root_f(s, 0, True, True)
+            except _Fatal:
+                return None
+            finally:
+                self.memo.clear()
+        if r is None:
+            return None
+        loc, tokens = r
+        # parseString(parseAll=True): the root's whitespace, and then
+        # the default whitespace before the end of the string
+        if self.root.skipWhitespace:
+            loc = self.root_table[loc]
+        loc = self.end_table[loc]
+        if loc != len(s):
+            return None
+        return ParseResults(tokens)
+
+    def _compile(self, e):
+        k = id(e)
+        if k in self.functions:
+            return self.functions[k]
+        if k in self.in_progress:
+            # a cycle, through a Forward
+            cell = self.in_progress[k]
+
+            def f_forward(s, loc, act, pre):
+                return cell[0](s, loc, act, pre)
+
+            return f_forward
+
+        cell = [None]
+        self.in_progress[k] = cell
+        f = self._compile_element(e)
+        cell[0] = f
+        del self.in_progress[k]
+        self.functions[k] = f
+        return f
+
+    def _check_supported(self, e):
+        if e.resultsName is not None or e.ignoreExprs or e.debug or \
+                e.failAction is not None or e.callDuringTry:
+            msg = 'Element %s of type %s uses an unsupported feature.'
+            raise _Unsupported(msg % (e, type(e).__name__))
+
+    def _impl(self, e):
+        """
+            Returns (impl, memoize): impl(s, loc, act) is parseImpl()
+            and returns (loc, list of tokens) or None.
+        """
+        t = type(e)
+
+        if t is Literal:
+            match = e.match
+            l = len(match)
+            tokens = [match]
+
+            def impl(s, loc, act):
+                if s.startswith(match, loc):
+                    return loc + l, tokens
+
+            return impl, False
+
+        if t is Keyword and not e.caseless:
+            match = e.match
+            l = len(match)
+            ident = e.identChars
+            tokens = [match]
+
+            def impl(s, loc, act):
+                if s.startswith(match, loc):
+                    end = loc + l
+                    if (end >= len(s) or not s[end] in ident) and \
+                            (loc == 0 or not s[loc - 1] in ident):
+                        return end, tokens
+
+            return impl, False
+
+        if t in (Word, Regex) and e.re is not None:
+            if t is Regex and e.re.groupindex:
+                raise _Unsupported('Regex with named groups: %s' % e)
+            rematch = e.re.match
+
+            def impl(s, loc, act):
+                m = rematch(s, loc)
+                if m is not None:
+                    return m.end(), [m.group()]
+
+            return impl, False
+
+        if t in (Word, Regex) or t in _SIMPLE_TOKENS or \
+                t is And._ErrorStop:
+            parseImpl = e.parseImpl
+
+            def impl(s, loc, act):
+                try:
+                    loc, tokens = parseImpl(s, loc, act)
+                except (ParseException, IndexError):
+                    return None
+                return loc, _as_list(tokens)
+
+            return impl, False
+
+        if t is And:
+            first = self._compile(e.exprs[0])
+            rest = []
+            error_stop = False
+            for x in e.exprs[1:]:
+                if isinstance(x, And._ErrorStop):
+                    error_stop = True
+                    continue
+                rest.append((self._compile(x), error_stop))
+            rest = tuple(rest)
+
+            def impl(s, loc, act):
+                r = first(s, loc, act, False)
+                if r is None:
+                    return None
+                loc, tokens = r
+                for f, fatal in rest:
+                    r = f(s, loc, act, True)
+                    if r is None:
+                        if fatal:
+                            raise _Fatal()
+                        return None
+                    loc, more = r
+                    if more:
+                        tokens = tokens + more
+                return loc, tokens
+
+            return impl, True
+
+        if t is MatchFirst or t is Or:
+            alternatives = [self._compile(x) for x in e.exprs]
+            dispatch = self._dispatch(e, alternatives)
+
+            if t is MatchFirst:
+                def impl(s, loc, act):
+                    for f in dispatch(s, loc):
+                        r = f(s, loc, act, True)
+                        if r is not None:
+                            return r
+                    return None
+            else:
+                def impl(s, loc, act):
+                    # like tryParse(): try all without the actions
+                    matches = []
+                    for f in dispatch(s, loc):
+                        try:
+                            r = f(s, loc, False, True)
+                        except _Fatal:
+                            continue
+                        if r is not None:
+                            matches.append((r[0], f))
+                    if not matches:
+                        return None
+                    # the longest; the first one if the same length
+                    matches.sort(key=lambda x: -x[0])
+                    for _, f in matches:
+                        r = f(s, loc, act, True)
+                        if r is not None:
+                            return r
+                    return None
+
+            return impl, True
+
+        if t in (Forward, Group, Suppress, Combine, ParseElementEnhance):
+            if e.expr is None:
+                raise _Unsupported('Forward without expression: %s' % e)
+            inner = self._compile(e.expr)
+
+            def impl(s, loc, act):
+                return inner(s, loc, act, False)
+
+            return impl, True
+
+        if t is Optional:
+            inner = self._compile(e.expr)
+            if e.defaultValue is _optionalNotMatched:
+                default = []
+            else:
+                default = [e.defaultValue]
+
+            def impl(s, loc, act):
+                r = inner(s, loc, act, False)
+                if r is None:
+                    return loc, default
+                return r
+
+            return impl, True
+
+        if t is OneOrMore or t is ZeroOrMore:
+            inner = self._compile(e.expr)
+            if e.not_ender is not None:
+                not_ender = self._compile(e.not_ender)
+            else:
+                not_ender = None
+            at_least_one = t is OneOrMore
+
+            def impl(s, loc, act):
+                if not_ender is not None and \
+                        not_ender(s, loc, False, True) is None:
+                    r = None
+                else:
+                    r = inner(s, loc, act, False)
+                if r is None:
+                    if at_least_one:
+                        return None
+                    return loc, []
+                loc, tokens = r
+                while True:
+                    if not_ender is not None and \
+                            not_ender(s, loc, False, True) is None:
+                        break
+                    r = inner(s, loc, act, True)
+                    if r is None:
+                        break
+                    loc, more = r
+                    if more:
+                        tokens = tokens + more
+                return loc, tokens
+
+            return impl, True
+
+        if t is NotAny or t is FollowedBy:
+            inner = self._compile(e.expr)
+            negate = t is NotAny
+
+            def impl(s, loc, act):
+                # like canParseNext() and tryParse()
+                try:
+                    r = inner(s, loc, False, True)
+                except _Fatal:
+                    r = None
+                if (r is None) == negate:
+                    return loc, []
+                return None
+
+            return impl, True
+
+        raise _Unsupported('Cannot translate %s of type %s.' % (e, t.__name__))
+
+    def _dispatch(self, e, alternatives):
+        """
+            For MatchFirst and Or: returns a function (s, loc) -> the
+            alternatives that can match at loc, in order, looking at
+            the first character after the whitespace. The alternatives
+            for which we do not know it are always tried.
+        """
+        firsts = [_first_pre(x, set()) for x in e.exprs]
+        whites = [first[0] for first in firsts if first is not None]
+        everything = tuple(alternatives)
+        if not whites:
+            def dispatch(s, loc):  # @UnusedVariable
+                return everything
+
+            return dispatch
+
+        # the whitespace skipped by most alternatives
+        white = max(sorted(set(whites)), key=whites.count)
+        firsts = [first[1] if first is not None and first[0] == white
+                  else None for first in firsts]
+        chars = set()
+        for c in firsts:
+            if c is not None:
+                chars.update(c)
+        table = {}
+        for ch in chars:
+            table[ch] = tuple(f for f, c in zip(alternatives, firsts)
+                              if c is None or ch in c)
+        others = tuple(f for f, c in zip(alternatives, firsts) if c is None)
+        skip = self._skip_table(white)
+        get = table.get
+
+        def dispatch(s, loc):
+            loc = skip[loc]
+            if loc >= len(s):
+                return others
+            return get(s[loc], others)
+
+        return dispatch
+
+    def _compile_element(self, e):
+        """
+            Returns f(s, loc, act, pre) that is e._parse(s, loc, act, pre):
+            memo, whitespace, parseImpl(), postParse(), parse actions.
+        """
+        self._check_supported(e)
+        impl, memoize = self._impl(e)
+
+        t = type(e)
+        if t is Group:
+            def post(tokens):
+                return [ParseResults(tokens)]
+        elif t is Suppress:
+            def post(tokens):  # @UnusedVariable
+                return []
+        elif t is Combine:
+            join_string = e.joinString
+
+            def post(tokens):
+                s = "".join(ParseResults(tokens)._asStringList(join_string))
+                return [s]
+        else:
+            post = None
+
+        actions = tuple(e.parseAction)
+        memoize = memoize or bool(actions)
+        if e.skipWhitespace and e.callPreparse:
+            skip = self._skip_table(e.whiteChars)
+        else:
+            skip = None
+
+        state = _parseActionState
+
+        def finish(s, loc, act, r):
+            """ postParse() and the parse actions. """
+            end, tokens = r
+            if post is not None:
+                tokens = post(tokens)
+            if act and actions:
+                state.loc = end
+                tokens = ParseResults(tokens)
+                for fn in actions:
+                    res = fn(s, loc, tokens)
+                    if res is not None:
+                        tokens = ParseResults(res)
+                tokens = list(tokens)
+            return end, tokens
+
+        if not memoize:
+            def f(s, loc, act, pre):
+                if pre and skip is not None:
+                    loc = skip[loc]
+                r = impl(s, loc, act)
+                if r is not None and (post is not None or (act and actions)):
+                    r = finish(s, loc, act, r)
+                return r
+
+            return f
+
+        memo = self.memo
+        get = memo.get
+        i = self.n
+        self.n += 1
+        base = i * 4
+        # the keys of the memo are loc * stride + 4 * i + 2 * act + pre
+        stride = self.stride
+
+        def f(s, loc, act, pre):
+            key = loc * stride[0] + base + (2 if act else 0) + \
+                (1 if pre else 0)
+            r = get(key, _MISSING)
+            if r is not _MISSING:
+                if r is _FATAL:
+                    raise _Fatal()
+                return r
+            start = skip[loc] if pre and skip is not None else loc
+            try:
+                r = impl(s, start, act)
+            except _Fatal:
+                memo[key] = _FATAL
+                raise
+            if r is not None and (post is not None or (act and actions)):
+                r = finish(s, start, act, r)
+            memo[key] = r
+            return r
+
+        return f
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_grammar(expr):
+    """ Returns the CompiledGrammar for expr, or None if not possible. """
+    with _compiled_lock:
+        if not id(expr) in _compiled:
+            if not expr.streamlined:
+                expr.streamline()
+            try:
+                c = CompiledGrammar(expr)
+            except _Unsupported:
+                c = None
+            # keep expr alive, so that id(expr) is not reused
+            _compiled[id(expr)] = (expr, c)
+        return _compiled[id(expr)][1]
+
+
+def parse_string_compiled(expr, string):
+    """
+        Same as expr.parseString(string, parseAll=True), with the
+        compiled grammar. Returns None if the string does not parse
+        or the expression cannot be compiled.
+    """
+    c = get_compiled_grammar(expr)
+    if c is None:
+        return None
+    if not expr.keepTabs:
+        string = string.expandtabs()
+    return c.parse(string)
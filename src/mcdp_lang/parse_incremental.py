@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+import re
+import threading
+
+from contracts.utils import check_isinstance
+from mcdp import MCDPConstants
+from mcdp.exceptions import DPSyntaxError
+from mcdp_lang_utils import Where
+
+from .fix_whitespace_imp import fix_whitespace
+from .namedtuple_tricks import get_copy_with_where
+from .parse_actions import parse_wrap, remove_comments
+from .parts import CDPLanguage
+from .refinement import namedtuple_visitor_ext
+from .utils_lists import make_list
+
+
+__all__ = [
+    'StatementParseCache',
+    'parse_wrap_incremental',
+]
+
+CDP = CDPLanguage
+
+"""
+    Incremental parsing of "mcdp { ... }" blocks, for the editor.
+
+    The body of the block is split in top-level statements; each one
+    is parsed on its own with Syntax.line_expr, and the result is
+    remembered by the text of the statement. When the user edits one
+    statement, only that one is parsed again; the others are reused,
+    after shifting their Where objects to the new position.
+
+    A statement is delimited by a newline outside of brackets and
+    quotes, followed by a line indented no more than the first
+    statement. If anything does not fit this scheme (a docstring at
+    the beginning of the block, a statement that does not parse on
+    its own, ...) we fall back to parse_wrap() on the whole string,
+    so that the errors are the same.
+"""
+
+
+class StatementParseCache(object):
+    """ LRU cache: text of the statement -> parse result (relative
+        to that text). At most max_size statements are kept
+        (by default MCDPConstants.parse_statement_cache_size). """
+
+    def __init__(self, max_size=None):
+        if max_size is None:
+            max_size = MCDPConstants.parse_statement_cache_size
+        self.max_size = max_size
+        self.statements = OrderedDict()
+        self.lock = threading.Lock()
+        # for statistics
+        self.hits = 0
+        self.misses = 0
+
+    def parse_statement(self, text):
+        """ Returns the result of parse_wrap(Syntax.line_expr, text). """
+        with self.lock:
+            res = self.statements.pop(text, None)
+            if res is not None:
+                self.statements[text] = res
+                self.hits += 1
+                return res
+        from .syntax import Syntax
+        res = parse_wrap(Syntax.line_expr, text)[0]
+        with self.lock:
+            self.misses += 1
+            self.statements[text] = res
+            while len(self.statements) > self.max_size:
+                self.statements.popitem(last=False)
+        return res
+
+
+def parse_wrap_incremental(expr, string, cache):
+    """
+        Same as parse_wrap(expr, string), but reusing the parse of the
+        statements that are in cache (a StatementParseCache).
+    """
+    from .syntax import Syntax
+    check_isinstance(string, str)
+    if expr is Syntax.ndpt_dp_rvalue and remove_comments(string) == string:
+        res = _parse_model_incremental(string, cache)
+        if res is not None:
+            return [res]
+    return parse_wrap(expr, string)
+
+
+def _parse_model_incremental(s, cache):
+    """ Returns the BuildProblem, or None if we cannot do it
+        incrementally. """
+    m = re.match(r'mcdp(\s*){', s)
+    if m is None or not s.endswith('}'):
+        return None
+    lbrace_loc = m.end() - 1
+    rbrace_loc = len(s) - 1
+    starts = _statement_starts(s, m.end(), rbrace_loc)
+    if not starts:
+        return None
+
+    statements = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else rbrace_loc
+        text = s[start:end].rstrip()
+        try:
+            x = cache.parse_statement(text)
+        except DPSyntaxError:
+            # let parse_wrap() give the error in context
+            return None
+        statements.append(_shift_where(x, s, start))
+
+    ops = make_list(statements)
+    model_statements = CDP.ModelStatements(ops, where=ops.where)
+    res = CDP.BuildProblem(
+        keyword=CDP.MCDPKeyword('mcdp', where=Where(s, 0, len('mcdp'))),
+        lbrace=CDP.LBRACE('{', where=Where(s, lbrace_loc, lbrace_loc + 1)),
+        comment=None,
+        statements=model_statements,
+        rbrace=CDP.RBRACE('}', where=Where(s, rbrace_loc, rbrace_loc + 1)),
+        where=Where(s, 0, len(s)))
+    return fix_whitespace(res)
+
+
+def _shift_where(x, s, offset):
+    """ Makes the Where objects in x, which refer to a substring,
+        refer to s, where the substring starts at offset. """
+    def transform(x, parents):  # @UnusedVariable
+        w = x.where
+        if w.character_end is None:
+            character_end = None
+        else:
+            character_end = w.character_end + offset
+        where = Where(s, w.character + offset, character_end)
+        return get_copy_with_where(x, where)
+    return namedtuple_visitor_ext(x, transform)
+
+
+def _statement_starts(s, begin, end):
+    """
+        Returns the offsets where the statements in s[begin:end] start,
+        or None if the body cannot be split (it is empty or begins
+        with a docstring).
+    """
+    body = s[begin:end]
+    first = len(body) - len(body.lstrip())
+    if first == len(body) or body[first] in ['"', "'"]:
+        return None
+    line_start = body.rfind('\n', 0, first) + 1
+    if line_start == 0:
+        # the first statement is on the same line as "{"
+        return None
+    base_indent = first - line_start
+
+    starts = [begin + first]
+    depth = 0
+    quote = None
+    for i in range(first, len(body)):
+        c = body[i]
+        if quote is not None:
+            if c == quote:
+                quote = None
+        elif c in ['"', "'"]:
+            quote = c
+        elif c in '([{':
+            depth += 1
+        elif c in ')]}':
+            depth -= 1
+        elif c == '\n' and depth == 0:
+            j = body.find('\n', i + 1)
+            line = body[i + 1:] if j == -1 else body[i + 1:j]
+            if not line.strip():
+                continue
+            indent = len(line) - len(line.lstrip(' '))
+            if indent <= base_indent:
+                starts.append(begin + i + 1 + indent)
+    return starts
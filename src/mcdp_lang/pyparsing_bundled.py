@@ -70,6 +70,7 @@ import re
 import sre_constants
 import string
 import sys
+import threading
 import traceback
 import warnings
 from datetime import datetime
@@ -908,6 +909,10 @@ def _trim_arity(func, maxargs=2):
     return wrapper
 
 
+# (mcdp) see ParserElement.getParseActionEnd()
+_parseActionState = threading.local()
+
+
 class ParserElement(object):
     """Abstract base level parser element class."""
     DEFAULT_WHITE_CHARS = " \n\t\r"
@@ -1146,6 +1151,8 @@ class ParserElement(object):
 
         retTokens = ParseResults(tokens, self.resultsName, asList=self.saveAsList, modal=self.modalResults)
         if self.parseAction and (doActions or self.callDuringTry):
+            # (mcdp) let the parse actions know where the match ends
+            _parseActionState.loc = loc
             if debugging:
                 try:
                     for fn in self.parseAction:
@@ -1177,6 +1184,15 @@ class ParserElement(object):
         # print ("AC: Matched %s with tokens %s" % ( self,retTokens.asList()))
         return loc, retTokens
 
+    @staticmethod
+    def getParseActionEnd():
+        """
+        (mcdp) To be called from a parse action: returns the location
+        where the tokens passed to it end (the location returned
+        by tryParse(), without parsing again).
+        """
+        return getattr(_parseActionState, 'loc', None)
+
     def tryParse(self, instring, loc):
         try:
             return self._parse(instring, loc, doActions=False)[0]
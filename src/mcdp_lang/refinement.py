@@ -449,18 +449,18 @@ def namedtuple_visitor_ext(x, transform, parents=None):
 
     assert isnamedtupleinstance(x), x
 
-    d = x._asdict()
-    for k, v in d.items():
+    values = []
+    for k, v in zip(x._fields, x):
         if isnamedtupleinstance(v):
             parents2 = parents + ((x, k),)
             v2 = namedtuple_visitor_ext(v, transform, parents=parents2)
         else:  # (x)
             v2 = v
 
-        d[k] = v2
+        values.append(v2)
 
     T = type(x)
-    x1 = T(**d)
+    x1 = T(*values)
 
     if isnamedtuplewhere(x1):
         x1 = transform(x1, parents=parents)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+import re
+
+from .parse_actions import remove_comments
+
+
+__all__ = [
+    'LoadReference',
+    'scan_load_references',
+]
+
+"""
+    A scanner for the references to other things ("load <name>",
+    "`<name>", "`<library>.<name>", "load (<name>)") that does not
+    need the full parser.
+
+    It only finds the names: whether a reference is to a model, a
+    poset or a template has to be decided by looking at the files in
+    the library. When the scanner finds something that it does not
+    understand (a backtick or "load" not followed by a name) it gives up,
+    and the caller should use the parser.
+"""
+
+LoadReference = namedtuple('LoadReference', 'libname name')
+
+_identifier = r'[_a-zA-Z][_a-zA-Z0-9]*'
+
+# strings, which are skipped, and the beginning of a reference
+_tokens = re.compile(r'''
+      (?P<string>"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"[^"\n]*"|'[^'\n]*')
+    | (?P<load>(?<![_a-zA-Z0-9])load(?![_a-zA-Z0-9])|`)
+''', re.VERBOSE)
+
+# what follows "load" or the backtick
+_reference = re.compile(r'''
+    \s*
+    (?:
+        \(\s*(?P<pname>%(id)s)\s*\)
+      | (?:(?P<libname>%(id)s)\s*\.\s*)?(?P<name>%(id)s)
+    )
+    (?![_a-zA-Z0-9.])
+''' % dict(id=_identifier), re.VERBOSE)
+
+
+def scan_load_references(s):
+    """
+        Returns the list of LoadReference in the source s, in order,
+        with libname = None if the library is not given; or None if
+        s contains something that the scanner cannot interpret.
+    """
+    s = remove_comments(s)
+    res = []
+    i = 0
+    while True:
+        m = _tokens.search(s, i)
+        if m is None:
+            break
+        i = m.end()
+        if m.group('string') is not None:
+            continue
+        r = _reference.match(s, i)
+        if r is None:
+            return None
+        i = r.end()
+        if r.group('pname') is not None:
+            ref = LoadReference(libname=None, name=r.group('pname'))
+        else:
+            ref = LoadReference(libname=r.group('libname'), name=r.group('name'))
+        if not ref in res:
+            res.append(ref)
+    return res
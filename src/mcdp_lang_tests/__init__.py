@@ -79,3 +79,7 @@ from .constants import *
 from .syntax_new_uncertainty import *
 
 from .syntax_sum import *
+from .parse_incremental_tests import *
+from .parse_where_end_tests import *
+from .scan_loads_tests import *
+from .parse_compiled_tests import *
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import os
+
+from comptests.registrar import comptest
+from contracts.utils import raise_desc
+from mcdp import MCDPConstants
+from mcdp.exceptions import DPSyntaxError
+from mcdp_lang import parse_actions
+from mcdp_lang.namedtuple_tricks import remove_where_info
+from mcdp_lang.parse_actions import parse_wrap, remove_comments
+from mcdp_lang.parse_compiled import parse_string_compiled
+from mcdp_lang.syntax import Syntax
+from mcdp_utils_misc import dir_from_package_name, locate_files
+from nose.tools import assert_equal
+
+from .parse_incremental_tests import get_wheres
+
+
+def parse_wrap_with(compiled, expr, s):
+    """ parse_wrap() with or without the compiled grammar. """
+    previous = MCDPConstants.parse_with_compiled_grammar
+    MCDPConstants.parse_with_compiled_grammar = compiled
+    try:
+        parse_actions._parse_wrap_cache.clear()
+        return parse_wrap(expr, s)[0]
+    finally:
+        MCDPConstants.parse_with_compiled_grammar = previous
+        parse_actions._parse_wrap_cache.clear()
+
+
+@comptest
+def check_parse_compiled():
+    """ The compiled grammar gives the same trees and Where as pyparsing. """
+    folder = os.path.join(dir_from_package_name('mcdp_lang_tests'), 'ok')
+    expr = Syntax.ndpt_dp_rvalue
+    filenames = sorted(locate_files(folder, '*.mcdp'))
+    assert filenames
+    for f in filenames:
+        with open(f) as fi:
+            contents = fi.read()
+        # pyparsing is not used as a fallback
+        if parse_string_compiled(expr, remove_comments(contents)) is None:
+            msg = 'The compiled grammar cannot parse this file.'
+            raise_desc(Exception, msg, f=f)
+        expected = parse_wrap_with(False, expr, contents)
+        found = parse_wrap_with(True, expr, contents)
+        assert_equal(remove_where_info(found), remove_where_info(expected))
+        assert_equal(get_wheres(found), get_wheres(expected))
+
+
+@comptest
+def check_parse_compiled_errors():
+    """ The syntax errors are the ones given by pyparsing. """
+    s = 'mcdp {\n  provides f [m]\n  requires r [m\n  r >= f\n}'
+    errors = []
+    for compiled in [False, True]:
+        try:
+            parse_wrap_with(compiled, Syntax.ndpt_dp_rvalue, s)
+        except DPSyntaxError as e:
+            errors.append((str(e), e.where.character))
+        else:
+            raise Exception('Expected a DPSyntaxError.')
+    assert_equal(errors[0], errors[1])
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from comptests.registrar import comptest
+from mcdp_lang.namedtuple_tricks import remove_where_info
+from mcdp_lang.parse_actions import parse_wrap
+from mcdp_lang.parse_incremental import (StatementParseCache,
+    parse_wrap_incremental)
+from mcdp_lang.refinement import namedtuple_visitor_ext
+from mcdp_lang.syntax import Syntax
+from nose.tools import assert_equal
+
+
+def get_wheres(x):
+    """ Returns the list of (type, character, character_end) of the nodes. """
+    res = []
+    def transform(x, parents):  # @UnusedVariable
+        res.append((type(x).__name__, x.where.character, x.where.character_end))
+        return x
+    namedtuple_visitor_ext(x, transform)
+    return res
+
+
+def assert_same_parse(s, cache):
+    expected = parse_wrap(Syntax.ndpt_dp_rvalue, s)[0]
+    found = parse_wrap_incremental(Syntax.ndpt_dp_rvalue, s, cache)[0]
+    assert_equal(remove_where_info(found), remove_where_info(expected))
+    assert_equal(get_wheres(found), get_wheres(expected))
+    assert found.where.string is s
+
+
+@comptest
+def check_parse_incremental():
+    s1 = """mcdp {
+    provides f [m]
+    requires r [m]
+
+    a = instance mcdp {
+        provides f [m]
+        requires r [m]
+        r >= f
+    }
+
+    r >= a.r + 1 m
+    f <= a.f
+}"""
+    cache = StatementParseCache()
+    assert_same_parse(s1, cache)
+    assert_equal(cache.misses, 5)
+
+    # only the edited statement is parsed again
+    s2 = s1.replace('1 m', '2 m')
+    assert_same_parse(s2, cache)
+    assert_equal(cache.misses, 6)
+
+    # the statements can move
+    s3 = s2.replace('requires r [m]\n\n', 'requires r [m]\n    g = 2 m\n\n', 1)
+    assert_same_parse(s3, cache)
+    assert_equal(cache.misses, 7)
+
+
+@comptest
+def check_parse_incremental_fallback():
+    cache = StatementParseCache()
+    # on the same line: parsed as a whole
+    assert_same_parse("mcdp { provides f [m] }", cache)
+    assert_same_parse("mcdp {\n}", cache)
+    assert_equal(cache.misses, 0)
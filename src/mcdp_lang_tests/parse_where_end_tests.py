@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import os
+
+from comptests.registrar import comptest
+from mcdp import MCDPConstants
+from mcdp_lang import parse_actions
+from mcdp_lang.namedtuple_tricks import remove_where_info
+from mcdp_lang.parse_actions import parse_wrap
+from mcdp_lang.syntax import Syntax
+from mcdp_utils_misc import dir_from_package_name, locate_files
+from nose.tools import assert_equal
+
+
+def get_parsable_examples():
+    folder = os.path.join(dir_from_package_name('mcdp_lang_tests'), 'ok')
+    for f in sorted(locate_files(folder, '*.mcdp')):
+        with open(f) as fi:
+            contents = fi.read()
+        line1 = contents.split('\n')[0]
+        if 'connected' in line1:
+            yield f, contents
+
+
+@comptest
+def check_parse_where_end():
+    """ The end of the matches given by the parser is the same
+        that we get by parsing again with tryParse(). """
+    MCDPConstants.parse_where_end_with_tryparse = True
+    try:
+        parse_actions._parse_wrap_cache.clear()
+        n = 0
+        for _, contents in get_parsable_examples():
+            parse_wrap(Syntax.ndpt_dp_rvalue, contents)
+            n += 1
+        assert n > 0
+    finally:
+        MCDPConstants.parse_where_end_with_tryparse = False
+
+
+@comptest
+def check_parse_wrap_cache():
+    s = 'mcdp {\n  provides f [m]\n  requires r [m]\n  r >= f\n}'
+    a = parse_wrap(Syntax.ndpt_dp_rvalue, s)[0]
+    b = parse_wrap(Syntax.ndpt_dp_rvalue, s)[0]
+    assert a is b
+    # an equal string: the Where refer to it
+    s2 = ''.join(list(s))
+    assert s2 is not s
+    c = parse_wrap(Syntax.ndpt_dp_rvalue, s2)[0]
+    assert c.where.string is s2
+    assert_equal(remove_where_info(c), remove_where_info(a))
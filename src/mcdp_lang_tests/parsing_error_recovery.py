@@ -153,6 +153,19 @@ a
         assert c == c2, (c, line, col, c2)
 
 
+@comptest
+def parsing_error_recov09b():
+    """ The line index is shared by the Where objects of a string. """
+    from mcdp_lang_utils import Where, get_line_index
+    s = "mcdp {\n  provides f [Nat]\n}\n"
+    assert get_line_index(s) is get_line_index(s)
+    assert get_line_index(s).nlines == 4
+    w = Where(s, s.index('f'), s.index('f') + 1)
+    assert (w.line, w.col, w.line_end, w.col_end) == (1, 11, 1, 12)
+    w = Where(s, len(s))
+    assert (w.line, w.col, w.line_end, w.col_end) == (3, 0, None, None)
+
+
 @comptest_fails
 def parsing_error_recov10():
 #     
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from comptests.registrar import comptest
+from mcdp.exceptions import DPSyntaxError
+from mcdp_lang.namedtuple_tricks import isnamedtupleinstance
+from mcdp_lang.parse_actions import parse_wrap
+from mcdp_lang.parts import CDPLanguage
+from mcdp_lang.scan_loads import LoadReference, scan_load_references
+from mcdp_lang.syntax import Syntax
+from mcdp_utils_misc import dir_from_package_name, locate_files
+from nose.tools import assert_equal
+
+
+CDP = CDPLanguage
+
+
+@comptest
+def check_scan_loads1():
+    s = """
+    mcdp {
+        "A docstring that says `this and load that."
+        a = instance `Battery # a comment with `other
+        b = instance load lib2.Motor
+        c = instance load (Chassis)
+        provides x [`unit]
+        provides y [` lib2 . unit : element]
+        requires z [`unit]
+    }
+    """
+    expected = [LoadReference(None, 'Battery'),
+                LoadReference('lib2', 'Motor'),
+                LoadReference(None, 'Chassis'),
+                LoadReference(None, 'unit'),
+                LoadReference('lib2', 'unit')]
+    assert_equal(scan_load_references(s), expected)
+    assert_equal(scan_load_references('mcdp {}'), [])
+
+
+@comptest
+def check_scan_loads_gives_up():
+    # the parser is needed
+    assert_equal(scan_load_references('mcdp { a = instance load "Battery" }'), None)
+    assert_equal(scan_load_references('mcdp { a = instance `a.b.c }'), None)
+    assert_equal(scan_load_references('mcdp { a = instance ` }'), None)
+
+
+def get_loads_from_parse(x):
+    """ The references in the parse tree x. """
+    res = set()
+
+    def visit(x):
+        if not isnamedtupleinstance(x):
+            return
+        if isinstance(x, CDP.LoadDP):
+            res.add(LoadReference(None, x.name.value))
+        if isinstance(x, (CDP.LoadNDP, CDP.LoadPoset, CDP.LoadTemplate)):
+            arg = x.load_arg
+            if hasattr(arg, 'library'):
+                res.add(LoadReference(arg.library.value, arg.name.value))
+            else:
+                res.add(LoadReference(None, arg.value))
+        for v in x._asdict().values():
+            visit(v)
+
+    visit(x)
+    return res
+
+
+@comptest
+def check_scan_loads_agrees_with_parser():
+    folder = dir_from_package_name('mcdp_data')
+    n = 0
+    for f in sorted(locate_files(folder, '*.mcdp')):
+        with open(f) as fi:
+            contents = fi.read()
+        refs = scan_load_references(contents)
+        if not refs:
+            continue
+        try:
+            x = parse_wrap(Syntax.ndpt_dp_rvalue, contents)[0]
+        except DPSyntaxError:
+            continue
+        assert_equal(set(refs), get_loads_from_parse(x), f)
+        n += 1
+        if n >= 50:
+            break
+    assert n > 0
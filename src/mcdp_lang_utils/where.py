@@ -35,8 +35,6 @@ class Where(object):
             #             character += 1
             #         else:
             #             break
-        self.line, self.col = line_and_col(character, string)
-
         if character_end is not None:
             if not (0 <= character_end <= len(string)):
                 msg = ('Invalid character_end loc %s for string of len %s.'%
@@ -48,15 +46,33 @@ class Where(object):
                 msg = 'Invalid interval [%d:%d]' % (character, character_end)
                 raise ValueError(msg)
 
-            self.line_end, self.col_end = line_and_col(character_end, string)
-        else:
-            self.line_end, self.col_end = None, None
-
         self.string = string
         self.character = character
         self.character_end = character_end
         self.filename = None
 
+    # line and col are computed only when needed
+
+    @property
+    def line(self):
+        return line_and_col(self.character, self.string)[0]
+
+    @property
+    def col(self):
+        return line_and_col(self.character, self.string)[1]
+
+    @property
+    def line_end(self):
+        if self.character_end is None:
+            return None
+        return line_and_col(self.character_end, self.string)[0]
+
+    @property
+    def col_end(self):
+        if self.character_end is None:
+            return None
+        return line_and_col(self.character_end, self.string)[1]
+
     def get_substring(self):
         """ Returns the substring to which we refer. Raises error if character_end is None """
         if self.character_end is None:
@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
+import bisect
+from collections import OrderedDict
+import re
 import sys
+import threading
 
 from contracts.utils import check_isinstance
-from contracts.utils import raise_desc
+from mcdp import MCDPConstants
 
 
 def printable_length_where(w):
@@ -17,56 +21,72 @@ def printable_length_where(w):
 
 def line_and_col(loc, strg):
     """Returns (line, col), both 0 based."""
-    
     check_isinstance(loc, int)
     check_isinstance(strg, str)
-    # first find the line 
-    lines = strg.split('\n')
-    
-    if loc == len(strg):
-        # Special case: we mark the end of the string
-        last_line = len(lines) - 1
-        last_char = len(lines[-1]) 
-        return last_line, last_char  
-        
-    if loc > len(strg):
-        msg = ('Invalid loc = %d for s of len %d (%r)' % 
-                         (loc, len(strg), strg))
-        raise ValueError(msg)
-    
-    res_line = 0
-    l = loc
-    while True:
-        if not lines:
-            assert loc == 0, (loc, strg.__repr__())
-            break
-
-        first = lines[0]
-        if l >= len(first) + len('\n'):
-            lines = lines[1:]
-            l -= (len(first) + len('\n'))
-            res_line += 1
-        else:
-            break
-    res_col = l
-    inverse = location(res_line, res_col, strg)
-    if inverse != loc:
-        msg = 'Could not find line and col'
-        
-        raise_desc(AssertionError, msg, s=strg, loc=loc, res_line=res_line,
-                   res_col=res_col, loc_recon=inverse)
-        
-    return (res_line, res_col)
+    return get_line_index(strg).line_and_col(loc)
+
 
 def location(line, col, s):
     check_isinstance(line, int)
     check_isinstance(col, int)
     check_isinstance(s, str)
-    
-    lines = s.split('\n')
-    previous_lines = sum(len(l) + len('\n') for l in lines[:line])
-    offset = col
-    return previous_lines + offset
+    return get_line_index(s).location(line, col)
+
+
+class LineIndex(object):
+    """
+        The offsets at which the lines of a string start, so that
+        line_and_col() and location() take O(log L) instead of
+        splitting the string each time.
+    """
+
+    def __init__(self, s):
+        self.length = len(s)
+        # starts[i] = offset of the first character of line i
+        self.starts = [0] + [m.end() for m in re.finditer('\n', s)]
+
+    @property
+    def nlines(self):
+        return len(self.starts)
+
+    def line_and_col(self, loc):
+        """Returns (line, col), both 0 based."""
+        if not (0 <= loc <= self.length):
+            msg = ('Invalid loc = %d for s of len %d' % (loc, self.length))
+            raise ValueError(msg)
+        # a newline belongs to the line that it ends
+        line = bisect.bisect_right(self.starts, loc) - 1
+        return line, loc - self.starts[line]
+
+    def location(self, line, col):
+        """ Inverse of line_and_col(). """
+        if line < len(self.starts):
+            previous_lines = self.starts[line]
+        else:
+            previous_lines = self.length + len('\n')
+        return previous_lines + col
+
+
+# string -> LineIndex, for the most recently used strings
+_line_indices = OrderedDict()
+_line_indices_lock = threading.Lock()
+
+
+def get_line_index(s):
+    """ Returns the LineIndex for s; it is computed once and shared 
+        by all the Where objects that refer to the same string. """
+    with _line_indices_lock:
+        index = _line_indices.pop(s, None)
+        if index is not None:
+            _line_indices[s] = index
+            return index
+
+    index = LineIndex(s)
+    with _line_indices_lock:
+        _line_indices[s] = index
+        while len(_line_indices) > MCDPConstants.line_index_cache_size:
+            _line_indices.popitem(last=False)
+    return index
 
 def add_prefix(s, prefix):
     result = ""
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import threading
+
+from mcdp import logger, MCDPConstants
+from mcdp_utils_misc import safe_pickle_dump, safe_pickle_load, safe_write
+
+
+__all__ = [
+    'source_hash',
+    'recording_dependencies',
+    'record_dependencies',
+    'compile_cache_get',
+    'compile_cache_set',
+]
+
+"""
+    A content-addressed cache for the results of parsing the
+    library files.
+
+    The result of loading a file depends on its source and on the
+    sources of all the files it loads, transitively. These are
+    recorded as "dependencies", a list of dicts:
+
+        dict(basename=..., realpath=..., hash=...)
+
+    where the first one is the file itself. The result is stored in
+
+        <dirname>/<key>.cached
+
+    where key is the hash of the dependencies, and a small JSON index
+
+        <dirname>/<name>.index
+
+    remembers the key and the dependencies, so that the validity can be
+    checked by comparing the hashes with the current sources, without
+    unpickling the result.
+"""
+
+
+def source_hash(data):
+    """ The hash of the contents of a file. """
+    if isinstance(data, unicode):
+        data = data.encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+_recorders = threading.local()
+
+
+@contextmanager
+def recording_dependencies():
+    """
+        Yields a list to which the dependencies loaded in the
+        context are appended:
+
+            with recording_dependencies() as deps:
+                ...
+    """
+    stack = _recorders.__dict__.setdefault('stack', [])
+    deps = []
+    stack.append(deps)
+    try:
+        yield deps
+    finally:
+        stack.pop()
+
+
+def record_dependencies(deps):
+    """ Adds deps to the dependencies being recorded (if any). """
+    stack = _recorders.__dict__.get('stack', None)
+    if stack:
+        recorder = stack[-1]
+        for d in deps:
+            if not d in recorder:
+                recorder.append(d)
+
+
+def _compile_cache_key(generation, deps):
+    s = json.dumps([generation, deps], sort_keys=True)
+    return hashlib.sha1(s).hexdigest()
+
+
+def compile_cache_get(dirname, name, generation, get_hash):
+    """
+        Returns (result, deps) for the cached result of loading name,
+        or None if it is not cached or is stale.
+
+        get_hash(dep) returns the hash of the current source of
+        the dependency, or None if it is not available.
+    """
+    index_file = os.path.join(dirname, '%s.index' % name)
+    if not os.path.exists(index_file):
+        return None
+    try:
+        with open(index_file) as f:
+            index = json.load(f)
+        key = index['key']
+        deps = _as_str(index['deps'])
+    except Exception as e:
+        logger.error('Invalid cache index %r: %s' % (index_file, e))
+        return None
+
+    if key != _compile_cache_key(generation, deps):
+        return None
+    for dep in deps:
+        if get_hash(dep) != dep['hash']:
+            return None
+
+    cache_file = os.path.join(dirname, '%s.cached' % key)
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        result = safe_pickle_load(cache_file)
+    except Exception as e:
+        logger.error('Cannot read cache %r: %s' % (cache_file, e))
+        return None
+    return result, deps
+
+
+def compile_cache_set(dirname, name, generation, deps, result):
+    key = _compile_cache_key(generation, deps)
+    cache_file = os.path.join(dirname, '%s.cached' % key)
+    index_file = os.path.join(dirname, '%s.index' % name)
+    if MCDPConstants.log_cache_writes:
+        logger.info('Writing to cache %s.' % cache_file)
+    if not os.path.exists(cache_file):
+        safe_pickle_dump(result, cache_file)
+    previous = _read_key(index_file)
+    with safe_write(index_file, mode='w') as f:
+        json.dump(dict(key=key, deps=deps), f)
+    if previous is not None and previous != key:
+        # the previous version is stale
+        try:
+            os.unlink(os.path.join(dirname, '%s.cached' % previous))
+        except OSError:
+            pass
+
+
+def _read_key(index_file):
+    try:
+        with open(index_file) as f:
+            return _as_str(json.load(f)['key'])
+    except Exception:
+        return None
+
+
+def _as_str(x):
+    """ json gives back unicode strings. """
+    if isinstance(x, unicode):
+        return x.encode('utf-8')
+    if isinstance(x, list):
+        return [_as_str(_) for _ in x]
+    if isinstance(x, dict):
+        return dict((_as_str(k), _as_str(v)) for k, v in x.items())
+    return x
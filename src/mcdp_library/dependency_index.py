@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import threading
+
+from mcdp import logger
+from mcdp_utils_misc import safe_write
+
+from .compile_cache import _as_str
+
+
+__all__ = [
+    'DependencyIndex',
+]
+
+"""
+    The references to other things in the files of one library,
+    remembered by the hash of each file, so that they are found again
+    without parsing as long as the file does not change.
+
+    A reference is a tuple (extension, library name, thing name), for
+    example ('mcdp_poset', 'lib1', 'unit'). The extension is None if
+    the source does not say what the thing is (e.g. "`unit"): that
+    depends on the files in the library, so it is decided again each
+    time; only the reference is indexed.
+
+    The index is stored as JSON:
+
+        {"<basename>": {"hash": "<source_hash()>",
+                        "refs": [["<ext>" or null, "<libname>", "<name>"], ...]}}
+"""
+
+
+class DependencyIndex(object):
+    """
+        The references in the files of a library.
+
+            index = DependencyIndex(filename)
+            refs = index.lookup('model1.mcdp', source_hash(data))
+            if refs is None:
+                refs = ... # compute them
+                index.update('model1.mcdp', source_hash(data), refs)
+            index.save()
+
+            index.get_dependents('mcdp_poset', 'lib1', 'unit')
+
+        If filename is None, the index is kept only in memory.
+    """
+
+    def __init__(self, filename=None):
+        self.filename = filename
+        # basename -> dict(hash=..., refs=list of tuples)
+        self.entries = {}
+        self.changed = False
+        self._lock = threading.Lock()
+        if filename is not None and os.path.exists(filename):
+            self._load()
+
+    def __getstate__(self):
+        d = dict(**self.__dict__)
+        del d['_lock']
+        return d
+
+    def __setstate__(self, x):
+        self.__dict__.update(x)
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.filename) as f:
+                entries = _as_str(json.load(f))
+            for basename, entry in list(entries.items()):
+                if not 'refs' in entry:
+                    # written by an older version, with the references
+                    # already resolved using the files of that time
+                    del entries[basename]
+                    continue
+                entry['refs'] = [tuple(r) for r in entry['refs']]
+        except Exception as e:
+            logger.error('Invalid dependency index %r: %s' % (self.filename, e))
+            return
+        self.entries = entries
+
+    def lookup(self, basename, h):
+        """ Returns the list of references in basename, or None if
+            they are not known for the contents with hash h. """
+        with self._lock:
+            entry = self.entries.get(basename, None)
+        if entry is None or entry['hash'] != h:
+            return None
+        return list(entry['refs'])
+
+    def update(self, basename, h, refs):
+        refs = sorted(set(tuple(r) for r in refs))
+        with self._lock:
+            self.entries[basename] = dict(hash=h, refs=refs)
+            self.changed = True
+
+    def forget(self, basename):
+        with self._lock:
+            if self.entries.pop(basename, None) is not None:
+                self.changed = True
+
+    def get_dependents(self, ext, libname, name):
+        """ Returns the sorted list of the basenames that refer
+            directly to the thing (ext, libname, name), including
+            the references with extension None to (libname, name). """
+        refs = [(ext, libname, name), (None, libname, name)]
+        with self._lock:
+            return sorted(basename for basename, entry in self.entries.items()
+                          if any(r in entry['refs'] for r in refs))
+
+    def save(self):
+        """ Writes the index to the file, if it changed. """
+        if self.filename is None:
+            return
+        with self._lock:
+            if not self.changed:
+                return
+            entries = dict((basename, dict(hash=entry['hash'],
+                                           refs=[list(r) for r in entry['refs']]))
+                           for basename, entry in self.entries.items())
+            with safe_write(self.filename, mode='w') as f:
+                json.dump(entries, f, sort_keys=True, indent=1)
+            self.changed = False
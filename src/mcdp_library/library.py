@@ -8,8 +8,11 @@ from mcdp import logger, MCDPConstants
 from mcdp.exceptions import DPSemanticError, MCDPExceptionWithWhere,\
     DPInternalError
 from mcdp_lang import parse_ndp, parse_poset
-from mcdp_utils_misc import assert_good_plain_identifier, format_list, get_mcdp_tmp_dir, memo_disk_cache2, locate_files
+from mcdp_utils_misc import assert_good_plain_identifier, format_list, get_mcdp_tmp_dir, locate_files
 from mocdp.comp.context import Context
+
+from .compile_cache import (compile_cache_get, compile_cache_set,
+    record_dependencies, recording_dependencies, source_hash)
 import os
 import shutil
 import sys
@@ -157,7 +160,26 @@ class MCDPLibrary(object):
         f = self._get_file_data(filename)
         data = f['data']
         realpath = f['realpath']
-        return dict(data=data, realpath=realpath)
+        return dict(data=data, realpath=realpath, basename=filename)
+
+    def _get_dependency_hash(self, dep):
+        """
+            Returns the hash of the current contents of the dependency
+            recorded by _load_generic(), or None if the file is gone.
+
+            The files of this library are looked up in memory;
+            the others are read from disk.
+        """
+        basename = dep['basename']
+        realpath = dep['realpath']
+        if self.file_exists(basename):
+            f = self._get_file_data(basename)
+            if f['realpath'] == realpath:
+                return source_hash(f['data'])
+        if realpath is not None and os.path.exists(realpath):
+            with open(realpath) as f:
+                return source_hash(f.read())
+        return None
         
     @contract(name=str)
     def _load_generic(self, name, spec_name, parsing_function, context):
@@ -188,26 +210,31 @@ class MCDPLibrary(object):
                         context_warnings=context_mine.warnings,
                         generation=current_generation)
 
+        own = dict(basename=x['basename'], realpath=realpath,
+                   hash=source_hash(data))
+
         if not self.cache_dir:
-            res_data = actual_load()
+            with recording_dependencies() as deps:
+                res_data = actual_load()
             cached = False
         else:
-            cache_file = os.path.join(self.cache_dir, parsing_function.__name__,
-                                      '%s.cached' % name)
-
-            res_data = memo_disk_cache2(cache_file, data, actual_load)
-            cached = True
-            
-            if not isinstance(res_data, dict) or not 'generation' in res_data \
-                or res_data['generation'] < current_generation: # outdated cache
-                logger.debug('Removing stale cache %r.' % cache_file)
-                res_data = actual_load()
-                try: 
-                    os.unlink(cache_file)
-                except Exception:
-                    pass
+            dirname = os.path.join(self.cache_dir, parsing_function.__name__)
+            found = compile_cache_get(dirname, name, current_generation,
+                                      self._get_dependency_hash)
+            if found is not None:
+                res_data, deps = found
+                deps = deps[1:]
+                cached = True
+            else:
+                with recording_dependencies() as deps:
+                    res_data = actual_load()
+                compile_cache_set(dirname, name, current_generation,
+                                  [own] + deps, res_data)
                 cached = False
-        
+
+        # the files that loaded this one also depend on these
+        record_dependencies([own] + deps)
+
         res = res_data['res']
         context_warnings = res_data['context_warnings']
 
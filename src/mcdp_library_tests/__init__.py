@@ -1,3 +1,5 @@
 # -*- coding: utf-8 -*-
 from .tests import *
 from .semantics_import import *
+from .compile_cache import *
+from .dependency_index import *
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import os
+
+from comptests import comptest
+from mcdp_library import Librarian
+from mcdp_utils_misc import get_mcdp_tmp_dir
+from mcdp_utils_misc.create_mockups import create_hierarchy
+from nose.tools import assert_equal
+
+
+@comptest
+def check_compile_cache_dependencies():
+    data = {
+        'lib1.mcdplib/unit.mcdp_poset': "g",
+        'lib1.mcdplib/model1.mcdp': "mcdp { provides x [`unit] }",
+        'lib2.mcdplib/model2.mcdp': """\
+        mcdp {
+            a = instance `lib1.model1
+            provides x using a
+        }
+        """
+    }
+    d = create_hierarchy(data)
+    import tempfile
+    cache_dir = tempfile.mkdtemp(dir=get_mcdp_tmp_dir(), prefix='compile_cache')
+
+    def load():
+        librarian = Librarian()
+        librarian.find_libraries(d)
+        lib2 = librarian.load_library('lib2')
+        lib2.use_cache_dir(cache_dir)
+        ndp = lib2.load_ndp('model2')
+        return str(ndp.get_ftype('x'))
+
+    assert_equal(load(), 'R[g]')
+    index = os.path.join(cache_dir, 'parse_ndp', 'model2.index')
+    assert os.path.exists(index)
+    # loaded from the cache
+    assert_equal(load(), 'R[g]')
+
+    # change a file loaded by a file loaded by model2
+    fn = os.path.join(d, 'lib1.mcdplib', 'unit.mcdp_poset')
+    with open(fn, 'w') as f:
+        f.write('kg')
+    assert_equal(load(), 'R[kg]')
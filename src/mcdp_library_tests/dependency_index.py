@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+
+from comptests import comptest
+from mcdp_depgraph.find_dep import EntryNDP, EntryTemplate, find_dependencies
+from mcdp_library.compile_cache import source_hash
+from mcdp_library.dependency_index import DependencyIndex
+from mcdp_utils_misc import get_mcdp_tmp_dir, write_data_to_file
+from nose.tools import assert_equal
+
+
+@comptest
+def check_dependency_index():
+    d = tempfile.mkdtemp(dir=get_mcdp_tmp_dir(), prefix='dependency_index')
+    filename = os.path.join(d, 'lib1.json')
+    h1 = source_hash("mcdp { provides x [`unit] }")
+    h2 = source_hash("mcdp { provides x [`lib2.unit] }")
+    unit = ('mcdp_poset', 'lib1', 'unit')
+
+    index = DependencyIndex(filename)
+    assert_equal(index.lookup('model1.mcdp', h1), None)
+    index.update('model1.mcdp', h1, [unit])
+    index.update('model2.mcdp', h1, [unit])
+    assert_equal(index.lookup('model1.mcdp', h1), [unit])
+    assert_equal(index.lookup('model1.mcdp', h2), None)
+    index.save()
+
+    # read again from the file
+    index = DependencyIndex(filename)
+    assert_equal(index.lookup('model1.mcdp', h1), [unit])
+    assert_equal(index.get_dependents(*unit), ['model1.mcdp', 'model2.mcdp'])
+
+    index.update('model1.mcdp', h2, [('mcdp_poset', 'lib2', 'unit')])
+    index.forget('model2.mcdp')
+    assert_equal(index.get_dependents(*unit), [])
+    assert_equal(index.get_dependents('mcdp_poset', 'lib2', 'unit'), ['model1.mcdp'])
+
+    # a reference whose type is decided by the files
+    index.update('model3.mcdp', h1, [(None, 'lib1', 'unit')])
+    index.save()
+    index = DependencyIndex(filename)
+    assert_equal(index.lookup('model3.mcdp', h1), [(None, 'lib1', 'unit')])
+    assert_equal(index.get_dependents(*unit), ['model3.mcdp'])
+
+    # the entries of older versions have the resolved references in 'deps'
+    old = {'model1.mcdp': {'hash': h1, 'deps': [list(unit)]}}
+    write_data_to_file(json.dumps(old), filename)
+    index = DependencyIndex(filename)
+    assert_equal(index.lookup('model1.mcdp', h1), None)
+
+
+@comptest
+def check_dependency_index_files_changed():
+    """ The references found by the scanner are resolved again with
+        the files in the library, which can change while the source
+        of the model does not. """
+    d = tempfile.mkdtemp(dir=get_mcdp_tmp_dir(), prefix='dependency_index')
+    libdir = os.path.join(d, 'lib1.mcdplib')
+    index_dir = os.path.join(d, 'index')
+    os.makedirs(libdir)
+    os.makedirs(index_dir)
+
+    def write(basename, data):
+        write_data_to_file(data, os.path.join(libdir, basename))
+
+    def get_deps():
+        res = find_dependencies(config_dirs=[d], maindir=libdir,
+                                seeds=['model1'], index_dir=index_dir)
+        deps = res['fd'].visited[EntryNDP(libname='lib1', name='model1')]
+        # Entry.__eq__ does not compare the types
+        return [(e.__class__, e.libname, e.name) for e in deps]
+
+    write('model1.mcdp', 'mcdp {\n  a = instance `sub\n}')
+    write('sub.mcdp', 'mcdp {\n}')
+    assert_equal(get_deps(), [(EntryNDP, 'lib1', 'sub')])
+
+    os.unlink(os.path.join(libdir, 'sub.mcdp'))
+    write('sub.mcdp_template', 'template []\nmcdp {\n}')
+    assert_equal(get_deps(), [(EntryTemplate, 'lib1', 'sub')])
@@ -5,6 +5,9 @@ from mcdp_maps.repr_map import repr_map_product
 from mcdp_posets import Map, PosetProduct, RcompUnits, Nat, Rcomp
 from mcdp_posets.nat import Nat_mult_uppersets_continuous_seq
 from mcdp_posets.rcomp import Rcomp_multiply_upper_topology_seq
+import numpy as np
+
+from .SumN_xxx_Map import rcomp_columns, rcomp_from_column
 
 
 __all__ = [
@@ -28,6 +31,25 @@ class ProductNMap(Map):
     def _call(self, f):
         return Rcomp_multiply_upper_topology_seq(self.F.subs, f, self.R)
 
+    def call_many(self, fs):
+        """ Same as Rcomp_multiply_upper_topology_seq(), for all
+            the points at once: 0 * Top = 0 and x * Top = Top. """
+        values, tops = rcomp_columns(self.F.subs, fs)
+        res = values[:, 0]
+        res_top = tops[:, 0]
+        with np.errstate(over='ignore', under='ignore', invalid='ignore'):
+            for i in range(1, values.shape[1]):
+                b = values[:, i]
+                b_top = tops[:, i]
+                res_zero = ~res_top & (res == 0.0)
+                b_zero = ~b_top & (b == 0.0)
+                zero = (b_top & res_zero) | (res_top & b_zero)
+                res_top = (b_top | res_top) & ~zero
+                res = np.where(res_top | zero, 0.0, res * b)
+                # overflow
+                res_top = res_top | np.isinf(res)
+        return rcomp_from_column(self.R, res, res_top)
+
     def repr_map(self, letter):
         return repr_map_product(letter, len(self.F))
 
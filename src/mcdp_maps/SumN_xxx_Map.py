@@ -41,6 +41,16 @@ class SumNMap(Map):
     def _call(self, x):
         res = sum_units(self.Fs, x, self.R)
         return res
+
+    def call_many(self, xs):
+        factors = [sum_units_factor(Fi, self.R) for Fi in self.Fs]
+        values, tops = rcomp_columns(self.Fs, xs)
+        res = np.zeros(len(xs))
+        with np.errstate(over='ignore', invalid='ignore'):
+            # same order of operations as sum_units()
+            for i, factor in enumerate(factors):
+                res = res + factor * values[:, i]
+        return rcomp_from_column(self.R, res, np.any(tops, axis=1))
     
     def __repr__(self):
         return 'SumNMap(%s → %s)' % (self.dom, self.cod)
@@ -63,6 +73,15 @@ class SumNRcompMap(Map):
     def _call(self, x):
         return functools.reduce(rcomp_add, x)
 
+    def call_many(self, xs):
+        values, tops = rcomp_columns(self.dom.subs, xs)
+        res = values[:, 0]
+        with np.errstate(over='ignore', invalid='ignore'):
+            # same order of operations as reduce()
+            for i in range(1, self.n):
+                res = res + values[:, i]
+        return rcomp_from_column(self.cod, res, np.any(tops, axis=1))
+
     def __repr__(self):
         return 'SumNRcompMap(%s)' % self.n
     
@@ -84,6 +103,41 @@ def sum_dimensionality_works(Fs, R):
 
 from pint import DimensionalityError as pint_DimensionalityError  # @UnresolvedImport
 
+
+def rcomp_columns(Ps, xs):
+    """
+        Converts a sequence of tuples of values in the Rcomps Ps to
+        a n×k array of floats and a n×k boolean array marking the tops.
+        The tops have value 0 in the first array.
+    """
+    k = len(Ps)
+    tops = np.zeros((len(xs), k), dtype=bool)
+    values = np.zeros((len(xs), k))
+    for j, x in enumerate(xs):
+        for i, (Pi, xi) in enumerate(zip(Ps, x)):
+            if is_top(Pi, xi):
+                tops[j, i] = True
+            else:
+                values[j, i] = xi
+    return values, tops
+
+
+def rcomp_from_column(R, values, tops):
+    """ Inverse of rcomp_columns() for one column; infinite values
+        are mapped to the top of R. """
+    top = R.get_top()
+    tops = tops | np.isinf(values)
+    return [top if t else v for v, t in zip(values.tolist(), tops.tolist())]
+
+
+def sum_units_factor(Fi, R):
+    """ The factor to convert a value in Fi to R. """
+    try:
+        return 1.0 / float(R.units / Fi.units)
+    except pint_DimensionalityError as e:  # pragma: no cover (DimensionalityError)
+        raise_wrapped(IncompatibleUnits, e, 'Pint cannot convert', Fi=Fi, R=R)
+
+
 # Fs: sequence of Rcompunits
 class IncompatibleUnits(BaseException):
     pass
@@ -97,10 +151,7 @@ def sum_units(Fs, values, R):
             return R.get_top()
 
         # reasonably sure this is correct...
-        try:
-            factor = 1.0 / float(R.units / Fi.units)
-        except pint_DimensionalityError as e:  # pragma: no cover (DimensionalityError)
-            raise_wrapped(IncompatibleUnits, e, 'Pint cannot convert', Fs=Fs, R=R)
+        factor = sum_units_factor(Fi, R)
         try:
             res += factor * x
         except FloatingPointError as e:
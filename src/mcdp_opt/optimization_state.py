@@ -6,7 +6,7 @@ from mcdp_lang.blocks import get_missing_connections
 from mcdp_posets import UpperSet, UpperSets
 from mcdp_posets import get_types_universe
 from mocdp.comp.composite import CompositeNamedDP
-from mocdp.comp.context import CResource, Connection
+from mocdp.comp.context import CResource
 from mcdp.development import do_extra_checks
 from mcdp_utils_misc.memoize_simple_imp import memoize_simple
 
@@ -222,24 +222,16 @@ def would_introduce_cycle(context, f, r):
     if f.dp == r.dp:
         return True
     from mocdp.comp.connection import get_connection_multigraph
-    from networkx.algorithms.cycles import simple_cycles
-
-    connections1 = list(context.connections)
-    con = Connection(r.dp, r.s, f.dp, f.s)
-    connections2 = connections1 + [con]
-    
-    G1 = get_connection_multigraph(connections1)
-    G2 = get_connection_multigraph(connections2)
-    cycles1 = list(simple_cycles(G1))
-    cycles2 = list(simple_cycles(G2))
-    c1 = len(cycles1)
-    c2 = len(cycles2)
-#     if c1 != c2:
-#         print G2.edges()
-#         print('c1: %s' % cycles1)
-#         print('c2: %s' % cycles2)
-
-    return c1 != c2
+    from networkx import has_path
+
+    G = get_connection_multigraph(list(context.connections))
+    if G.has_edge(r.dp, f.dp):
+        # the same cycles as before
+        return False
+    if not f.dp in G or not r.dp in G:
+        return False
+    # the new edge r.dp -> f.dp closes a cycle iff f.dp reaches r.dp
+    return has_path(G, f.dp, r.dp)
 
 
 
@@ -7,6 +7,7 @@ from .rcomp_units import *
 from .interval import *
 from .poset_product import *
 from .uppersets import *
+from .antichain_array import *
 from .single import *
 from .utils import *
 from .space_product import *
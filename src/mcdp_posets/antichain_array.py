@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+from contracts import contract
+from contracts.utils import raise_desc
+from mcdp import MCDPConstants
+from mcdp.development import do_extra_checks
+import numpy as np
+
+from .poset_product import PosetProduct
+from .rcomp import Rbicomp, Rcomp, RcompBase
+from .uppersets import LowerSet, UpperSet
+
+
+__all__ = [
+    'UpperSetArray',
+    'LowerSetArray',
+    'is_array_poset',
+    'points_to_array',
+    'array_to_points',
+    'array_minima',
+    'array_maxima',
+    'array_dominated',
+    'array_minkowski_sum',
+    'array_project',
+    'upperset_as_array',
+    'lowerset_as_array',
+    'make_upperset_array',
+    'make_lowerset_array',
+]
+
+"""
+    Antichains on a product of Rcomp (or Rbicomp) represented as the
+    rows of a n×k float64 matrix. The top of each component is
+    represented as +inf and the bottom of Rbicomp as -inf.
+
+    All the operations below are batched NumPy operations; the
+    comparisons are done in blocks of rows to bound memory.
+"""
+
+# number of rows compared at once
+_block = 256
+
+
+def is_array_poset(P):
+    """ True if P is a product of Rcomp/Rbicomp, for which we can use
+        the array representation. """
+    if not isinstance(P, PosetProduct) or not P.subs:
+        return False
+    # with tolerance, leq is not the order of the floats
+    if Rcomp.tolerate_numerical_errors:
+        return False
+    for sub in P.subs:
+        if not isinstance(sub, (RcompBase, Rbicomp)):
+            return False
+    return True
+
+
+def _check_array_poset(P):
+    if not is_array_poset(P):
+        msg = 'The array representation needs a product of Rcomp.'
+        raise_desc(ValueError, msg, P=P)
+
+
+@contract(P=PosetProduct, returns='array[Nx*](float64)')
+def points_to_array(P, points):
+    """ Converts a collection of points of P to a n×k array. """
+    k = len(P.subs)
+    tops = [sub.get_top() for sub in P.subs]
+    bottoms = [sub.get_bottom() if isinstance(sub, Rbicomp) else None
+               for sub in P.subs]
+    rows = []
+    for p in points:
+        row = []
+        for x, top, bottom in zip(p, tops, bottoms):
+            if x == top:
+                row.append(np.inf)
+            elif bottom is not None and x == bottom:
+                row.append(-np.inf)
+            else:
+                row.append(x)
+        rows.append(row)
+    if not rows:
+        return np.zeros((0, k), dtype='float64')
+    return np.array(rows, dtype='float64')
+
+
+@contract(P=PosetProduct, a='array[Nx*](float64)', returns='list(tuple)')
+def array_to_points(P, a):
+    """ Converts a n×k array to a list of points of P. """
+    tops = [sub.get_top() for sub in P.subs]
+    bottoms = [sub.get_bottom() if isinstance(sub, Rbicomp) else None
+               for sub in P.subs]
+    res = []
+    for row in a.tolist():
+        p = []
+        for x, top, bottom in zip(row, tops, bottoms):
+            if x == np.inf:
+                p.append(top)
+            elif x == -np.inf:
+                p.append(bottom)
+            else:
+                p.append(x)
+        res.append(tuple(p))
+    return res
+
+
+def _unique_rows(a):
+    if a.shape[0] <= 1:
+        return a
+    return np.unique(a, axis=0)
+
+
+@contract(a='array[Nx*](float64)', returns='array[Mx*](float64)')
+def array_minima(a):
+    """ Returns the rows of a that are minimal in the product order
+        (without duplicates, sorted lexicographically). """
+    a = _unique_rows(a)
+    n = a.shape[0]
+    if n <= 1:
+        return a
+    dominated = np.zeros(n, dtype=bool)
+    for j0 in range(0, n, _block):
+        b = a[j0:j0 + _block]
+        # leq[i, j] = a[i] ≤ b[j]
+        leq = np.all(a[:, None, :] <= b[None, :, :], axis=2)
+        m = b.shape[0]
+        leq[np.arange(j0, j0 + m), np.arange(m)] = False
+        dominated[j0:j0 + m] = np.any(leq, axis=0)
+    return a[~dominated]
+
+
+@contract(a='array[Nx*](float64)', returns='array[Mx*](float64)')
+def array_maxima(a):
+    """ Returns the rows of a that are maximal in the product order. """
+    return -array_minima(-a)
+
+
+@contract(A='array[NxK](float64)', B='array[MxK](float64)',
+          returns='array[M](bool)')
+def array_dominated(A, B):
+    """ For each row b of B, whether there is a row a of A with a ≤ b. """
+    m = B.shape[0]
+    res = np.zeros(m, dtype=bool)
+    if A.shape[0] == 0:
+        return res
+    for j0 in range(0, m, _block):
+        b = B[j0:j0 + _block]
+        leq = np.all(A[:, None, :] <= b[None, :, :], axis=2)
+        res[j0:j0 + b.shape[0]] = np.any(leq, axis=0)
+    return res
+
+
+@contract(A='array[NxK](float64)', B='array[MxK](float64)',
+          returns='array[LxK](float64)')
+def array_minkowski_sum(A, B):
+    """ Minima of { a + b | a ∈ A, b ∈ B }. """
+    k = A.shape[1]
+    s = (A[:, None, :] + B[None, :, :]).reshape((-1, k))
+    if np.any(np.isnan(s)):
+        msg = 'Sum of top and bottom is not defined.'
+        raise_desc(ValueError, msg, A=A, B=B)
+    return array_minima(s)
+
+
+@contract(a='array[Nx*](float64)', indices='seq(int)',
+          returns='array[Mx*](float64)')
+def array_project(a, indices):
+    """ Minima of the projection on the given components. """
+    return array_minima(a[:, list(indices)])
+
+
+class UpperSetArray(UpperSet):
+    """
+        An upper set on a product of Rcomp, whose minimal elements are
+        stored as the rows of a n×k float64 array.
+
+        The attribute ``minimals`` is computed lazily, so this can be
+        used wherever an UpperSet is expected.
+    """
+
+    @contract(P=PosetProduct)
+    def __init__(self, array, P):
+        _check_array_poset(P)
+        k = len(P.subs)
+        self.array = np.asarray(array, dtype='float64').reshape((-1, k))
+        self.P = P
+        self._minimals = None
+
+        if do_extra_checks():
+            n0 = self.array.shape[0]
+            n1 = array_minima(self.array).shape[0]
+            if n0 != n1:
+                msg = 'The rows do not form an antichain.'
+                raise_desc(ValueError, msg, array=self.array)
+
+    @property
+    def minimals(self):
+        if self._minimals is None:
+            points = array_to_points(self.P, self.array)
+            self._minimals = frozenset(points)
+        return self._minimals
+
+    def belongs(self, x):
+        from .space import NotBelongs
+        self.P.belongs(x)
+        b = points_to_array(self.P, [x])
+        if not array_dominated(self.array, b)[0]:
+            msg = 'The point {} does not belong to this upperset.'.format(x)
+            raise_desc(NotBelongs, msg)
+
+
+class LowerSetArray(LowerSet):
+    """
+        A lower set on a product of Rcomp, whose maximal elements are
+        stored as the rows of a n×k float64 array.
+    """
+
+    @contract(P=PosetProduct)
+    def __init__(self, array, P):
+        _check_array_poset(P)
+        k = len(P.subs)
+        self.array = np.asarray(array, dtype='float64').reshape((-1, k))
+        self.P = P
+        self._maximals = None
+
+        if do_extra_checks():
+            n0 = self.array.shape[0]
+            n1 = array_maxima(self.array).shape[0]
+            if n0 != n1:
+                msg = 'The rows do not form an antichain.'
+                raise_desc(ValueError, msg, array=self.array)
+
+    @property
+    def maximals(self):
+        if self._maximals is None:
+            points = array_to_points(self.P, self.array)
+            self._maximals = frozenset(points)
+        return self._maximals
+
+    def belongs(self, x):
+        from .space import NotBelongs
+        self.P.belongs(x)
+        b = points_to_array(self.P, [x])
+        if not array_dominated(-self.array, -b)[0]:
+            msg = 'Point does not belong to lower set.'
+            raise_desc(NotBelongs, msg)
+
+
+@contract(u=UpperSet, returns='array[Nx*](float64)')
+def upperset_as_array(u):
+    """ Returns the minimal elements of u as a n×k array. """
+    if isinstance(u, UpperSetArray):
+        return u.array
+    return points_to_array(u.P, u.minimals)
+
+
+@contract(l=LowerSet, returns='array[Nx*](float64)')
+def lowerset_as_array(l):
+    """ Returns the maximal elements of l as a n×k array. """
+    if isinstance(l, LowerSetArray):
+        return l.array
+    return points_to_array(l.P, l.maximals)
+
+
+@contract(P=PosetProduct, returns=UpperSetArray)
+def make_upperset_array(array, P):
+    """ Creates the upper set generated by the rows of the array
+        (which are not necessarily an antichain). """
+    a = np.asarray(array, dtype='float64').reshape((-1, len(P.subs)))
+    return UpperSetArray(array_minima(a), P)
+
+
+@contract(P=PosetProduct, returns=LowerSetArray)
+def make_lowerset_array(array, P):
+    """ Creates the lower set generated by the rows of the array
+        (which are not necessarily an antichain). """
+    a = np.asarray(array, dtype='float64').reshape((-1, len(P.subs)))
+    return LowerSetArray(array_maxima(a), P)
+
+
+def _size(s):
+    if isinstance(s, (UpperSetArray, LowerSetArray)):
+        return s.array.shape[0]
+    if isinstance(s, UpperSet):
+        return len(s.minimals)
+    return len(s.maximals)
+
+
+def use_array_representation(P, A, B):
+    """ Whether to compare the two antichains A and B on P using
+        the array representation. """
+    if not is_array_poset(P):
+        return False
+    if isinstance(A, (UpperSetArray, LowerSetArray)):
+        return True
+    if isinstance(B, (UpperSetArray, LowerSetArray)):
+        return True
+    npairs = _size(A) * _size(B)
+    return npairs >= MCDPConstants.antichain_array_min_pairs
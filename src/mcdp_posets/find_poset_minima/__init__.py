@@ -1,2 +1,3 @@
 # -*- coding: utf-8 -*-
 from .baseline_n2 import *
+from .engine import *
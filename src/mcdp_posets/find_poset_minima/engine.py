@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+from contracts import contract
+from mcdp_posets.poset import Poset
+
+from .baseline_n2 import poset_maxima, poset_minima
+from .skyline import chain_minima_keyed, skyline_minima_keyed
+
+
+__all__ = [
+    'poset_minima_for',
+    'poset_maxima_for',
+    'register_minima_engine',
+    'get_chain_key',
+    'get_vector_key',
+]
+
+inf = float('inf')
+
+
+@contract(P=Poset, elements='seq|set|$frozenset', returns='set')
+def poset_minima_for(P, elements):
+    """
+        Find the minima of a set of elements of the poset P.
+
+        Dispatches on the poset: chains and products of chains use
+        sort-and-sweep algorithms; other posets use the
+        O(n^2) baseline.
+    """
+    if len(elements) <= 1:
+        return set(elements)
+    for engine in _engines:
+        res = engine(P, elements, maxima=False)
+        if res is not None:
+            return res
+    return poset_minima(elements, P.leq)
+
+
+@contract(P=Poset, elements='seq|set|$frozenset', returns='set')
+def poset_maxima_for(P, elements):
+    """ Find the maxima of a set of elements of the poset P. """
+    if len(elements) <= 1:
+        return set(elements)
+    for engine in _engines:
+        res = engine(P, elements, maxima=True)
+        if res is not None:
+            return res
+    return poset_maxima(elements, P.leq)
+
+
+_engines = []
+
+
+def register_minima_engine(engine):
+    """
+        Registers a function engine(P, elements, maxima) that
+        returns the set of minima (or maxima) of the elements,
+        or None if it does not apply to the poset P.
+
+        Engines registered later take precedence.
+    """
+    _engines.insert(0, engine)
+
+
+def get_chain_key(P):
+    """
+        If P is a chain that embeds in the extended reals,
+        returns a function key such that x ≤ y iff key(x) <= key(y).
+        Otherwise returns None.
+    """
+    from mcdp_posets.nat import Nat
+    from mcdp_posets.rcomp import Rbicomp, Rcomp, RcompBase
+
+    if isinstance(P, RcompBase):
+        # with tolerance, leq is not the order of the floats
+        if Rcomp.tolerate_numerical_errors:
+            return None
+        top = P.get_top()
+        def key(x):
+            return inf if x == top else x
+        return key
+
+    if isinstance(P, Rbicomp):
+        top = P.get_top()
+        bottom = P.get_bottom()
+        def key(x):
+            if x == top:
+                return inf
+            if x == bottom:
+                return -inf
+            return x
+        return key
+
+    if isinstance(P, Nat):
+        def key(x):
+            return x if isinstance(x, (int, long)) else inf
+        return key
+
+    return None
+
+
+def get_vector_key(P):
+    """
+        If P is a chain or a product of chains that embed in the
+        extended reals, returns a function key that maps x to a
+        list of numbers such that x ≤ y iff key(x) <= key(y)
+        componentwise. Otherwise returns None.
+    """
+    from mcdp_posets.poset_product import PosetProduct
+
+    if isinstance(P, PosetProduct):
+        if not P.subs:
+            return None
+        keys = [get_chain_key(sub) for sub in P.subs]
+        if any(k is None for k in keys):
+            return None
+
+        def key(x):
+            return [k(xi) for k, xi in zip(keys, x)]
+        return key
+
+    k = get_chain_key(P)
+    if k is None:
+        return None
+    return lambda x: [k(x)]
+
+
+def _negate(key):
+    return lambda x: -key(x)
+
+
+def _chain_engine(P, elements, maxima):
+    key = get_chain_key(P)
+    if key is None:
+        return None
+    if maxima:
+        key = _negate(key)
+    return chain_minima_keyed(elements, key)
+
+
+def _product_of_chains_engine(P, elements, maxima):
+    from mcdp_posets.poset_product import PosetProduct
+
+    if not isinstance(P, PosetProduct):
+        return None
+    key = get_vector_key(P)
+    if key is None:
+        return None
+    if maxima:
+        key0 = key
+        key = lambda x: [-_ for _ in key0(x)]
+
+    return skyline_minima_keyed(elements, key)
+
+
+register_minima_engine(_chain_engine)
+register_minima_engine(_product_of_chains_engine)
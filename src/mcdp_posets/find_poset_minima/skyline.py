@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+from bisect import bisect_left, bisect_right
+
+__all__ = [
+    'chain_minima_keyed',
+    'skyline_minima_keyed',
+]
+
+
+def chain_minima_keyed(elements, key):
+    """
+        Minima of a set of elements of a totally ordered set,
+        given a function key such that x ≤ y iff key(x) <= key(y).
+
+        This is a single sweep - O(n).
+    """
+    best = None
+    best_k = None
+    for e in elements:
+        k = key(e)
+        if best_k is None or k < best_k:
+            best = e
+            best_k = k
+    if best_k is None:
+        return set()
+    return set([best])
+
+
+def skyline_minima_keyed(elements, key):
+    """
+        Minima of a set of elements of a product of chains, given
+        a function key that maps each element to a tuple of numbers
+        such that x ≤ y iff key(x) <= key(y) componentwise.
+
+        - 2 dimensions: sort and sweep, O(n log n).
+        - 3 dimensions: sweep on the first coordinate maintaining
+          a staircase of the other two (Kung, Luccio, Preparata),
+          O(n log n) comparisons.
+        - more dimensions: sort-filter-skyline; after sorting
+          lexicographically each point is compared only against
+          the minima found so far, O(n m) for m minima.
+    """
+    # Remove duplicates, keeping the first element for each key.
+    keyed = {}
+    for e in elements:
+        k = tuple(key(e))
+        if not k in keyed:
+            keyed[k] = e
+
+    if not keyed:
+        return set()
+
+    keys = sorted(keyed)
+    ndim = len(keys[0])
+
+    if ndim == 1:
+        minima = keys[:1]
+    elif ndim == 2:
+        minima = _sweep2(keys)
+    elif ndim == 3:
+        minima = _sweep3(keys)
+    else:
+        minima = _sort_filter(keys)
+
+    return set(keyed[k] for k in minima)
+
+
+def _sweep2(keys):
+    """ keys: sorted lexicographically, no duplicates. """
+    res = []
+    min_y = None
+    for k in keys:
+        if min_y is None or k[1] < min_y:
+            res.append(k)
+            min_y = k[1]
+    return res
+
+
+def _sweep3(keys):
+    """ keys: sorted lexicographically, no duplicates. """
+    # The staircase of the (y, z) projections of the minima found
+    # so far: ys is increasing and zs is strictly decreasing.
+    ys = []
+    zs = []
+    res = []
+    for k in keys:
+        _, y, z = k
+        # the last point in the staircase with ys <= y
+        # has the smallest z among those
+        i = bisect_right(ys, y)
+        if i > 0 and zs[i - 1] <= z:
+            continue
+        res.append(k)
+        # remove the points of the staircase that are now dominated
+        j = i
+        while j < len(ys) and zs[j] >= z:
+            j += 1
+        # the points in [i, j) have y' >= y and z' >= z
+        i0 = bisect_left(ys, y, 0, i)
+        ys[i0:j] = [y]
+        zs[i0:j] = [z]
+    return res
+
+
+def _sort_filter(keys):
+    """ keys: sorted lexicographically, no duplicates. """
+    res = []
+    for k in keys:
+        for r in res:
+            if all(a <= b for a, b in zip(r, k)):
+                break
+        else:
+            res.append(k)
+    return res
@@ -100,6 +100,15 @@ class Map(object):
 
         return y
 
+    @contract(xs='seq', returns='list')
+    def call_many(self, xs):
+        """ Evaluates the map at many points at once.
+
+            Raises MapNotDefinedHere if the map is not defined at
+            one of the points. Subclasses can override this with
+            a vectorized implementation. """
+        return [self(x) for x in xs]
+
     @abstractmethod
     def _call(self, x):
         """ Might raise MapNotDefinedHere. """
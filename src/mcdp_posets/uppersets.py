@@ -6,8 +6,9 @@ from contracts import contract
 from contracts.utils import raise_desc, check_isinstance
 from mcdp.development import do_extra_checks, mcdp_dev_warning
 from mcdp_utils_misc.memoize_simple_imp import memoize_simple
+import numpy as np
 
-from .find_poset_minima.baseline_n2 import poset_maxima, poset_minima
+from .find_poset_minima.engine import poset_maxima_for, poset_minima_for
 from .poset import NotLeq, Poset
 from .poset_product import PosetProduct
 from .space import Map, NotBelongs, NotEqual, Space, Uninhabited
@@ -176,6 +177,13 @@ class UpperSets(Poset):
                 raise NotLeq(msg)
 
     def _my_leq_fast(self, A, B):
+        from .antichain_array import (array_dominated, upperset_as_array,
+                                      use_array_representation)
+        if use_array_representation(self.P, A, B):
+            a = upperset_as_array(A)
+            b = upperset_as_array(B)
+            return bool(np.all(array_dominated(a, b)))
+
         # there exists an a in A that a <= b
         def dominated(b):
             for a in A.minimals:
@@ -195,10 +203,19 @@ class UpperSets(Poset):
         # To compute the meet (min) of two upper sets
         # just take the union of the minimal elements
         # (without redundant elements)
+        from .antichain_array import (UpperSetArray, make_upperset_array,
+                                      upperset_as_array)
+        if isinstance(a, UpperSetArray) or isinstance(b, UpperSetArray):
+            both = np.vstack((upperset_as_array(a), upperset_as_array(b)))
+            r = make_upperset_array(both, self.P)
+            self.check_leq(r, a)
+            self.check_leq(r, b)
+            return r
+
         elements = set()
         elements.update(a.minimals)
         elements.update(b.minimals)
-        elements0 = poset_minima(elements, self.P.leq)
+        elements0 = poset_minima_for(self.P, elements)
         r = UpperSet(elements0, self.P)
         self.check_leq(r, a)
         self.check_leq(r, b)
@@ -278,6 +295,16 @@ class LowerSets(Poset):
             self.belongs(b)
         if a == b:
             return True
+
+        from .antichain_array import (array_dominated, lowerset_as_array,
+                                      use_array_representation)
+        if use_array_representation(self.P, a, b):
+            A = lowerset_as_array(a)
+            B = lowerset_as_array(b)
+            if not np.all(array_dominated(-A, -B)):
+                msg = 'Some maximal element of b is not dominated by a.'
+                raise_desc(NotLeq, msg, a=a, b=b)
+            return
         if False:
             if a == self.bot:
                 return True
@@ -315,10 +342,19 @@ class LowerSets(Poset):
         # To compute the meet (min) of two upper sets
         # just take the union of the minimal elements
         # (without redundant elements)
+        from .antichain_array import (LowerSetArray, make_lowerset_array,
+                                      lowerset_as_array)
+        if isinstance(a, LowerSetArray) or isinstance(b, LowerSetArray):
+            both = np.vstack((lowerset_as_array(a), lowerset_as_array(b)))
+            r = make_lowerset_array(both, self.P)
+            self.check_leq(r, a)
+            self.check_leq(r, b)
+            return r
+
         elements = set()
         elements.update(a.maximals)
         elements.update(b.maximals)
-        elements0 = poset_maxima(elements, self.P.leq)
+        elements0 = poset_maxima_for(self.P, elements)
         r = LowerSet(elements0, self.P)
         self.check_leq(r, a)
         self.check_leq(r, b)
@@ -445,12 +481,26 @@ def upperset_project(ur, i):
     if not (0 <= i < len(ur.P)):
         msg = 'Index %d not valid.' % i
         raise_desc(ValueError, msg, P=ur.P)
-    minimals = set()
     Pi = ur.P.subs[i]
+    from .antichain_array import UpperSetArray
+    if isinstance(ur, UpperSetArray):
+        column = ur.array[:, i]
+        if column.size == 0:
+            return UpperSet([], P=Pi)
+        # the projection on a chain has a single minimum
+        x = column.min()
+        if x == np.inf:
+            x = Pi.get_top()
+        elif x == -np.inf:
+            x = Pi.get_bottom()
+        else:
+            x = float(x)
+        return UpperSet([x], P=Pi)
+    minimals = set()
     for m in ur.minimals:
         mi = m[i]
         minimals.add(mi)
-    return UpperSet(poset_minima(minimals, leq=Pi.leq), P=Pi)
+    return UpperSet(poset_minima_for(Pi, minimals), P=Pi)
 
 @contract(lf='$LowerSet', i='int,>=0')
 def lowerset_project(lf, i):
@@ -464,7 +514,7 @@ def lowerset_project(lf, i):
     for m in lf.maximals:
         mi = m[i]
         maximals.add(mi)
-    return LowerSet(poset_maxima(maximals, leq=Pi.leq), P=Pi)
+    return LowerSet(poset_maxima_for(Pi, maximals), P=Pi)
 
 
 
@@ -483,6 +533,6 @@ def upperset_project_map(ur, f):
     for m in ur.minimals:
         mi = f(m)
         minimals.add(mi)
-    minimals = poset_minima(minimals, leq=Q.leq)
+    minimals = poset_minima_for(Q, minimals)
     return UpperSet(minimals, P=Q)
     
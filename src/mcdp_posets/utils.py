@@ -1,9 +1,7 @@
 # -*- coding: utf-8 -*-
 from contracts import raise_wrapped
 from mcdp_posets import NotLeq
-from mcdp_posets.find_poset_minima.baseline_n2 import poset_maxima
-
-from .find_poset_minima.baseline_n2 import poset_minima
+from .find_poset_minima.engine import poset_maxima_for, poset_minima_for
 
 
 __all__ = [
@@ -13,13 +11,13 @@ __all__ = [
 ]
 
 def check_maximal(elements, poset):
-    m2 = poset_maxima(elements, poset.leq)
+    m2 = poset_maxima_for(poset, elements)
     if not len(m2) == len(elements):
         msg = 'Set of elements is not minimal: %s' % elements
         raise ValueError(msg)
 
 def check_minimal(elements, poset):
-    m2 = poset_minima(elements, poset.leq)
+    m2 = poset_minima_for(poset, elements)
     if not len(m2) == len(elements):
         msg = 'Set of elements is not minimal: %s' % elements
         extra = set(elements) - set(m2)
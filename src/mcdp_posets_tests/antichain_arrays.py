@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import itertools
+
+from comptests.registrar import comptest
+from mcdp_posets import (LowerSets, PosetProduct, Rcomp, UpperSet, UpperSets,
+    LowerSet, poset_maxima_for, poset_minima_for, upperset_project)
+from mcdp_posets.antichain_array import (UpperSetArray, LowerSetArray,
+    array_minkowski_sum, array_to_points, make_upperset_array,
+    make_lowerset_array, points_to_array, upperset_as_array, array_project)
+import numpy as np
+
+
+def random_points(P, n, m=10):
+    """ Random points with small integer coordinates (many ties)
+        and some coordinates equal to top. """
+    res = set()
+    for _ in range(n):
+        p = []
+        for sub in P.subs:
+            if np.random.rand() < 0.05:
+                p.append(sub.get_top())
+            else:
+                p.append(float(np.random.randint(0, m)))
+        res.add(tuple(p))
+    return res
+
+
+@comptest
+def check_antichain_array_roundtrip():
+    P = PosetProduct((Rcomp(), Rcomp(), Rcomp()))
+    points = random_points(P, 50)
+    a = points_to_array(P, points)
+    assert a.shape == (len(points), 3)
+    points2 = array_to_points(P, a)
+    assert set(points2) == points
+
+
+@comptest
+def check_antichain_array_minima():
+    for k in [1, 2, 3, 4]:
+        P = PosetProduct((Rcomp(),) * k)
+        points = random_points(P, 200)
+        a = points_to_array(P, points)
+        u = make_upperset_array(a, P)
+        assert u.minimals == frozenset(poset_minima_for(P, points))
+        l = make_lowerset_array(a, P)
+        assert l.maximals == frozenset(poset_maxima_for(P, points))
+
+
+@comptest
+def check_antichain_array_leq():
+    P = PosetProduct((Rcomp(), Rcomp()))
+    UR = UpperSets(P)
+    LF = LowerSets(P)
+    for _ in range(20):
+        A = UpperSet(poset_minima_for(P, random_points(P, 30)), P)
+        B = UpperSet(poset_minima_for(P, random_points(P, 30)), P)
+        A2 = UpperSetArray(upperset_as_array(A), P)
+        B2 = UpperSetArray(upperset_as_array(B), P)
+        # my_leq_ does not use the arrays
+        expected = True
+        try:
+            UR.my_leq_(A, B)
+        except Exception:
+            expected = False
+        assert UR.leq(A2, B2) == expected
+        assert UR.leq(A, B2) == expected
+        assert UR.leq(A2, B) == expected
+
+        C = UR.meet(A2, B2)
+        assert isinstance(C, UpperSetArray)
+        UR.check_equal(C, UR.meet(A, B))
+
+        LA = LowerSet(poset_maxima_for(P, random_points(P, 30)), P)
+        LB = LowerSet(poset_maxima_for(P, random_points(P, 30)), P)
+        LA2 = make_lowerset_array(points_to_array(P, LA.maximals), P)
+        expected = True
+        try:
+            LF.my_leq_(LA, LB)
+        except Exception:
+            expected = False
+        assert isinstance(LA2, LowerSetArray)
+        assert LF.leq(LA2, LB) == expected
+
+
+@comptest
+def check_antichain_array_sum_project():
+    P = PosetProduct((Rcomp(), Rcomp(), Rcomp()))
+    A = poset_minima_for(P, random_points(P, 30))
+    B = poset_minima_for(P, random_points(P, 30))
+    sums = set()
+    for a, b in itertools.product(A, B):
+        sums.add(tuple(Pi.add(x, y) for Pi, x, y in zip(P.subs, a, b)))
+    expected = poset_minima_for(P, sums)
+    s = array_minkowski_sum(points_to_array(P, A), points_to_array(P, B))
+    assert set(array_to_points(P, s)) == expected
+
+    u = UpperSetArray(points_to_array(P, A), P)
+    for i in range(3):
+        UR = UpperSets(P.subs[i])
+        UR.check_equal(upperset_project(u, i),
+                       upperset_project(UpperSet(A, P), i))
+
+    p = array_project(u.array, [0, 2])
+    P02 = PosetProduct((P.subs[0], P.subs[2]))
+    expected = poset_minima_for(P02, [(x[0], x[2]) for x in A])
+    assert set(array_to_points(P02, p)) == expected
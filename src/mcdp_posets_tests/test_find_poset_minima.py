@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 from comptests.registrar import comptest
 from contracts import contract
-from mcdp_posets import Poset, PosetProduct, Rcomp
-from mcdp_posets.find_poset_minima.baseline_n2 import poset_minima_n2
+from mcdp_posets import Nat, Poset, PosetProduct, Rcomp
+from mcdp_posets.find_poset_minima.baseline_n2 import (poset_maxima,
+    poset_minima_n2)
+from mcdp_posets.find_poset_minima.engine import (poset_maxima_for,
+    poset_minima_for)
 import numpy as np
 import random
 
@@ -197,6 +200,74 @@ def poset_minima_n2_optimizedPP(P, ps):
 
 
 
+def check_engine_same_as_n2(P, Ps):
+    Ps = list(Ps)
+    random.shuffle(Ps)
+    expected = poset_minima_n2(P, Ps)
+    obtained = poset_minima_for(P, Ps)
+    assert expected == obtained, (P, expected, obtained)
+
+    expected = poset_maxima(Ps, P.leq)
+    obtained = poset_maxima_for(P, Ps)
+    assert expected == obtained, (P, expected, obtained)
+
+
+def with_tops(P, Ps, ntops):
+    """ Replaces some coordinates with the top of each component. """
+    res = set(Ps)
+    Ps = list(Ps)
+    for _ in range(ntops):
+        p = list(random.choice(Ps))
+        i = random.randint(0, len(p) - 1)
+        p[i] = P.subs[i].get_top()
+        res.add(tuple(p))
+    return res
+
+
+@comptest
+def pmin_engine_chain():
+    R = Rcomp()
+    Ps = [float(x) for x in np.random.rand(100)]
+    check_engine_same_as_n2(R, Ps)
+    check_engine_same_as_n2(R, Ps + [R.get_top()])
+    check_engine_same_as_n2(R, [R.get_top()])
+    N = Nat()
+    check_engine_same_as_n2(N, [3, 2, 5, 2, N.get_top()])
+
+
+@comptest
+def pmin_engine_product():
+    for ndim in [1, 2, 3, 4]:
+        P = PosetProduct((Rcomp(),) * ndim)
+        # small integer values create many ties
+        for m in [3.0, 1000.0]:
+            Ps = set(tuple(float(np.round(x)) for x in p)
+                     for p in get_random_points(200, ndim, m))
+            check_engine_same_as_n2(P, Ps)
+            check_engine_same_as_n2(P, with_tops(P, Ps, 20))
+
+
+@comptest
+def pmin_engine_product_mixed():
+    P = PosetProduct((Rcomp(), Nat(), Rcomp()))
+    Ps = set()
+    for _ in range(300):
+        p = (float(random.randint(0, 10)), random.randint(0, 10),
+             float(random.randint(0, 10)))
+        Ps.add(p)
+    check_engine_same_as_n2(P, Ps)
+    check_engine_same_as_n2(P, with_tops(P, Ps, 20))
+
+
+@comptest
+def pmin_engine_antichain():
+    n = 100
+    P = PosetProduct((Rcomp(), Rcomp()))
+    Ps = set(get_random_antichain(n, 2))
+    res = poset_minima_for(P, Ps)
+    assert res == poset_minima_n2(P, Ps)
+
+
 
 
 @comptest
@@ -29,15 +29,19 @@ def generic_report_trace(r, ndp, dp, trace, out, do_movie=False):  # @UnusedVari
         raise_desc(DPInternalError, 'There is no iteration; no movie available.')
         
 def _report_loop(r, trace_loop, out, do_movie=True):
-    # list of KleeneIteration
-    iterations = trace_loop.get_value1('iterations')
     R = trace_loop.get_value1('R')
     R1 = R[0] 
 
-    sips = [_.s for _ in iterations]
-    converged = [_.s_converged for _ in iterations]
-    rs = [_.r for _ in iterations]
-    rs_converged = [_.r_converged for _ in iterations]
+    sips = []
+    converged = []
+    rs = []
+    rs_converged = []
+    # KleeneIteration's, one at a time
+    for it in trace_loop.get_loop_iterations():
+        sips.append(it.s)
+        converged.append(it.s_converged)
+        rs.append(it.r)
+        rs_converged.append(it.r_converged)
 
     with r.subsection('rs') as r2:
         sequences = _report_loop_sequence(r2, R1, rs, rs_converged, do_movie=do_movie)
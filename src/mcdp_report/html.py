@@ -46,9 +46,13 @@ def ast_to_html(s,
                 ignore_line=None,
                 add_line_gutter=True, 
                 encapsulate_in_precode=True, 
-                postprocess=None):
+                postprocess=None,
+                parse_cache=None):
     """
         postprocess = function applied to parse tree
+        
+        parse_cache = StatementParseCache, to reuse the parsing 
+        of the statements that did not change
     """
     check_isinstance(s, str)
 #     if parse_expr is None:
@@ -83,7 +87,11 @@ def ast_to_html(s,
     # remove also initial and final whitespace
     extra_before, for_pyparsing, extra_after = extract_ws(for_pyparsing0)
     # parse the string 'for_pyparsing'
-    block0 = parse_wrap(parse_expr, for_pyparsing)[0]
+    if parse_cache is None:
+        block0 = parse_wrap(parse_expr, for_pyparsing)[0]
+    else:
+        from mcdp_lang.parse_incremental import parse_wrap_incremental
+        block0 = parse_wrap_incremental(parse_expr, for_pyparsing, parse_cache)[0]
     
 #     print indent(recursive_print(block0), ' block0 |')
     assert isnamedtuplewhere(block0)
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 import cgi
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import json
+import threading
 from mcdp import MCDPConstants, logger
 from mcdp.exceptions import DPInternalError, DPSemanticError, DPSyntaxError,\
     DPNotImplementedError
+from mcdp_lang.parse_incremental import StatementParseCache
 from mcdp_lang.suggestions import get_suggestions, apply_suggestions
 from mcdp_library.specs_def import specs
 from mcdp_report.html import ast_to_html
@@ -35,6 +37,12 @@ class AppEditorFancyGeneric(object):
         # library_name x spec ->  dict(text : ndp)
         # self.last_processed2[library_name x spec][text] = ndp
         self.last_processed2 = defaultdict(lambda: dict())
+        # the parsing of the single statements, shared by all the models
+        self.parse_cache = StatementParseCache()
+        # the responses of ajax_parse:
+        # key -> (response, thing, hashes of the sources loaded)
+        self.responses = OrderedDict()
+        self.responses_lock = threading.Lock()
 
     def config(self, config):
         config.add_view(self.view_edit_form_fancy, 
@@ -54,6 +62,8 @@ class AppEditorFancyGeneric(object):
             library = db_view.repos[e.repo_name].shelves[e.shelf_name].libraries[e.library_name]
             things = library.things.child(e.spec_name)
             things[e.thing_name] = string 
+            e.app.hi.host_cache.invalidate(e.repo_name, e.shelf_name, e.library_name,
+                                           e.spec_name, e.thing_name)
             return {'ok': True, 'saved_string': string}
     
         return ajax_error_catch(go, environment=e)
@@ -70,15 +80,50 @@ class AppEditorFancyGeneric(object):
 
         make_relative = lambda s: self.make_relative(e.request, s)
         library = library_from_env(e)
+        host_cache = e.app.hi.host_cache
+        subscribed = tuple(sorted(e.session.get_subscribed_shelves()))
+        key_response = (e.repo_name, e.shelf_name, subscribed) + key
 
         def go():
-            with timeit_wall('process_parse_request'):
-                res = process_parse_request(library, string, e.spec, key, cache, make_relative)
+            found = self._get_response(key_response, host_cache)
+            if found is not None:
+                res, thing = found
+                cache[key] = thing
+            else:
+                with host_cache.recording_sources() as hashes:
+                    with timeit_wall('process_parse_request'):
+                        res = process_parse_request(library, string, e.spec, key, cache,
+                                                    make_relative, self.parse_cache)
+                # the errors are not remembered: they can come from
+                # things (e.g. a library) that are not in hashes
+                if res.get('ok', False):
+                    self._set_response(key_response, res, cache.get(key, None), hashes)
+            res = dict(res)
             res['request'] = req
             return res
 
         return ajax_error_catch(go, environment=e)
 
+    def _get_response(self, key, host_cache):
+        """ Returns (response, thing) if we already processed the same
+            text, and the things it loaded did not change; else None. """
+        with self.responses_lock:
+            entry = self.responses.pop(key, None)
+        if entry is None:
+            return None
+        res, thing, hashes = entry
+        if not host_cache.sources_unchanged(hashes):
+            return None
+        with self.responses_lock:
+            self.responses[key] = entry
+        return res, thing
+
+    def _set_response(self, key, res, thing, hashes):
+        with self.responses_lock:
+            self.responses[key] = (res, thing, hashes)
+            while len(self.responses) > MCDPConstants.web_parse_cache_size:
+                self.responses.popitem(last=False)
+
     @add_std_vars_context
     @cr2e
     def view_edit_form_fancy(self, e): 
@@ -152,9 +197,12 @@ class AppEditorFancyGeneric(object):
             raise HTTPFound(url_edit)
 
 
-def process_parse_request(library, string, spec, key, cache, make_relative):
+def process_parse_request(library, string, spec, key, cache, make_relative,
+                          parse_cache=None):
     """ returns a dict to be used as the request,
-        or raises an exception """
+        or raises an exception.
+        
+        parse_cache: optional StatementParseCache """
     from mcdp_report.html import sanitize
     
     parse_expr = spec.parse_expr
@@ -179,7 +227,8 @@ def process_parse_request(library, string, spec, key, cache, make_relative):
                                     parse_expr=parse_expr,
                                     add_line_gutter=False,
                                     encapsulate_in_precode=False,
-                                    postprocess=postprocess)
+                                    postprocess=postprocess,
+                                    parse_cache=parse_cache)
             
             thing = parse_eval(Tmp.string_nospaces_parse_tree_interpreted, context0)
             
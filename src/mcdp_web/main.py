@@ -901,6 +901,8 @@ class WebApp(AppVisualization, AppStatus,
         #         basename = "%s.%s" % (name, e.spec.extension)
         logger.error('Deleting %s' % name)
         del e.things[name]
+        e.app.hi.host_cache.invalidate(e.repo_name, e.shelf_name, e.library_name,
+                                       e.spec_name, name)
         #         filename = e.library.delete_file(basename)
         #         e.session.notify_deleted_file(e.shelf_name, e.library_name, filename)
         raise HTTPFound(e.request.referrer)
@@ -912,6 +914,8 @@ class WebApp(AppVisualization, AppStatus,
         new_name = e.request.params.get('new_name', False).encode('utf8')
         logger.error('Renaming %r to %r' % (name, new_name))
         e.things.rename(name, new_name)
+        e.app.hi.host_cache.invalidate(e.repo_name, e.shelf_name, e.library_name,
+                                       e.spec_name, name)
         raise HTTPFound(e.request.referrer)
 
     def redirect_to_page(self, e, page):
@@ -587,6 +587,9 @@ class ResourceThingViewSolver(ResourceThingView):
     def getitem(self, key):
         subs = {
             'submit': ResourceThingViewSolver_submit(),
+            'submit_async': ResourceThingViewSolver_submit_async(),
+            'job': ResourceThingViewSolver_job(),
+            'cancel': ResourceThingViewSolver_cancel(),
             'display.png': ResourceThingViewSolver_display_png(),
             'display1u': ResourceThingViewSolver_display1u(),
             'display1u.png': ResourceThingViewSolver_display1u_png(),
@@ -597,6 +600,15 @@ class ResourceThingViewSolver(ResourceThingView):
 class ResourceThingViewSolver_submit(Resource): pass
 
 
+class ResourceThingViewSolver_submit_async(Resource): pass
+
+
+class ResourceThingViewSolver_job(Resource): pass
+
+
+class ResourceThingViewSolver_cancel(Resource): pass
+
+
 class ResourceThingViewSolver_display_png(Resource): pass
 
 
@@ -1,13 +1,12 @@
 
-function init_list() {
-    var options = {
-        valueNames: [ 'name', 'desc' ],
-        listClass: 'mylist'
-    };
-
-    var userList = new List('container', options);
-    // console.log('userList ok')
-}
+
+// The filtering and the ranking are done by the server (:query);
+// we ask for one page of results at a time.
+
+var search_query = null;
+var search_offset = 0;
+var search_timer = null;
+var search_request = null;
 
 function add_to_table(dataObject) {
     var name = dataObject.name;
@@ -28,27 +27,57 @@ function add_to_table(dataObject) {
 
 }
 
-function init_search() {
-    $.ajax({
+function search_page(q, offset) {
+    if (search_request != null) {
+        search_request.abort();
+    }
+    search_request = $.ajax({
         url: ':query',
         type: 'GET',
         data: {
-            // "keyword" : $("#keywordElementID").val(), /* other variables */
+            "q": q,
+            "offset": offset
         },
         dataType: 'JSON',
         success:
              function( returnedJSON  ){
-                 //use returned text here
-                 //to loop through data objects from API
+                 search_request = null;
+                 if (offset == 0) {
+                     $(".mylist").empty();
+                 }
                  $.each( returnedJSON.data, function( index , dataObject ){
                      add_to_table(dataObject);
                  });
-
-                 init_list();
+                 search_query = q;
+                 search_offset = offset + returnedJSON.data.length;
+                 $("#search-total").text(returnedJSON.total + ' results');
+                 $("#search-more").toggle(search_offset < returnedJSON.total);
             }
     });
 }
 
+function on_search_input() {
+    var q = $("#search-box").val();
+    if (q == search_query) {
+        return;
+    }
+    if (search_timer != null) {
+        clearTimeout(search_timer);
+    }
+    search_timer = setTimeout(function() {
+        search_timer = null;
+        search_page(q, 0);
+    }, 150);
+}
+
+function init_search() {
+    $("#search-box").on('input', on_search_input);
+    $("#search-more").on('click', function() {
+        search_page(search_query, search_offset);
+    });
+    search_page('', 0);
+}
+
 
 $( document ).ready(init_search) ;
 // $(init_search);
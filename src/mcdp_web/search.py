@@ -1,4 +1,4 @@
-from mcdp_hdb_mcdp.cli_load_all import iterate_all
+from mcdp import MCDPConstants
 from mcdp_web.environment import cr2e
 from mcdp_web.utils0 import add_std_vars_context
 
@@ -15,33 +15,73 @@ class AppSearch():
 
     @cr2e
     def view_search_query(self, e):
+        """
+            Returns the results of the query in the parameter "q",
+            from position "offset" (default 0), at most "limit" of them
+            (default MCDPConstants.web_search_page_size).
+
+                {'data': [...], 'total': <number of matches>,
+                 'offset': ..., 'limit': ...}
+        """
         from mcdp_web.main import WebApp
-        db_view= WebApp.singleton.hi.db_view  # @UndefinedVariable
+        search_index = WebApp.singleton.hi.search_index  # @UndefinedVariable
         root = self.get_root_relative_to_here(e.request)
-        
-        res = {}
-        res['icon_repo'] = '&#9730;'
-        res['icon_repo_css'] = r'\9730;'
-        res['icon_library'] = '&#x1F4D6;'
-        res['icon_library_css'] = r'\1F4D6'
-        res['icon_shelf'] = '&#x1F3DB;'
-        res['icon_shelf_css'] = r'\1F3DB'
-    
-        res['icon_models'] = '&#10213;'
-        res['icon_templates'] = '&#x2661;'
-        res['icon_posets'] = '&#x28B6;'
-        res['icon_values'] = '&#x2723;'
-        res['icon_primitivedps'] = '&#x2712;'
-    
-        res['icon_documents'] = '&#128196;'
-        
+
+        params = e.request.params
+        q = params.get('q', '')
+        try:
+            offset = max(0, int(params.get('offset', 0)))
+            limit = int(params.get('limit', MCDPConstants.web_search_page_size))
+        except ValueError:
+            offset = 0
+            limit = MCDPConstants.web_search_page_size
+        limit = max(1, min(limit, MCDPConstants.web_search_page_size))
+
+        total, results = search_index.query(q, offset=offset, limit=limit)
+
         data = []
-        
-        for username, user_struct in db_view.user_db.users.items():
-            name = 'User %s (%s)' % (username, user_struct.info.name)
-            url = '/users/%s/' % username
-            # language=html
-            icon = '''
+        for r in results:
+            d = get_search_result_entry(r, search_index.user_names)
+            u = d['url']
+            d['url'] = root + u
+            d['desc'] = d['desc'].replace(u, d['url'])
+            data.append(d)
+
+        res = {'data': data, 'total': total, 'offset': offset, 'limit': limit}
+        return res
+
+
+icons = {
+    'repo': '&#9730;',
+    'library': '&#x1F4D6;',
+    'shelf': '&#x1F3DB;',
+    'models': '&#10213;',
+    'templates': '&#x2661;',
+    'posets': '&#x28B6;',
+    'values': '&#x2723;',
+    'primitivedps': '&#x2712;',
+    'documents': '&#128196;',
+}
+
+thing_descriptions = {
+    'models': 'Model',
+    'templates': 'Template',
+    'values': 'Value',
+    'posets': 'Poset',
+    'primitivedps': 'Primitive DP ',
+}
+
+
+def get_search_result_entry(r, user_names):
+    """ Returns the dict for the browser for the SearchResult r, with
+        the url relative to the root. """
+    if r.kind == 'user':
+        username, = r.key
+        user_name = user_names.get(username, None)
+        name = 'User %s (%s)' % (username, user_name)
+        url = '/users/%s/' % username
+        # language=html
+        icon = '''
             <img id='gravatar2' src='/users/%s/small.jpg'/>
     <style>
     img#gravatar2 {
@@ -49,84 +89,56 @@ class AppSearch():
         margin-bottom: -4pt;
     }
     </style>''' % username
-            desc = '%s User <a href="%s" class="highlight"><code>%s</code><a> (%s)' % (icon, url, username, user_struct.info.name)
-            d = {'name': name,
-                 'type': 'user',
-                 'desc': desc,
-                 'url': url}
-            data.append(d)
-            
-        for repo_name, repo in db_view.repos.items():
-            name = 'Repository %s' % (repo_name) 
-            url = '/repos/%s/' % (repo_name)
-            desc = '%s Repository <a href="%s" class="highlight"><code>%s</code></a>' %  (
-                res['icon_repo'], url, repo_name)
-            d = {'name': name, 
-                 'type': 'repo',
-                 'desc': desc,
-                 'url': url}
-            data.append(d)
-        
-        for repo_name, repo in db_view.repos.items():
-            for shelf_name, shelf in repo.shelves.items():
-                name = 'Shelf %s (%s)' % (shelf_name, repo_name) 
-                url = '/repos/%s/shelves/%s/' % (repo_name, shelf_name)
-                desc = '%s Shelf <a href="%s"  class="highlight"><code>%s</code></a> (Repo <code>%s</code>)' % (
-                    res['icon_shelf'], url, shelf_name, repo_name)
-                d = {'name': name, 
-                     'desc': desc,
-                     'type': 'shelf',
-                     'url': url}
-                data.append(d)
-            
-        for repo_name, repo in db_view.repos.items():
-            for shelf_name, shelf in repo.shelves.items():
-                for library_name, _ in shelf.libraries.items():
-                    url = '/repos/%s/shelves/%s/libraries/%s/' % (repo_name, shelf_name, library_name)
-                    name = 'Library %s (Repo %s, shelf %s)' % (library_name, repo_name, shelf_name) 
-                    desc = '%s Library <a href="%s"  class="highlight"><code>%s</code></a> (Repo <code>%s</code>, shelf <code>%s</code>)' %\
-                         (res['icon_library'], url, library_name, repo_name, shelf_name)
-                    d = {'name': name, 
-                         'type': 'library',
-                         'desc': desc,
-                         'url': url}
-                    data.append(d)
-            
-    
-        stuff = list(iterate_all(db_view))
-        for e in stuff:
-            name = '%s %s (Repo %s, shelf %s, library %s)' % (e.spec_name, e.thing_name, e.repo_name, e.shelf_name, e.library_name) 
-            url = '/repos/%s/shelves/%s/libraries/%s/%s/%s/views/syntax/' % (e.repo_name, e.shelf_name, e.library_name, e.spec_name, e.thing_name)
-            icon = res['icon_%s' % e.spec_name]
-            t = {'models': 'Model',
-                 'templates': 'Template',
-                 'values': 'Value',
-                 'posets': 'Poset',
-                 'primitivedps': 'Primitive DP '}
-            what = t[e.spec_name]
-            desc = '''
-                %s %s <a href="%s" class='highlight'><code>%s</code></a>
-                (Repo <code>%s</code>, shelf <code>%s</code>, library <code>%s</code>)
-            ''' % (icon, what, url, e.thing_name, e.repo_name, e.shelf_name, e.library_name)
-            d = {'name': name, 
-                 'type': 'thing',
-                 'spec_name':  e.spec_name,
-                 'desc': desc ,
-                 'url': url}
-            data.append(d)
-        
-        
-        for d in data:
-            u =  d['url']
-            d['url'] = root + u
-            d['desc'] = d['desc'].replace(u, d['url'])
-            
-        
-        res = {'data': data}
-#         print yaml_dump(res)
-        
-        return res
+        desc = '%s User <a href="%s" class="highlight"><code>%s</code><a> (%s)' % (icon, url, username, user_name)
+        return {'name': name,
+                'type': 'user',
+                'desc': desc,
+                'url': url}
 
+    if r.kind == 'repo':
+        repo_name, = r.key
+        name = 'Repository %s' % (repo_name)
+        url = '/repos/%s/' % (repo_name)
+        desc = '%s Repository <a href="%s" class="highlight"><code>%s</code></a>' % (
+            icons['repo'], url, repo_name)
+        return {'name': name,
+                'type': 'repo',
+                'desc': desc,
+                'url': url}
 
+    if r.kind == 'shelf':
+        repo_name, shelf_name = r.key
+        name = 'Shelf %s (%s)' % (shelf_name, repo_name)
+        url = '/repos/%s/shelves/%s/' % (repo_name, shelf_name)
+        desc = '%s Shelf <a href="%s"  class="highlight"><code>%s</code></a> (Repo <code>%s</code>)' % (
+            icons['shelf'], url, shelf_name, repo_name)
+        return {'name': name,
+                'desc': desc,
+                'type': 'shelf',
+                'url': url}
 
+    if r.kind == 'library':
+        repo_name, shelf_name, library_name = r.key
+        url = '/repos/%s/shelves/%s/libraries/%s/' % (repo_name, shelf_name, library_name)
+        name = 'Library %s (Repo %s, shelf %s)' % (library_name, repo_name, shelf_name)
+        desc = '%s Library <a href="%s"  class="highlight"><code>%s</code></a> (Repo <code>%s</code>, shelf <code>%s</code>)' %\
+             (icons['library'], url, library_name, repo_name, shelf_name)
+        return {'name': name,
+                'type': 'library',
+                'desc': desc,
+                'url': url}
 
+    assert r.kind == 'thing', r
+    repo_name, shelf_name, library_name, spec_name, thing_name = r.key
+    name = '%s %s (Repo %s, shelf %s, library %s)' % (spec_name, thing_name, repo_name, shelf_name, library_name)
+    url = '/repos/%s/shelves/%s/libraries/%s/%s/%s/views/syntax/' % (repo_name, shelf_name, library_name, spec_name, thing_name)
+    what = thing_descriptions[spec_name]
+    desc = '''
+        %s %s <a href="%s" class='highlight'><code>%s</code></a>
+        (Repo <code>%s</code>, shelf <code>%s</code>, library <code>%s</code>)
+    ''' % (icons[spec_name], what, url, thing_name, repo_name, shelf_name, library_name)
+    return {'name': name,
+            'type': 'thing',
+            'spec_name': spec_name,
+            'desc': desc,
+            'url': url}
@@ -2,7 +2,7 @@
 
 from contracts import contract
 from contracts.utils import raise_wrapped
-from mcdp_dp.tracer import Tracer
+from mcdp_dp.tracer import NullTracer
 from mcdp_posets import Nat, NotBelongs, RcompUnits
 from mcdp_posets.rcomp import RcompTop
 from mcdp_report.gg_ndp import format_unit
@@ -63,8 +63,7 @@ class SolverState(object):
             raise_wrapped(ValueError, e, "Point does not belong.", compact=True)
         self.fun.append(fv)
 
-        from mcdp import logger
-        trace = Tracer(logger=logger)
+        trace = NullTracer()
         print('solving... %s' % F.format(fv))
         ures = self.dp.solve_trace(fv, trace)
 
@@ -1,15 +1,17 @@
 # -*- coding: utf-8 -*-
 import base64
 import cgi
+from collections import OrderedDict
 from contextlib import contextmanager
 import json
-from mcdp import logger
+import threading
+from mcdp import logger, MCDPConstants
 from mcdp.exceptions import DPSyntaxError, mcdp_dev_warning, DPSemanticError, \
     DPInternalError
 from mcdp_cli.solve_meat import solve_meat_solve_rtof, solve_meat_solve_ftor
 from mcdp_dp.dp_transformations import get_dp_bounds
 from mcdp_dp.primitive import NotSolvableNeedsApprox
-from mcdp_dp.tracer import Tracer
+from mcdp_dp.tracer import NullTracer
 from mcdp_lang.parse_interface import parse_constant
 from mcdp_posets import express_value_in_isomorphic_space, LowerSets,  NotLeq, UpperSets
 from mcdp_report.gg_ndp import format_unit
@@ -18,8 +20,10 @@ from mcdp_web.environment import cr2e
 from mcdp_web.resource_tree import ResourceThingViewSolver,\
     ResourceThingViewSolver_submit,\
     ResourceThingViewSolver_display_png, ResourceThingViewSolver_display1u,\
-    ResourceThingViewSolver_display1u_png
-from mcdp_web.utils import ajax_error_catch, memoize_simple, response_data
+    ResourceThingViewSolver_display1u_png, ResourceThingViewSolver_submit_async,\
+    ResourceThingViewSolver_job, ResourceThingViewSolver_cancel
+from mcdp_web.utils import (ajax_error_catch, memoize_simple, response_data,
+    format_exception_for_ajax_response)
 from mcdp_web.utils.image_error_catch_imp import response_image
 from mcdp_web.utils0 import add_std_vars_context
 
@@ -31,6 +35,8 @@ from reprep.plot_utils.axes import x_axis_extra_space, y_axis_extra_space
 import numpy as np
 from mcdp_web.context_from_env import library_from_env
 
+from .solve_jobs import SolveCancelled, SolveJobs
+
 
 # Alternate chars used for Base64 instead of + / which give problems with urls
 altchars = '-_' 
@@ -45,6 +51,10 @@ class AppSolver2(object):
         /libraries/{library}/models/{models}/views/solver2/
         /libraries/{library}/models/{models}/views/solver2/submit
         
+        /libraries/{library}/models/{models}/views/solver2/submit_async
+        /libraries/{library}/models/{models}/views/solver2/job?id=
+        /libraries/{library}/models/{models}/views/solver2/cancel?id=
+        
         /libraries/{library}/models/{models}/views/solver2/compact_graph.png
         
         /libraries/{library}/models/{models}/views/solver2/display1u
@@ -54,6 +64,9 @@ class AppSolver2(object):
 
     def __init__(self):
         self.solutions = {} 
+        self.compiled = CompiledDPCache(MCDPConstants.web_compiled_dp_cache_size)
+        self.solve_jobs = SolveJobs(nworkers=MCDPConstants.web_solve_workers,
+                                    max_jobs=MCDPConstants.web_solve_max_jobs)
 
     def config(self, config):
         config.add_view(self.view_solver2_base, 
@@ -64,6 +77,18 @@ class AppSolver2(object):
                         context=ResourceThingViewSolver_submit,
                         renderer='json')
         
+        config.add_view(self.view_solver2_submit_async,
+                        context=ResourceThingViewSolver_submit_async,
+                        renderer='json')
+
+        config.add_view(self.view_solver2_job,
+                        context=ResourceThingViewSolver_job,
+                        renderer='json')
+
+        config.add_view(self.view_solver2_cancel,
+                        context=ResourceThingViewSolver_cancel,
+                        renderer='json')
+        
         config.add_view(self.view_solver2_display,
                         context=ResourceThingViewSolver_display_png)
         
@@ -81,21 +106,46 @@ class AppSolver2(object):
                               library_name=e.library_name, 
                               model_name=e.thing_name)
 
-    def get_ndp_dp(self, e, repo_name, shelf_name, library_name, model_name):
-# #         self._xxx_session = session
-#         return self._get_ndp_dp(repo_name, shelf_name, library_name, model_name)
-#     
-#     @memoize_simple
-#     def _get_ndp_dp(self, repo_name, shelf_name, library_name, model_name):
-#         library = self._xxx_session.libraries[library_name]['library']
-#         
+    def get_ndp_dp(self, e, repo_name, shelf_name, library_name, model_name):  # @UnusedVariable
+        ndp, dp, _ = self._get_ndp_dp_key(e)
+        return ndp, dp
+
+    def _get_ndp_dp_key(self, e):
+        """ Returns ndp, dp, and the key for the compiled DP cache
+            (None if the model could not be identified by content). """
         mcdp_library = library_from_env(e)
-        
         ndp = e.spec.load(mcdp_library, e.thing_name)
-        
-#         ndp = library.load_ndp(model_name)
-        dp = ndp.get_dp()
-        return ndp, dp
+
+        host_cache = e.app.hi.host_cache
+        key = host_cache.get_content_hash(mcdp_library.repo_name,
+                                          mcdp_library.shelf_name,
+                                          mcdp_library.library_name,
+                                          e.spec_name, e.thing_name)
+        if key is None:
+            return ndp, ndp.get_dp(), None
+        dp = self.compiled.get(key, ndp.get_dp)
+        return ndp, dp, key
+
+    def get_dp_bounds_e(self, e, nl, nu):
+        """ Returns ndp, dp, dpl, dpu for the model of e. """
+        ndp, dp, key = self._get_ndp_dp_key(e)
+        dpl, dpu = self._get_dp_bounds(dp, key, nl, nu)
+        return ndp, dp, dpl, dpu
+
+    def _get_dp_bounds(self, dp, key, nl, nu):
+        """ Returns dpl, dpu, cached if key is not None. """
+        compute = lambda: get_dp_bounds(dp, nl, nu)
+        if key is None:
+            return compute()
+        else:
+            return self.compiled.get((key, nl, nu), compute)
+
+    def _get_solve_model(self, e):
+        """ Returns what solve_state() needs from the environment:
+            the tuple (library, ndp, dp, key). """
+        mcdp_library = library_from_env(e)
+        ndp, dp, key = self._get_ndp_dp_key(e)
+        return mcdp_library, ndp, dp, key
 
     @add_std_vars_context
     @cr2e
@@ -125,64 +175,116 @@ class AppSolver2(object):
     def view_solver2_submit(self, e):
         def go():
             state = e.request.json_body['ui_state']
-            area_F = state['area_F'].encode('utf-8')
-            area_R = state['area_R'].encode('utf-8')
-            is_ftor = state['ftor_checkbox']
-            is_rtof = state['rtof_checkbox']
-            if is_ftor: 
-                pass
-            elif is_rtof:
-                pass
-            else:
-                msg = 'Cannot establish query type. '
-                raise_desc(DPInternalError, msg, state=state)
-                
-            do_approximations = state['do_approximations']
-            nl = state['nl'] 
-            nu = state['nu'] 
+            model = self._get_solve_model(e)
+            return self.solve_state(model, state, NullTracer())
+   
+        quiet = (DPSyntaxError, DPSemanticError, NeedsApprox)
+        return ajax_error_catch(go, quiet=quiet, environment=e)
+
+    @cr2e
+    def view_solver2_submit_async(self, e):
+        """ Like submit, but the solve is done in the background;
+            returns the job id, to use with job and cancel. """
+        def go():
+            state = e.request.json_body['ui_state']
+            quiet = (DPSyntaxError, DPSemanticError, NeedsApprox)
+            # resolved here, in the request thread: the job must not
+            # use the request environment
+            model = self._get_solve_model(e)
+
+            def f(tracer):
+                try:
+                    return self.solve_state(model, state, tracer)
+                except SolveCancelled:
+                    raise
+                except Exception as exc:
+                    return format_exception_for_ajax_response(exc, quiet=quiet)
+
+            description = '%s/%s' % (e.library_name, e.thing_name)
+            job_id = self.solve_jobs.submit(f, description)
+            return {'ok': True, 'job_id': job_id}
+
+        return ajax_error_catch(go, environment=e)
+
+    @cr2e
+    def view_solver2_job(self, e):
+        """ Returns the state of the job; if it is done, 'result'
+            is what submit would have returned. """
+        def go():
+            job_id = e.request.params['id'].encode('utf-8')
+            res = self.solve_jobs.get_state(job_id)
+            res['ok'] = True
+            return res
+
+        return ajax_error_catch(go, environment=e)
+
+    @cr2e
+    def view_solver2_cancel(self, e):
+        def go():
+            job_id = e.request.params['id'].encode('utf-8')
+            self.solve_jobs.cancel(job_id)
+            return {'ok': True}
+
+        return ajax_error_catch(go, environment=e)
+
+    def solve_state(self, model, state, tracer):
+        """ Solves the query described by the UI state, for the
+            model returned by _get_solve_model(). """
+        area_F = state['area_F'].encode('utf-8')
+        area_R = state['area_R'].encode('utf-8')
+        is_ftor = state['ftor_checkbox']
+        is_rtof = state['rtof_checkbox']
+        if is_ftor: 
+            pass
+        elif is_rtof:
+            pass
+        else:
+            msg = 'Cannot establish query type. '
+            raise_desc(DPInternalError, msg, state=state)
             
-            if is_ftor:
-                key = dict(type=QUERY_TYPE_FTOR, 
-                            string=area_F, 
-                            do_approximations=do_approximations,
-                            nu=nu, nl=nl)
-        
-                data, res = self.process_ftor(e, area_F, do_approximations, nl, nu)
-            elif is_rtof:
-                key = dict(type=QUERY_TYPE_RTOF, 
-                            string=area_R, 
-                            do_approximations=do_approximations,
-                            nu=nu, nl=nl)
-
-                data, res = self.process_rtof(e, area_R, do_approximations, nl, nu)
-            else:
-                raise_desc(DPInternalError, 'Inconsistent state', state=state)
+        do_approximations = state['do_approximations']
+        nl = state['nl'] 
+        nu = state['nu'] 
         
-            key_stable = sorted(tuple(key.items()))  
-            h = base64.b64encode(json.dumps(key_stable), altchars=altchars)
+        if is_ftor:
+            key = dict(type=QUERY_TYPE_FTOR, 
+                        string=area_F, 
+                        do_approximations=do_approximations,
+                        nu=nu, nl=nl)
     
-            data['state'] = state
-            data['key'] = key
+            data, res = self.process_ftor(model, area_F, do_approximations, nl, nu,
+                                          tracer)
+        elif is_rtof:
+            key = dict(type=QUERY_TYPE_RTOF, 
+                        string=area_R, 
+                        do_approximations=do_approximations,
+                        nu=nu, nl=nl)
+
+            data, res = self.process_rtof(model, area_R, do_approximations, nl, nu,
+                                          tracer)
+        else:
+            raise_desc(DPInternalError, 'Inconsistent state', state=state)
+    
+        key_stable = sorted(tuple(key.items()))  
+        h = base64.b64encode(json.dumps(key_stable), altchars=altchars)
 
-            self.solutions[h] = data
+        data['state'] = state
+        data['key'] = key
 
-            res['output_image'] = 'display.png?hash=%s' % h
-            res['ok'] = True
-            return res
-   
-        quiet = (DPSyntaxError, DPSemanticError, NeedsApprox)
-        return ajax_error_catch(go, quiet=quiet, environment=e)
+        self.solutions[h] = data
+
+        res['output_image'] = 'display.png?hash=%s' % h
+        res['ok'] = True
+        return res
     
-    def process_rtof(self, e, string, do_approximations, nl, nu):
-        mcdp_library = library_from_env(e)
+    def process_rtof(self, model, string, do_approximations, nl, nu, tracer):
+        mcdp_library, ndp, dp, key = model
         parsed = mcdp_library.parse_constant(string)
 
 
         space = parsed.unit
         value = parsed.value
 
-        ndp, dp = self.get_ndp_dp_e(e)
-
         R = dp.get_res_space()
         LF = LowerSets(dp.get_fun_space())
 
@@ -193,15 +295,12 @@ class AppSolver2(object):
             raise DPSemanticError(msg)
 
         logger.info('query rtof: %s ...' % R.format(r))
-        tracer = Tracer(logger=logger)
-        
         max_steps = 10000
         intervals = False  
         
         res = {}
         if do_approximations:
-    
-            dpl, dpu = get_dp_bounds(dp, nl, nu)
+            dpl, dpu = self._get_dp_bounds(dp, key, nl, nu)
     
             result_l, _trace = solve_meat_solve_rtof(tracer, ndp, dpl, r,
                                                 intervals, max_steps, False)
@@ -233,15 +332,12 @@ class AppSolver2(object):
          
         return data, res
 
-    def process_ftor(self, e, string, do_approximations, nl, nu):
-        mcdp_library = library_from_env(e)
+    def process_ftor(self, model, string, do_approximations, nl, nu, tracer):
+        mcdp_library, ndp, dp, key = model
         parsed = mcdp_library.parse_constant(string)
 
         space = parsed.unit
         value = parsed.value
-         
-        
-        ndp, dp = self.get_ndp_dp_e(e)
         
         F = dp.get_fun_space()
         UR = UpperSets(dp.get_res_space())
@@ -254,16 +350,13 @@ class AppSolver2(object):
 
         logger.info('query rtof: %s ...' % F.format(f))
  
-        tracer = Tracer(logger=logger)
-        
         intervals = False
         max_steps = 10000
         res = {}
 
         if do_approximations:
+            dpl, dpu = self._get_dp_bounds(dp, key, nl, nu)
     
-            dpl, dpu = get_dp_bounds(dp, nl, nu)
-         
             result_l, _trace = solve_meat_solve_ftor(tracer, ndp, dpl, f,
                                              intervals, max_steps, False)
     
@@ -380,7 +473,9 @@ class AppSolver2(object):
             xaxis = str(e.request.params['xaxis'])
             yaxis = str(e.request.params['yaxis'])
  
-            ndp, dp = self.get_ndp_dp_e(e)
+            nl = int(e.request.params.get('nl', 1))
+            nu = int(e.request.params.get('nu', 1))
+            ndp, _, dpl, dpu = self.get_dp_bounds_e(e, nl, nu)
 
             fnames = ndp.get_fnames()
             rnames = ndp.get_rnames()
@@ -395,11 +490,6 @@ class AppSolver2(object):
 
             fsamples = get_samples(e.request, ndp)
 
-            nl = int(e.request.params.get('nl', 1))
-            nu = int(e.request.params.get('nu', 1))
-            
-            dpl, dpu = get_dp_bounds(dp, nl, nu)
-            
             def extract_ri(r):
                 if len(rnames) == 1:
                     return r
@@ -409,9 +499,9 @@ class AppSolver2(object):
                 
             ru_samples = []
             rl_samples = []
-            for f in fsamples:
-                rl = dpl.solve(f)
-                ru = dpu.solve(f)
+            rls = dpl.solve_many(fsamples)
+            rus = dpu.solve_many(fsamples)
+            for rl, ru in zip(rls, rus):
                 
                 mcdp_dev_warning('should use join instead of min')
         
@@ -454,6 +544,35 @@ class AppSolver2(object):
 
         return self.png_error_catch2(e.request, go)
 
+class CompiledDPCache(object):
+    """
+        LRU cache for the compiled DPs and their approximations, so
+        that they (and their solve caches) are shared across requests.
+
+        The keys include the hash of the sources of the model and of
+        its dependencies, so a changed model is compiled again.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """ Returns the cached value for key, or compute(). """
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._entries[key] = value
+                return value
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+
 @contextmanager
 def save_plot(output):
     """
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+from contextlib import contextmanager
+import Queue
+import threading
+import time
+import traceback
+import uuid
+
+from mcdp import logger
+from mcdp_dp.tracer import NullTracer
+
+
+__all__ = [
+    'SolveJobs',
+    'SolveCancelled',
+]
+
+
+class SolveCancelled(Exception):
+    pass
+
+
+class SolveJob(object):
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, f, description):
+        self.job_id = uuid.uuid4().hex
+        self.f = f
+        self.description = description
+        self.status = SolveJob.QUEUED
+        self.cancelled = False
+        self.result = None
+        self.error = None
+        # number of Kleene iterations so far (all loops)
+        self.iterations = 0
+        self.last_progress = None
+        self.t_submitted = time.time()
+        self.t_started = None
+        self.t_finished = None
+
+    def is_finished(self):
+        return self.status in [SolveJob.DONE, SolveJob.FAILED, SolveJob.CANCELLED]
+
+    def as_dict(self):
+        """ The state of the job, as returned to the browser. """
+        res = dict(job_id=self.job_id, status=self.status,
+                   description=self.description,
+                   iterations=self.iterations,
+                   progress=self.last_progress)
+        now = time.time()
+        if self.t_started is not None:
+            res['elapsed'] = (self.t_finished or now) - self.t_started
+        if self.status == SolveJob.DONE:
+            res['result'] = self.result
+        if self.status == SolveJob.FAILED:
+            res['error'] = self.error
+        return res
+
+
+class ProgressTracer(NullTracer):
+    """
+        A tracer that does not record anything, but reports each
+        iteration of the loops to the job, and raises SolveCancelled
+        when the job is cancelled.
+    """
+
+    def __init__(self, job):
+        NullTracer.__init__(self)
+        self.job = job
+
+    def _check_cancelled(self):
+        if self.job.cancelled:
+            raise SolveCancelled()
+
+    @contextmanager
+    def child(self, name):  # @UnusedVariable
+        self._check_cancelled()
+        yield self
+
+    @contextmanager
+    def iteration(self, i):
+        self._check_cancelled()
+        self.job.iterations += 1
+        self.job.last_progress = 'iteration %d' % i
+        yield self
+
+
+class SolveJobs(object):
+    """
+        Runs the solves in a pool of background threads, so that
+        the request threads are not blocked.
+
+            job_id = jobs.submit(f, 'description')
+            jobs.get_state(job_id)
+            jobs.cancel(job_id)
+
+        f(tracer) is called in a worker thread; it should pass the tracer
+        to the solver, so that the progress is reported and the job can
+        be cancelled between iterations. At most max_jobs are remembered;
+        the oldest finished ones are forgotten.
+    """
+
+    def __init__(self, nworkers, max_jobs):
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()  # job_id -> SolveJob
+        self.queue = Queue.Queue()
+        self.lock = threading.Lock()
+        self.workers = []
+        for i in range(nworkers):
+            t = threading.Thread(target=self._work, name='solve-worker-%d' % i)
+            t.daemon = True
+            t.start()
+            self.workers.append(t)
+
+    def submit(self, f, description=''):
+        """ Returns the job id. """
+        job = SolveJob(f, description)
+        with self.lock:
+            self.jobs[job.job_id] = job
+            self._forget_old()
+        self.queue.put(job)
+        return job.job_id
+
+    def _forget_old(self):
+        finished = [k for k, j in self.jobs.items() if j.is_finished()]
+        while len(self.jobs) > self.max_jobs and finished:
+            del self.jobs[finished.pop(0)]
+
+    def get_state(self, job_id):
+        """ Returns a dict with the state of the job;
+            raises KeyError if it does not exist. """
+        with self.lock:
+            job = self.jobs[job_id]
+        return job.as_dict()
+
+    def cancel(self, job_id):
+        """ Raises KeyError if the job does not exist. """
+        with self.lock:
+            job = self.jobs[job_id]
+            job.cancelled = True
+            if job.status == SolveJob.QUEUED:
+                job.status = SolveJob.CANCELLED
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            try:
+                self._run(job)
+            finally:
+                self.queue.task_done()
+
+    def _run(self, job):
+        with self.lock:
+            if job.cancelled:
+                return
+            job.status = SolveJob.RUNNING
+            job.t_started = time.time()
+        tracer = ProgressTracer(job)
+        try:
+            result = job.f(tracer)
+        except SolveCancelled:
+            status = SolveJob.CANCELLED
+        except Exception as e:
+            logger.error('Job %s failed: %s' % (job.description, e))
+            job.error = traceback.format_exc()
+            status = SolveJob.FAILED
+        else:
+            job.result = result
+            status = SolveJob.DONE
+        with self.lock:
+            job.t_finished = time.time()
+            job.status = status
@@ -1,7 +1,12 @@
+import threading
+import time
+
 from comptests.registrar import run_module_tests, comptest
 from mcdp_tests import logger
 from mcdp_web.main import WebApp
 from mcdp_web.resource_tree import ResourceThingViewSolver
+from mcdp_web.solver2.app_solver2 import CompiledDPCache
+from mcdp_web.solver2.solve_jobs import SolveJobs
 from mcdp_web_tests.test_jinja_rendering import with_pyramid_environment
 
 from contracts.utils import check_isinstance
@@ -94,7 +99,66 @@ def test_lib_creation1(env):
     assert 'ok' in res2
     assert res2['ok']
     assert '2 N' in res2['output_result']
-    
+
+
+@comptest
+def check_compiled_dp_cache():
+    cache = CompiledDPCache(max_size=2)
+    computed = []
+
+    def compute(x):
+        def f():
+            computed.append(x)
+            return x
+        return f
+
+    assert cache.get('a', compute('a')) == 'a'
+    assert cache.get('a', compute('a2')) == 'a'
+    cache.get(('a', 1, 1), compute('b'))
+    cache.get('c', compute('c'))
+    # 'a' was the least recently used
+    assert cache.get('a', compute('a3')) == 'a3'
+    assert computed == ['a', 'b', 'c', 'a3']
+
+
+@comptest
+def check_solve_jobs():
+    jobs = SolveJobs(nworkers=1, max_jobs=10)
+
+    def wait(job_id):
+        for _ in range(1000):
+            state = jobs.get_state(job_id)
+            if state['status'] in ['done', 'failed', 'cancelled']:
+                return state
+            time.sleep(0.01)
+        assert False, state
+
+    def f(tracer):
+        for i in range(1, 4):
+            with tracer.iteration(i):
+                pass
+        return 42
+
+    state = wait(jobs.submit(f))
+    assert state['status'] == 'done', state
+    assert state['result'] == 42
+    assert state['iterations'] == 3
+
+    started = threading.Event()
+
+    def forever(tracer):
+        started.set()
+        i = 0
+        while True:
+            i += 1
+            with tracer.iteration(i):
+                time.sleep(0.001)
+
+    job_id = jobs.submit(forever)
+    started.wait()
+    jobs.cancel(job_id)
+    assert wait(job_id)['status'] == 'cancelled'
+
+
 if __name__ == '__main__':
     run_module_tests()
-    
\ No newline at end of file
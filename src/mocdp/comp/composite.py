@@ -4,7 +4,7 @@ import sys
 from contracts import contract
 from contracts.utils import (format_dict_long, format_list_long, raise_desc,
     raise_wrapped)
-from mcdp_dp import Mux
+from mcdp_dp import Mux, dp_hash_cons
 from mcdp_posets import NotEqual, PosetProduct
 from mocdp.comp.context import Context, is_fun_node_name
 from mocdp.comp.wrap import SimpleWrap
@@ -147,6 +147,9 @@ class CompositeNamedDP(NamedDP):
     def get_dp(self):
         ndp = self.abstract()
         dp = ndp.get_dp()
+        if MCDPConstants.dp_hash_consing:
+            # share the identical sub-designs
+            dp = dp_hash_cons(dp)
         return dp
 
     def __repr__(self):
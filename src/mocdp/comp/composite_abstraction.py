@@ -1,12 +1,11 @@
 # -*- coding: utf-8 -*-
-from networkx.algorithms.cycles import simple_cycles
+from networkx import is_directed_acyclic_graph
 
 from contracts import contract
 from contracts.utils import raise_desc
 from mcdp_dp import DPLoop2, Mux
 from mcdp_dp.dp_series_simplification import make_series
 from mcdp_posets import PosetProduct, get_types_universe
-from mcdp import logger
 from mocdp.comp.composite import CompositeNamedDP
 from mocdp.comp.context_functions import dpgraph_making_sure_no_reps
 from mocdp.comp.wrap import SimpleWrap
@@ -18,10 +17,7 @@ def cndp_abstract(ndp):
     from .connection import get_connection_multigraph
     
     G = get_connection_multigraph(ndp.get_connections())
-    cycles = list(simple_cycles(G))
-    if len(cycles) > 0:
-        logger.debug('cndp_abstract: %d cycles' % len(cycles))
-    if not cycles:
+    if is_directed_acyclic_graph(G):
         return dpgraph_making_sure_no_reps(ndp.context)
     else:
         return cndp_abstract_loop2(ndp)
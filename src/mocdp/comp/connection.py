@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 from collections import Counter
+from itertools import islice
 
 from networkx import DiGraph, MultiDiGraph, NetworkXUnfeasible
-from networkx.algorithms import is_connected, simple_cycles, topological_sort
+from networkx.algorithms import (is_connected, is_directed_acyclic_graph,
+    simple_cycles, topological_sort)
 
 from contracts import contract
 from contracts.utils import (format_dict_long, format_list_long, raise_desc,
@@ -13,6 +15,7 @@ from mocdp.comp.composite import CompositeNamedDP
 from mocdp.comp.connection_reps import (relabel, there_are_repetitions,
     there_are_reps)
 from mocdp.comp.wrap import SimpleWrap
+from mcdp import MCDPConstants
 from mcdp.exceptions import DPInternalError, DPSemanticError
 
 from .context import Connection
@@ -647,16 +650,30 @@ def dpgraph(name2dp, connections, split):
                    split=split)
     return res
 
-@contract(returns='set(tuple,seq(tuple(str, str)))')
-def simple_cycles_as_edges(G):
-    cycles = list(simple_cycles(G))
+def iterate_cycles_as_edges(G, max_cycles=None):
+    """
+        Lazily yields the simple cycles of G, each as a tuple of edges,
+        stopping after max_cycles cycles (if not None).
+
+        Use is_directed_acyclic_graph(G) to check whether there
+        are any cycles at all: it takes linear time, while the number
+        of cycles can be exponential in the size of G.
+    """
     def c2e(c):
         for i in range(len(c)):
             n1 = c[i]
             n2 = c[(i + 1) % len(c)]
             yield n1, n2
 
-    return set([tuple(c2e(c)) for c in cycles])
+    for c in islice(simple_cycles(G), max_cycles):
+        yield tuple(c2e(c))
+
+
+@contract(returns='set(tuple,seq(tuple(str, str)))')
+def simple_cycles_as_edges(G, max_cycles=None):
+    if is_directed_acyclic_graph(G):
+        return set()
+    return set(iterate_cycles_as_edges(G, max_cycles))
 
 @contract(returns=Connection)
 def choose_connection_to_cut1(connections, name2dp):
@@ -665,10 +682,12 @@ def choose_connection_to_cut1(connections, name2dp):
     from collections import defaultdict
     counts = defaultdict(lambda: 0)
 
-    c_as_e = simple_cycles_as_edges(G)
-    if not c_as_e:
+    if is_directed_acyclic_graph(G):
         msg = 'There are no connections to cut.'
         raise_desc(ValueError, msg)
+
+    max_cycles = MCDPConstants.feedback_arc_set_exact_max_cycles
+    c_as_e = simple_cycles_as_edges(G, max_cycles=max_cycles)
     
     for cycle in c_as_e:
         for edge in cycle:
@@ -702,8 +721,7 @@ def dpgraph_(name2dp, connections, split):
         check_connections(name2dp, connections)
 
         G = get_connection_multigraph(connections)
-        cycles = list(simple_cycles(G))
-        if not cycles:
+        if is_directed_acyclic_graph(G):
             res = dpconnect(name2dp, connections, split=split)
             assert isinstance(res, SimpleWrap), (type(res), name2dp)
             return res
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+from itertools import islice
+import time
+
+from networkx import DiGraph, has_path, is_directed_acyclic_graph
+from networkx.algorithms.components import strongly_connected_components
+from networkx.algorithms.cycles import simple_cycles
+
+from mcdp import MCDPConstants, logger
+
+
+__all__ = [
+    'feedback_arc_set',
+    'greedy_feedback_arc_set',
+    'FeedbackArcSetTimeout',
+]
+
+
+class FeedbackArcSetTimeout(Exception):
+    pass
+
+
+def feedback_arc_set(G, edge_weight, exact_solver):
+    """
+        Returns a set of edges (i, j) of G of small total weight
+        whose removal makes G acyclic.
+
+        The problem is solved separately for each strongly connected
+        component. If the component has few cycles, it is solved
+        exactly by exact_solver(H, edge_weight, deadline), which can
+        raise FeedbackArcSetTimeout; otherwise, or if the time budget
+        is exceeded, we use greedy_feedback_arc_set().
+    """
+    max_cycles = MCDPConstants.feedback_arc_set_exact_max_cycles
+    budget = MCDPConstants.feedback_arc_set_time_budget
+
+    res = set()
+    sccs = sorted(strongly_connected_components(G), key=lambda _: sorted(_))
+    for nodes in sccs:
+        H = _simple_subgraph(G, nodes)
+        if H.number_of_edges() == 0:
+            continue
+        # self loops must always be cut
+        loops = set((u, v) for u, v in H.edges() if u == v)
+        res.update(loops)
+        H.remove_edges_from(loops)
+        if is_directed_acyclic_graph(H):
+            continue
+
+        ncycles = len(list(islice(simple_cycles(H), max_cycles + 1)))
+        if ncycles <= max_cycles:
+            deadline = time.time() + budget
+            try:
+                res.update(exact_solver(H, edge_weight, deadline))
+                continue
+            except FeedbackArcSetTimeout:
+                msg = ('Could not find the best edges to cut among %d nodes '
+                       'within %s s; using the heuristic.' % (len(nodes), budget))
+                logger.info(msg)
+        else:
+            msg = ('More than %d cycles among %d nodes; using the heuristic.'
+                   % (max_cycles, len(nodes)))
+            logger.info(msg)
+        res.update(greedy_feedback_arc_set(H, edge_weight))
+
+    return res
+
+
+def _simple_subgraph(G, nodes):
+    """ The subgraph of the (multi)graph G induced by nodes,
+        as a DiGraph. """
+    H = DiGraph()
+    H.add_nodes_from(nodes)
+    for u, v in G.edges(nodes):
+        if v in nodes:
+            H.add_edge(u, v)
+    return H
+
+
+def greedy_feedback_arc_set(G, edge_weight):
+    """
+        The heuristic of Eades, Lin and Smyth, with weighted degrees:
+        sinks are moved to the end of the order, sources to the
+        beginning, and otherwise the node that maximizes
+        (weight out - weight in) goes to the beginning. The edges
+        that go backwards in the order are a feedback arc set.
+        Then the edges whose removal is unnecessary are put back,
+        heaviest first.
+
+        G: a DiGraph without self loops.
+
+        Runs in polynomial time: O(n^2 + m) for the order,
+        O(m (n + m)) for the pruning.
+    """
+    succ = dict((n, set(G.successors(n))) for n in G.nodes())
+    pred = dict((n, set(G.predecessors(n))) for n in G.nodes())
+    remaining = set(G.nodes())
+
+    def delta(n):
+        wout = sum(edge_weight((n, m)) for m in succ[n])
+        win = sum(edge_weight((m, n)) for m in pred[n])
+        return wout - win
+
+    def remove(n):
+        remaining.remove(n)
+        for m in succ[n]:
+            pred[m].discard(n)
+        for m in pred[n]:
+            succ[m].discard(n)
+
+    s1 = []
+    s2 = []
+    while remaining:
+        changed = True
+        while changed:
+            changed = False
+            for n in sorted(remaining):
+                if not succ[n]:
+                    s2.append(n)
+                    remove(n)
+                    changed = True
+            for n in sorted(remaining):
+                if n in remaining and not pred[n]:
+                    s1.append(n)
+                    remove(n)
+                    changed = True
+        if remaining:
+            # sorting by name first makes the choice deterministic
+            n = max(sorted(remaining), key=delta)
+            s1.append(n)
+            remove(n)
+
+    order = s1 + list(reversed(s2))
+    position = dict((n, i) for i, n in enumerate(order))
+    back = [(u, v) for u, v in G.edges() if position[u] > position[v]]
+
+    # Put back the edges that are not needed, heaviest first.
+    H = G.copy()
+    H.remove_edges_from(back)
+    res = set()
+    for u, v in sorted(back, key=lambda e: (-edge_weight(e), e)):
+        # (u, v) closes a cycle iff there is a path from v to u
+        if has_path(H, v, u):
+            res.add((u, v))
+        else:
+            H.add_edge(u, v)
+    return res